@@ -13,6 +13,8 @@ CLASSIFIERS = ['Development Status :: 2 - Pre-Alpha',
                'License :: OSI Approved :: GNU General Public License v3 or later (GPLv3+)',
                'Operating System :: OS Independent',
                'Programming Language :: Python :: 3',
+               'Programming Language :: Python :: 3.7',
+               'Programming Language :: Python :: 3.8',
                'Topic :: Games/Entertainment :: Turn Based Strategy']
 
 KEYWORDS = 'imperialism remake turn based strategy game open source'
@@ -53,7 +55,9 @@ if __name__ == "__main__":
         keywords=KEYWORDS,
         package_dir={'': 'source'},
         packages=find_packages(where=os.path.join(HERE, 'source')),
+        python_requires='>=3.7',
         install_requires=['PyQt5>=5.15', 'ipgetter2>=1.10'],
         package_data=get_package_data_files(),
-        entry_points={'console_scripts': ['imperialism_remake_start=imperialism_remake.start:main']},
+        entry_points={'console_scripts': ['imperialism_remake_start=imperialism_remake.start:main',
+                                          'imperialism_remake_server=imperialism_remake.server.async_server:main']},
         zip_safe=False)
@@ -0,0 +1,180 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Channels and letters (see base.network) over asyncio streams instead of Qt sockets, so that a server can run without
+Qt. Speaks the same protocol (see lib.wire_protocol) as the Qt network client.
+"""
+
+import asyncio
+import logging
+
+from imperialism_remake.base import constants
+from imperialism_remake.base.letters import CHANNEL_PRIORITIES, create_codecs
+from imperialism_remake.lib import wire_protocol
+
+#: number of bytes read from a stream at once
+READ_SIZE = 256 * 1024
+
+#: if more bytes than this wait to be written, reading from the connection pauses until they are written
+WRITE_BUFFER_LIMIT = 4 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncNetworkClient:
+    """
+    Network client on an asyncio stream with the channels of base.network.NetworkClient. A callback connected to a
+    channel is called with (client, channel, action, content) like the received signal of a base.network.Channel.
+
+    run() reads from the connection until it is closed.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, codecs=None,
+                 compression_threshold=wire_protocol.COMPRESSION_THRESHOLD,
+                 max_frame_size=wire_protocol.MAX_FRAME_SIZE):
+        """
+        Starts with an empty channels list and sends the handshake.
+
+        :param reader: Stream reader of the connection.
+        :param writer: Stream writer of the connection.
+        :param codecs: The codecs, preferred first, or None for the ones of base.letters.create_codecs().
+        """
+        if codecs is None:
+            codecs = create_codecs()
+        self._reader = reader
+        self._writer = writer
+        self._connected = True
+
+        self.protocol = wire_protocol.WireProtocol(self._write, self._process, self._abort,
+                                                   asyncio.get_event_loop().call_soon, codecs, compression_threshold,
+                                                   max_frame_size)
+        self.channels = {}
+        self.channel_priorities = dict(CHANNEL_PRIORITIES)
+
+        self.protocol.send_handshake()
+
+    @classmethod
+    async def open_connection(cls, port, host='127.0.0.1', **kwargs):
+        """
+        Connects to a server, the returned client still has to run().
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer, **kwargs)
+
+    async def run(self):
+        """
+        Reads and processes the letters until the connection is closed.
+        """
+        try:
+            while self._connected:
+                data = await self._reader.read(READ_SIZE)
+                if not data:
+                    break
+                self.protocol.receive(data)
+
+                # back pressure, do not read more while the other side does not take what we write
+                if self.bytes_to_write() > WRITE_BUFFER_LIMIT:
+                    await self._writer.drain()
+        except ConnectionError as error:
+            logger.info('connection to %s lost: %s', self.peer_address(), error)
+        except Exception:
+            logger.exception('closes connection to %s after an error', self.peer_address())
+        finally:
+            self._connected = False
+            self.protocol.reset()
+            self._writer.close()
+
+    def peer_address(self):
+        """
+        :return: A tuple of the peer address and the peer port
+        """
+        return self._writer.get_extra_info('peername')
+
+    def is_connected(self):
+        return self._connected and not self._writer.is_closing()
+
+    def disconnect_from_host(self):
+        self._connected = False
+        self._writer.close()
+
+    def bytes_to_write(self) -> int:
+        """
+        Number of bytes sent but not yet written to the network.
+        """
+        return self._writer.transport.get_write_buffer_size()
+
+    def connect_to_channel(self, channel: constants.C, callback: callable):
+        """
+        Connect a callback to a channel.
+        """
+        self.channels.setdefault(channel, []).append(callback)
+
+    def disconnect_from_channel(self, channel: constants.C, callback: callable):
+        """
+        Disconnects a callback from a channel (which must exist, otherwise an error is raised).
+        """
+        if channel not in self.channels:
+            raise RuntimeError('Channel with this name not existing.')
+        self.channels[channel].remove(callback)
+        if not self.channels[channel]:
+            del self.channels[channel]
+
+    def _process(self, letter):
+        """
+        A letter was received, calls the callbacks of its channel. Not intended for outside use.
+        """
+        logger.debug('network client received letter: {}'.format(letter))
+        channel = letter['channel']
+
+        # do we have receivers in this category
+        if channel not in self.channels:
+            raise RuntimeError('Received message on channel {} which is not existing.'.format(channel))
+
+        # a callback may disconnect from the channel
+        for callback in list(self.channels[channel]):
+            callback(self, channel, letter['action'], letter['content'])
+
+    def send(self, channel: constants.C, action: constants.M, content=None):
+        """
+        Given a channel and a action id and optionally a message content wraps them in one dict (a letter) and sends
+        it.
+        """
+        if not self.is_connected():
+            raise RuntimeError('Try to send on unconnected socket.')
+
+        letter = {'channel': channel, 'action': action, 'content': content}
+        self.protocol.send(letter, self.channel_priorities.get(channel, 0))
+
+    def set_batching(self, batching) -> None:
+        """
+        Switches batching of sent messages on or off, switching it off writes the queued messages.
+        """
+        self.protocol.set_batching(batching)
+
+    def flush(self) -> None:
+        """
+        Writes the queued messages (if batching), the transport writes them as soon as possible.
+        """
+        self.protocol.flush()
+
+    def _write(self, data):
+        if self.is_connected():
+            self._writer.write(data)
+
+    def _abort(self, reason):
+        logger.error('closes connection to %s: %s', self.peer_address(), reason)
+        self.disconnect_from_host()
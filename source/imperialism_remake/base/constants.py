@@ -157,6 +157,7 @@ class M(utils.AutoNumberedEnum):
     LOBBY_SCENARIO_CORE_LIST = ()
     LOBBY_SCENARIO_PREVIEW = ()
     LOBBY_CONNECTED_CLIENTS = ()
+    LOBBY_GAME_LIST = ()
 
     GAME_TURN_PROCESS_REQUEST = ()
     GAME_TURN_PROCESS_RESPONSE = ()
@@ -164,6 +165,9 @@ class M(utils.AutoNumberedEnum):
     GAME_SAVE_RESPONSE = ()
     GAME_LOAD_REQUEST = ()
     GAME_LOAD_RESPONSE = ()
+    GAME_JOIN_REQUEST = ()
+    GAME_CREATE_REQUEST = ()
+    GAME_FAILED = ()
 
 
 @unique
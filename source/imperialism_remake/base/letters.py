@@ -0,0 +1,58 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Letters are the messages of the game: a channel, an action and a content (see base.network.NetworkClient.send). This
+part does not depend on the transport, base.network sends letters over Qt sockets and base.async_network over
+asyncio streams.
+"""
+
+from imperialism_remake.base import constants
+from imperialism_remake.lib import wire_codec
+
+#: default priorities of the channels if batching, lower first so that game traffic is not stuck behind chat
+CHANNEL_PRIORITIES = {constants.C.SYSTEM: 0, constants.C.GAME: 0, constants.C.GENERAL: 1, constants.C.LOBBY: 1,
+                      constants.C.CHAT: 2}
+
+
+class LetterCodec(wire_codec.CompactCodec):
+    """
+    Compact codec for letters (see NetworkClient.send). The channel and the action are written as one byte each
+    followed by the compactly encoded content.
+    """
+
+    codec_id = 3
+
+    def encode(self, letter) -> bytes:
+        buffer = bytearray((letter['channel'].value, letter['action'].value))
+        self._write(buffer, letter['content'])
+        return bytes(buffer)
+
+    def decode(self, data):
+        return {'channel': constants.C(data[0]), 'action': constants.M(data[1]),
+                'content': super().decode(memoryview(data)[2:])}
+
+
+def create_codecs(letter_codec: LetterCodec = None) -> []:
+    """
+    The codecs of a network client, preferred first. There is no pickle codec, the other side of a connection is not
+    trusted.
+
+    :param letter_codec: The letter codec, possibly with encoders registered, or None for a plain one.
+    """
+    if letter_codec is None:
+        letter_codec = LetterCodec()
+    return [letter_codec]
@@ -24,6 +24,7 @@ import logging
 from PyQt5 import QtCore, QtNetwork
 
 from imperialism_remake.base import constants
+from imperialism_remake.base.letters import CHANNEL_PRIORITIES, create_codecs
 from imperialism_remake.lib import network as lib_network
 
 logger = logging.getLogger(__name__)
@@ -42,15 +43,19 @@ class NetworkClient(lib_network.ExtendedTcpSocket):
     decoupling of the message transport and message processing.
     """
 
-    def __init__(self, socket: QtNetwork.QTcpSocket = None):
+    def __init__(self, socket: QtNetwork.QTcpSocket = None, codecs=None):
         """
         We start with an empty channels list.
 
         :param socket: A socket if there is one existing already.
+        :param codecs: The codecs, preferred first, or None for the ones of create_codecs().
         """
-        super().__init__(socket)
+        if codecs is None:
+            codecs = create_codecs()
+        super().__init__(socket, codecs)
         self.received.connect(self._process)
         self.channels = {}
+        self.channel_priorities = dict(CHANNEL_PRIORITIES)
 
     def _create_new_channel(self, channel: constants.C):
         """
@@ -94,7 +99,7 @@ class NetworkClient(lib_network.ExtendedTcpSocket):
     def disconnect_from_channel(self, channel: constants.C, callback: callable):
         """
         Given a channel name (which must exist, otherwise an error is raised) disconnects a
-        callback from this channel.
+        callback from this channel. The channel is removed with its last callback.
 
         :param channel: Name of the channel
         :param callback: A callable
@@ -102,7 +107,8 @@ class NetworkClient(lib_network.ExtendedTcpSocket):
         if channel not in self.channels:
             raise RuntimeError('Channel with this name not existing.')
         self.channels[channel].received.disconnect(callback)
-        self._remove_channel(channel, ignore_not_existing=True)
+        if not self.channels[channel].has_receivers():
+            self._remove_channel(channel)
 
     def _process(self, letter):
         """
@@ -144,7 +150,7 @@ class NetworkClient(lib_network.ExtendedTcpSocket):
         letter = {'channel': channel, 'action': action, 'content': content}
 
         # send
-        super().send(letter)
+        super().send(letter, self.channel_priorities.get(channel, 0))
 
 
 class Channel(QtCore.QObject):
@@ -160,3 +166,9 @@ class Channel(QtCore.QObject):
     def __init__(self):
         super().__init__()
         self.message_counter = 0
+
+    def has_receivers(self) -> bool:
+        """
+        Whether any callback is still connected to this channel.
+        """
+        return self.receivers(self.received) > 0
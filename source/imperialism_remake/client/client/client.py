@@ -180,7 +180,7 @@ class Client:
         # set it active again or it doesn't get keyboard focus
         self.main_window.activateWindow()
 
-        network_connection.connect_to_system(self._system_messages)
+        network_connection.connect_to_game(self._game_messages)
 
         logger.debug('Client initialized')
 
@@ -280,7 +280,7 @@ class Client:
         logger.debug('single_player_start scenario_file:%s, selected_nation:%s', scenario_file, selected_nation)
 
         # lobby_widget.close()
-        network_connection.send_game_to_load({'filename': scenario_file, 'nation': selected_nation})
+        network_connection.send_game_to_create(scenario_file, selected_nation)
 
     def switch_to_editor_screen(self):
         """
@@ -306,15 +306,22 @@ class Client:
         dialog.setFixedSize(QtCore.QSize(900, 700))
         dialog.show()
 
-    def _system_messages(self, client: ServerNetworkClient, channel: constants.C, action: constants.M, content):
+    def _game_messages(self, client: ServerNetworkClient, channel: constants.C, action: constants.M, content):
         if action == constants.M.GAME_LOAD_RESPONSE:
-            logger.debug("_system_messages message action:%s, scenario:%s", action, content)
+            logger.debug("_game_messages message action:%s, scenario:%s", action, content)
             server_scenario_base = content['server_scenario_base']
             selected_nation = content['nation']
+            scenario_version = content.get('version')
 
-            self.game_widget = GameMainScreen(self, server_scenario_base, selected_nation)
+            self.game_widget = GameMainScreen(self, server_scenario_base, selected_nation, scenario_version)
             self.widget_switcher.switch(self.game_widget)
 
+        elif action == constants.M.GAME_FAILED:
+            # the server lost the game
+            logger.error('_game_messages game failed: %s', content)
+            self.switch_to_start_screen()
+            self.schedule_notification('The game ended because of a server error.')
+
     def quit(self):
         """
         Cleans up and closes the main window which causes app.exec_() to finish.
@@ -17,6 +17,7 @@ import logging
 
 from imperialism_remake.base import constants, tools
 from imperialism_remake.base.network import NetworkClient
+from imperialism_remake.server import wire_encoders
 
 logger = logging.getLogger(__name__)
 
@@ -43,8 +44,7 @@ class ClientNetworkConnection:
     def stop(self):
         logger.debug('stop')
         self._network_client.send(constants.C.SYSTEM, constants.M.SYSTEM_SHUTDOWN)
-        # TODO is this okay, is there a better way
-        self._network_client.socket.flush()
+        self._network_client.flush()
 
     def start(self):
         logger.debug('start')
@@ -64,6 +64,10 @@ class ClientNetworkConnection:
         logger.debug('request_scenario_preview_from_lobby')
         self._network_client.send(constants.C.LOBBY, constants.M.LOBBY_SCENARIO_PREVIEW, scenario_file)
 
+    def request_game_list_from_lobby(self):
+        logger.debug('request_game_list_from_lobby')
+        self._network_client.send(constants.C.LOBBY, constants.M.LOBBY_GAME_LIST)
+
     def disconnect_from_lobby(self, callback):
         logger.debug('disconnect_from_lobby')
         self._network_client.disconnect_from_channel(constants.C.LOBBY, callback)
@@ -84,6 +88,16 @@ class ClientNetworkConnection:
         logger.debug('send_game_to_load')
         self._network_client.send(constants.C.SYSTEM, constants.M.GAME_LOAD_REQUEST, filename)
 
+    def send_game_to_create(self, scenario_file, nation):
+        logger.debug('send_game_to_create:%s', scenario_file)
+        self._network_client.send(constants.C.LOBBY, constants.M.GAME_CREATE_REQUEST,
+                                  {'scenario': scenario_file, 'nation': nation})
+
+    def send_game_to_join(self, game_id, nation):
+        logger.debug('send_game_to_join:%s', game_id)
+        self._network_client.send(constants.C.LOBBY, constants.M.GAME_JOIN_REQUEST,
+                                  {'game_id': game_id, 'nation': nation})
+
     def disconnect_from_game(self, callback):
         logger.debug('disconnect_from_game')
         self._network_client.disconnect_from_channel(constants.C.GAME, callback)
@@ -121,4 +135,4 @@ class ClientNetworkConnection:
                                   tools.get_option(constants.Option.LOCALCLIENT_NAME))
 
 
-network_connection = ClientNetworkConnection(NetworkClient())
+network_connection = ClientNetworkConnection(NetworkClient(codecs=wire_encoders.create_codecs()))
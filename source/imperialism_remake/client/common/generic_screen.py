@@ -16,7 +16,7 @@
 import logging
 import os
 
-from PyQt5 import QtWidgets, QtCore
+from PyQt5 import QtWidgets, QtCore, QtGui
 
 from imperialism_remake.base import tools, constants
 from imperialism_remake.client.common.info_panel import InfoPanel
@@ -67,6 +67,14 @@ class GenericScreen(QtWidgets.QWidget):
         # layout of widgets and toolbar
         self._layout = QtWidgets.QGridLayout(self)
 
+    def _add_grid_button(self):
+        # show or hide the coordinates of the tiles on the main map
+        a = qt.create_action(QtGui.QIcon(), 'Grid', self, toggle_connection=self.main_map.set_grid_visible,
+                             checkable=True)
+        a.setToolTip('Show coordinates')
+        a.setChecked(self.main_map.is_grid_visible())
+        self._toolbar.addAction(a)
+
     def _add_help_and_exit_buttons(self, client):
         # spacer
         spacer = QtWidgets.QWidget()
@@ -104,8 +104,23 @@ class InfoPanel(QtWidgets.QWidget):
 
             self._update_resource_info(column, row)
 
+            text += self._tile_content_text(column, row)
+
         self.tile_label.setText(text)
 
+    def _tile_content_text(self, column, row):
+        server_scenario = self.scenario.server_scenario
+
+        text = ''
+        for structure in server_scenario.get_structures_at(row, column) or []:
+            name = server_scenario.get_structure_settings()[structure.get_type().value]['name']
+            text += '<br>Structure: {} (level {})'.format(name, structure.get_level())
+        for workforce in server_scenario.get_workforces_at(row, column):
+            name = server_scenario.get_workforce_settings()[workforce.get_type().value]['name']
+            nation_name = server_scenario.nation_property(workforce.get_nation(), constants.NationProperty.NAME)
+            text += '<br>Worker: {} ({})'.format(name, nation_name)
+        return text
+
     def _update_resource_info(self, column, row):
         resource = self.scenario.server_scenario.terrain_resource_at(column, row)
         if resource > 0:
@@ -14,18 +14,25 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 import logging
+import math
 
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtCore import QRectF
 
 from imperialism_remake.base import constants
-from imperialism_remake.client.utils import scene_utils
+from imperialism_remake.client.common.map_overlay import MapOverlay, GridOverlay
+from imperialism_remake.client.common.terrain_layer import TerrainLayer
+from imperialism_remake.client.utils.borders import Outlines
 from imperialism_remake.client.utils.scene_utils import scene_position
 from imperialism_remake.lib import qt
 from imperialism_remake.server.models.prospector_resource_state import ProspectorResourceState
+from imperialism_remake.server.models.scenario_change_log import ScenarioChangeLog
 
 logger = logging.getLogger(__name__)
 
+#: number of tiles around the visible part of the map for which the overlays (coordinates, towns, ...) have items
+OVERLAY_MARGIN = 2
+
 
 class MainMap(QtWidgets.QGraphicsView):
     """
@@ -57,9 +64,36 @@ class MainMap(QtWidgets.QGraphicsView):
         self.current_column = -1
         self.current_row = -1
 
-        self._borders = []
+        # province -> item, nation -> item
+        self._province_borders = {}
+        self._nation_borders = {}
+        self._province_outlines = None
+        self._nation_outlines = None
+        # tiles and provinces changed since the borders were drawn
+        self._changed_border_tiles = set()
+        self._changed_border_provinces = set()
         self._rivers = []
-        self._roads = []
+        # road section (frozenset of both positions) -> item
+        self._roads = {}
+
+        self._terrain_layer = None
+        # the server scenario the changes are received from (see _scenario_changed)
+        self._observed_scenario = None
+        # the scenario base drawn, changes of it are drawn when they happen
+        self._drawn_scenario_base = None
+
+        # items only for the visible part of the map (see _update_overlay_region)
+        self._grid_overlay = None
+        self._towns_overlay = None
+        self._structures_overlay = None
+        self._prospector_overlay = None
+        self._overlay_region = None
+        self._grid_visible = True
+        self._city_pixmap = None
+        # structure id -> structure, of the structures in the structures overlay
+        self._structures = {}
+        # (nation, row, column) -> revealed resource type, of the entries in the prospector overlay
+        self._prospector_resources = {}
 
     def redraw(self) -> None:
         """
@@ -67,7 +101,12 @@ class MainMap(QtWidgets.QGraphicsView):
         """
         logger.debug('redraw started')
 
+        # clear deletes all items
         self.scene.clear()
+        self._province_borders = {}
+        self._nation_borders = {}
+        self._rivers = []
+        self._roads = {}
 
         columns = self.scenario.server_scenario[constants.ScenarioProperty.MAP_COLUMNS]
         rows = self.scenario.server_scenario[constants.ScenarioProperty.MAP_ROWS]
@@ -76,57 +115,102 @@ class MainMap(QtWidgets.QGraphicsView):
         height = rows * constants.TILE_SIZE
         self.scene.setSceneRect(0, 0, width, height)
 
-        self._fill_textures(columns, rows, self.scenario.get_terrain_type_to_pixmap_mapper(),
-                            self.scenario.server_scenario.terrain_at)
+        self._observe_scenario()
 
-        self._fill_textures(columns, rows, self.scenario.get_terrain_resource_to_pixmap_mapper(),
-                            self.scenario.server_scenario.terrain_resource_at)
+        self._draw_terrain()
 
         self._fill_half_tiles(columns, rows)
 
         self._draw_rivers()
 
-        self._draw_towns_and_names()
-
-        self._draw_grid_and_coords(columns, rows)
+        self._create_overlays()
 
+        self._drawn_scenario_base = None
         self.partial_redraw()
 
+        self._update_overlay_region()
+
         # emit focus changed with -1, -1
         self.mouse_move_event.emit(-1, -1)
 
         logger.debug('redraw finished')
 
     def partial_redraw(self):
+        """
+        Draws the roads, structures, towns, borders and revealed resources if the scenario base was replaced as a whole
+        (a full turn result). Changes of the drawn scenario base are drawn when they happen (see _scenario_changed).
+        """
+        scenario_base = self.scenario.server_scenario.get_scenario_base()
+        if scenario_base is self._drawn_scenario_base:
+            return
+
         logger.debug('partial_redraw started')
+        self._drawn_scenario_base = scenario_base
 
         self._draw_roads()
 
         self._draw_structures()
 
+        self._draw_towns_and_names()
+
         self._draw_province_and_nation_borders()
 
         self._draw_prospector_terrain_resources()
 
         logger.debug('partial_redraw finished')
 
-    def _fill_textures(self, columns, rows, mapper, obj_type_getter) -> None:
-        logger.debug("_fill_textures")
-        for column in range(0, columns):
-            for row in range(0, rows):
-                self.fill_texture(column, row, mapper, obj_type_getter(column, row))
+    def _observe_scenario(self) -> None:
+        server_scenario = self.scenario.server_scenario
+        if self._observed_scenario is not server_scenario:
+            if self._observed_scenario is not None:
+                self._observed_scenario.remove_change_event_handler(self._scenario_changed)
+            server_scenario.add_change_event_handler(self._scenario_changed)
+            self._observed_scenario = server_scenario
 
-    def fill_texture(self, column, row, mapper, obj_type, z_value=1) -> None:
-        pixmap = mapper.get_pixmap_of_type(obj_type)
-        if pixmap is None:
-            # logger.warning("No pixmap defined for type:%s, col:%s, row:%s", obj_type, column, row)
+    def _scenario_changed(self, kind, arguments) -> None:
+        """
+        A change of the scenario (see ScenarioChangeLog), only the items of what changed are added, updated or removed.
+        """
+        if self.scenario.server_scenario.get_scenario_base() is not self._drawn_scenario_base:
+            # everything is drawn anyway
             return
 
-        sx, sy = scene_position(column, row)
-        scene_utils.put_pixmap_in_tile_center(self.scene, pixmap, sx, sy, z_value)
+        if kind in (ScenarioChangeLog.TERRAIN, ScenarioChangeLog.TERRAIN_RESOURCE):
+            column, row = arguments[0], arguments[1]
+            self._terrain_layer.invalidate_tile(column, row)
+        elif kind == ScenarioChangeLog.ROAD:
+            self.draw_road(*arguments)
+        elif kind == ScenarioChangeLog.REMOVED_ROAD:
+            self._remove_road(*arguments)
+        elif kind in (ScenarioChangeLog.STRUCTURE, ScenarioChangeLog.UPGRADED_STRUCTURE):
+            row, column = arguments[0], arguments[1]
+            self._draw_structures_at(row, column)
+        elif kind in (ScenarioChangeLog.PROVINCE_TILE, ScenarioChangeLog.REMOVED_PROVINCE_TILE):
+            province, position = arguments
+            self._borders_changed([position], [province])
+        elif kind == ScenarioChangeLog.PROVINCE_NATION:
+            province = arguments[0]
+            self._draw_town(province)
+            self._borders_changed(
+                self.scenario.server_scenario.province_property(province, constants.ProvinceProperty.TILES),
+                [province])
+        elif kind == ScenarioChangeLog.PROSPECTOR_RESOURCE_STATE:
+            self._draw_prospector_terrain_resource(*arguments)
+
+    def _draw_terrain(self) -> None:
+        logger.debug("_draw_terrain")
+        # terrain and resources of all tiles in one item, rendered in chunks when visible
+        self._terrain_layer = TerrainLayer(self.scenario.server_scenario,
+                                           self.scenario.get_terrain_type_to_pixmap_mapper(),
+                                           self.scenario.get_terrain_resource_to_pixmap_mapper())
+        self._terrain_layer.setZValue(1)
+        self.scene.addItem(self._terrain_layer)
 
     def _draw_prospector_terrain_resources(self):
         logger.debug("_draw_prospector_terrain_resources")
+        self._prospector_overlay.clear()
+        self._prospector_resources = {}
+
         if self._selected_nation is None:
             selected_nations = self.scenario.server_scenario.nations()
         else:
@@ -137,9 +221,37 @@ class MainMap(QtWidgets.QGraphicsView):
                                                                             constants.NationProperty.PROSPECTOR_RESOURCE_STATE).items():
                 for column, prospector_resource_state in value.items():
                     for resource_type, resource_state in prospector_resource_state.items():
-                        if ProspectorResourceState.REVEALED == resource_state:
-                            self.fill_texture(column, row, self.scenario.get_terrain_resource_to_pixmap_mapper(),
-                                              resource_type)
+                        self._draw_prospector_terrain_resource(nation, row, column, resource_type, resource_state)
+
+    def _draw_prospector_terrain_resource(self, nation, row, column, resource_type, resource_state):
+        if self._selected_nation is not None and nation != self._selected_nation:
+            return
+
+        key = nation, row, column
+        if ProspectorResourceState.REVEALED == resource_state:
+            self._prospector_resources[key] = resource_type
+            self._prospector_overlay.set_entry(key, column, row)
+        elif key in self._prospector_resources:
+            del self._prospector_resources[key]
+            self._prospector_overlay.remove_entry(key)
+
+    @staticmethod
+    def _create_prospector_items(scene):
+        item = scene.addPixmap(QtGui.QPixmap())
+        item.setZValue(1)
+        return [item]
+
+    def _show_prospector_items(self, items, key, column, row):
+        item = items[0]
+        pixmap = self.scenario.get_terrain_resource_to_pixmap_mapper().get_pixmap_of_type(
+            self._prospector_resources[key])
+        if pixmap is None:
+            item.hide()
+            return
+
+        item.setPixmap(pixmap)
+        sx, sy = scene_position(column, row)
+        item.setOffset(sx * constants.TILE_SIZE, sy * constants.TILE_SIZE)
 
     def _fill_half_tiles(self, columns, rows) -> None:
         logger.debug("_fill_half_tiles")
@@ -156,99 +268,211 @@ class MainMap(QtWidgets.QGraphicsView):
             item.setBrush(brush)
             item.setZValue(1)
 
-    def _draw_grid_and_coords(self, columns, rows) -> None:
-        logger.debug("_draw_grid_and_coords")
-        # draw the grid and the coordinates
-        for column in range(0, columns):
-            for row in range(0, rows):
-                sx, sy = scene_position(column, row)
-                # item = self.scene.addRect(sx * constants.TILE_SIZE, sy * constants.TILE_SIZE,  constants.TILE_SIZE,  constants.TILE_SIZE)
-                # item.setZValue(1000)
-                text = '({},{})'.format(column, row)
-                item = QtWidgets.QGraphicsSimpleTextItem(text)
-                item.setBrush(QtGui.QBrush(QtCore.Qt.black))
-                item.setPos((sx + 0.5) * constants.TILE_SIZE - item.boundingRect().width() / 2,
-                            sy * constants.TILE_SIZE)
-                item.setZValue(1001)
-                self.scene.addItem(item)
+    def _create_overlays(self) -> None:
+        logger.debug("_create_overlays")
+        # all items were deleted with the scene
+        self._grid_overlay = GridOverlay(self.scene, self._create_grid_items, self._show_grid_items)
+        self._grid_overlay.set_visible(self._grid_visible)
+        self._city_pixmap = QtGui.QPixmap(constants.extend(constants.GRAPHICS_MAP_FOLDER, 'city.png'))
+        self._towns_overlay = MapOverlay(self.scene, self._create_town_items, self._show_town_items)
+        self._structures_overlay = MapOverlay(self.scene, self._create_structure_items, self._show_structure_items)
+        self._structures = {}
+        self._prospector_overlay = MapOverlay(self.scene, self._create_prospector_items, self._show_prospector_items)
+        self._prospector_resources = {}
+        self._overlay_region = None
+
+    def _update_overlay_region(self) -> None:
+        """
+        The overlays only have items for the visible part of the map (and some tiles around it).
+        """
+        if self._grid_overlay is None:
+            return
+
+        columns = self.scenario.server_scenario[constants.ScenarioProperty.MAP_COLUMNS]
+        rows = self.scenario.server_scenario[constants.ScenarioProperty.MAP_ROWS]
+        v = self.mapToScene(self.viewport().rect()).boundingRect()
+        # tiles of every second row are shifted right by one half
+        first_column = max(0, math.floor(v.left() / constants.TILE_SIZE - 0.5) - OVERLAY_MARGIN)
+        last_column = min(columns, math.ceil(v.right() / constants.TILE_SIZE) + OVERLAY_MARGIN)
+        first_row = max(0, math.floor(v.top() / constants.TILE_SIZE) - OVERLAY_MARGIN)
+        last_row = min(rows, math.ceil(v.bottom() / constants.TILE_SIZE) + OVERLAY_MARGIN)
+        region = range(first_column, last_column), range(first_row, last_row)
+        if region == self._overlay_region:
+            return
+        self._overlay_region = region
+
+        for overlay in (self._grid_overlay, self._towns_overlay, self._structures_overlay, self._prospector_overlay):
+            overlay.set_region(*region)
+
+    def set_grid_visible(self, visible) -> None:
+        """
+        Shows or hides the coordinates of the tiles.
+        """
+        self._grid_visible = visible
+        if self._grid_overlay is not None:
+            self._grid_overlay.set_visible(visible)
+
+    def is_grid_visible(self) -> bool:
+        return self._grid_visible
+
+    @staticmethod
+    def _create_grid_items(scene):
+        item = QtWidgets.QGraphicsSimpleTextItem()
+        item.setBrush(QtGui.QBrush(QtCore.Qt.black))
+        item.setZValue(1001)
+        scene.addItem(item)
+        return [item]
+
+    @staticmethod
+    def _show_grid_items(items, _, column, row):
+        item = items[0]
+        item.setText('({},{})'.format(column, row))
+        sx, sy = scene_position(column, row)
+        item.setPos((sx + 0.5) * constants.TILE_SIZE - item.boundingRect().width() / 2, sy * constants.TILE_SIZE)
 
     def _draw_towns_and_names(self) -> None:
         logger.debug("_draw_towns_and_names")
-        # draw towns and names
-        city_pixmap = QtGui.QPixmap(constants.extend(constants.GRAPHICS_MAP_FOLDER, 'city.png'))
+        self._towns_overlay.clear()
         for nation in self.scenario.server_scenario.nations():
             # get all provinces of this nation
-            provinces = self.scenario.server_scenario.provinces_of_nation(nation)
-            for province in provinces:
-                column, row = self.scenario.server_scenario.province_property(province,
-                                                                              constants.ProvinceProperty.TOWN_LOCATION)
-                sx, sy = scene_position(column, row)
-                # center city image on center of tile
-                scene_utils.put_pixmap_in_tile_center(self.scene, city_pixmap, sx, sy, 6)
-                # display province name below
-                province_name = self.scenario.server_scenario.province_property(province,
-                                                                                constants.ProvinceProperty.NAME)
-                item = self.scene.addSimpleText(province_name)
-                item.setPen(qt.TRANSPARENT_PEN)
-                item.setBrush(QtGui.QBrush(QtCore.Qt.darkRed))
-                x = (sx + 0.5) * constants.TILE_SIZE - item.boundingRect().width() / 2
-                y = (sy + 1) * constants.TILE_SIZE - item.boundingRect().height()
-                item.setPos(x, y)
-                item.setZValue(6)
-                # display rounded rectangle below province name
-                bx = 8
-                by = 4
-                background = QtCore.QRectF(x - bx, y - by,
-                                           item.boundingRect().width() + 2 * bx,
-                                           item.boundingRect().height() + 2 * by)
-                path = QtGui.QPainterPath()
-                path.addRoundedRect(background, 50, 50)
-                item = self.scene.addPath(path, pen=qt.TRANSPARENT_PEN,
-                                          brush=QtGui.QBrush(QtGui.QColor(128, 128, 255, 64)))
-                item.setZValue(5)
+            for province in self.scenario.server_scenario.provinces_of_nation(nation):
+                self._draw_town(province)
+
+    def _draw_town(self, province) -> None:
+        if self.scenario.server_scenario.province_property(province, constants.ProvinceProperty.NATION) is None:
+            self._towns_overlay.remove_entry(province)
+            return
+
+        column, row = self.scenario.server_scenario.province_property(province,
+                                                                      constants.ProvinceProperty.TOWN_LOCATION)
+        self._towns_overlay.set_entry(province, column, row)
+
+    def _create_town_items(self, scene):
+        city = scene.addPixmap(self._city_pixmap)
+        city.setZValue(6)
+        name = scene.addSimpleText('')
+        name.setPen(qt.TRANSPARENT_PEN)
+        name.setBrush(QtGui.QBrush(QtCore.Qt.darkRed))
+        name.setZValue(6)
+        background = scene.addPath(QtGui.QPainterPath(), pen=qt.TRANSPARENT_PEN,
+                                   brush=QtGui.QBrush(QtGui.QColor(128, 128, 255, 64)))
+        background.setZValue(5)
+        return [city, name, background]
+
+    def _show_town_items(self, items, province, column, row):
+        city, name, background = items
+        sx, sy = scene_position(column, row)
+        # center city image on center of tile
+        city.setOffset((sx + 0.5) * constants.TILE_SIZE - self._city_pixmap.width() / 2,
+                       (sy + 0.5) * constants.TILE_SIZE - self._city_pixmap.height() / 2)
+        # display province name below
+        name.setText(self.scenario.server_scenario.province_property(province, constants.ProvinceProperty.NAME))
+        x = (sx + 0.5) * constants.TILE_SIZE - name.boundingRect().width() / 2
+        y = (sy + 1) * constants.TILE_SIZE - name.boundingRect().height()
+        name.setPos(x, y)
+        # display rounded rectangle below province name
+        bx = 8
+        by = 4
+        path = QtGui.QPainterPath()
+        path.addRoundedRect(QtCore.QRectF(x - bx, y - by, name.boundingRect().width() + 2 * bx,
+                                          name.boundingRect().height() + 2 * by), 50, 50)
+        background.setPath(path)
+
+    def _borders_changed(self, tiles, provinces) -> None:
+        """
+        Tiles (column, row) may have changed their province or nation. An edit changes several tiles at once, the
+        borders are drawn once after it.
+        """
+        if not self._changed_border_tiles and not self._changed_border_provinces:
+            QtCore.QTimer.singleShot(0, self._draw_changed_borders)
+        neighbor_table = self.scenario.server_scenario.get_neighbor_table()
+        self._changed_border_tiles.update(neighbor_table.index(column, row) for column, row in tiles)
+        self._changed_border_tiles.discard(None)
+        self._changed_border_provinces.update(provinces)
+
+    def _draw_changed_borders(self) -> None:
+        """
+        Draws only the borders of the provinces and nations which gained or lost tiles.
+        """
+        tiles, self._changed_border_tiles = self._changed_border_tiles, set()
+        provinces, self._changed_border_provinces = self._changed_border_provinces, set()
+        server_scenario = self.scenario.server_scenario
+        if server_scenario.get_scenario_base() is not self._drawn_scenario_base:
+            return
+        if (self._province_outlines.get_layer() is not server_scenario.get_province_layer()
+                or self._nation_outlines.get_layer() is not server_scenario.get_nation_layer()):
+            self._draw_province_and_nation_borders()
+            return
+
+        logger.debug("_draw_changed_borders tiles:%s", len(tiles))
+        for province in self._province_outlines.update(tiles) | provinces:
+            self._draw_province_border(province)
+        for nation in self._nation_outlines.update(tiles):
+            self._draw_nation_border(nation)
 
     def _draw_province_and_nation_borders(self) -> None:
         logger.debug("_draw_province_and_nation_borders")
-        # draw province and nation borders
-        # TODO the whole border drawing is a crude approximation, implement it the right way
-        for border in self._borders:
+        for border in list(self._province_borders.values()) + list(self._nation_borders.values()):
             self.scene.removeItem(border)
-            del border
-        self._borders = []
+        self._province_borders = {}
+        self._nation_borders = {}
+
+        # the borders follow the tiles of the provinces and nations
+        server_scenario = self.scenario.server_scenario
+        self._province_outlines = Outlines(server_scenario.get_neighbor_table(), server_scenario.get_province_layer())
+        self._nation_outlines = Outlines(server_scenario.get_neighbor_table(), server_scenario.get_nation_layer())
+        for province in list(self._province_outlines.owners()):
+            self._draw_province_border(province)
+        for nation in list(self._nation_outlines.owners()):
+            self._draw_nation_border(nation)
+
+    def _draw_province_border(self, province) -> None:
+        server_scenario = self.scenario.server_scenario
+        # only provinces of nations have a border
+        if province in server_scenario.provinces() and server_scenario.province_property(
+                province, constants.ProvinceProperty.NATION) is not None:
+            path = self._outline_path(self._province_outlines.outline(province))
+        else:
+            path = QtGui.QPainterPath()
 
-        province_border_pen = QtGui.QPen(QtGui.QColor(QtCore.Qt.black))
-        province_border_pen.setWidth(2)
-        nation_border_pen = QtGui.QPen()
-        nation_border_pen.setWidth(4)
-        for nation in self.scenario.server_scenario.nations():
-            # get nation color
-            color = self.scenario.server_scenario.nation_property(nation, constants.NationProperty.COLOR)
-            nation_color = QtGui.QColor()
-            nation_color.setNamedColor(color)
-            # get all provinces
-            provinces = self.scenario.server_scenario.provinces_of_nation(nation)
-            nation_path = QtGui.QPainterPath()
-            # get all tiles
-            for province in provinces:
-                province_path = QtGui.QPainterPath()
-                tiles = self.scenario.server_scenario.province_property(province, constants.ProvinceProperty.TILES)
-                for column, row in tiles:
-                    sx, sy = scene_position(column, row)
-                    province_path.addRect(sx * constants.TILE_SIZE, sy * constants.TILE_SIZE, constants.TILE_SIZE,
-                                          constants.TILE_SIZE)
-                province_path = province_path.simplified()
-                item = self.scene.addPath(province_path, pen=province_border_pen)
-                item.setZValue(4)
-                nation_path.addPath(province_path)
-
-                self._borders.append(item)
-
-            nation_path = nation_path.simplified()
-            nation_border_pen.setColor(nation_color)
-            item = self.scene.addPath(nation_path, pen=nation_border_pen)
-            item.setZValue(5)
-
-            self._borders.append(item)
+        pen = QtGui.QPen(QtGui.QColor(QtCore.Qt.black))
+        pen.setWidth(2)
+        self._set_border(self._province_borders, province, path, pen, 4)
+
+    def _draw_nation_border(self, nation) -> None:
+        server_scenario = self.scenario.server_scenario
+        if nation not in server_scenario.nations():
+            self._set_border(self._nation_borders, nation, QtGui.QPainterPath(), None, 5)
+            return
+
+        color = QtGui.QColor()
+        color.setNamedColor(server_scenario.nation_property(nation, constants.NationProperty.COLOR))
+        pen = QtGui.QPen(color)
+        pen.setWidth(4)
+        self._set_border(self._nation_borders, nation, self._outline_path(self._nation_outlines.outline(nation)),
+                         pen, 5)
+
+    def _set_border(self, borders, key, path, pen, z_value) -> None:
+        item = borders.get(key)
+        if path.isEmpty():
+            if item is not None:
+                self.scene.removeItem(borders.pop(key))
+        elif item is None:
+            item = self.scene.addPath(path, pen=pen)
+            item.setZValue(z_value)
+            borders[key] = item
+        else:
+            item.setPath(path)
+            item.setPen(pen)
+
+    @staticmethod
+    def _outline_path(outline) -> QtGui.QPainterPath:
+        path = QtGui.QPainterPath()
+        for polygon in outline:
+            path.addPolygon(QtGui.QPolygonF([QtCore.QPointF(x * constants.TILE_SIZE, y * constants.TILE_SIZE)
+                                             for x, y in polygon]))
+            path.closeSubpath()
+        return path
 
     def _draw_rivers(self) -> None:
         logger.debug("_draw_rivers")
@@ -280,33 +504,60 @@ class MainMap(QtWidgets.QGraphicsView):
 
     def _draw_roads(self) -> None:
         logger.debug("_draw_roads")
-        for road in self._roads:
+        for road in self._roads.values():
             self.scene.removeItem(road)
-            del road
-        self._roads = []
+        self._roads = {}
 
         for road_section in self.scenario.server_scenario.get_roads():
             self.draw_road(road_section[0], road_section[1])
 
     def _draw_structures(self) -> None:
         logger.debug("_draw_structures")
+        structures = {}
         for row, structure_in_row in self.scenario.server_scenario.get_structures().items():
-            for column, structures in structure_in_row.items():
-                for structure in structures:
-                    self.draw_structure(row, column, structure)
-
-    def draw_structure(self, row, column, structure) -> None:
+            for column, structures_at_tile in structure_in_row.items():
+                for structure in structures_at_tile:
+                    structures[structure.get_id()] = structure
+
+        for structure_id in [structure_id for structure_id in self._structures if structure_id not in structures]:
+            self._structures_overlay.remove_entry(structure_id)
+        self._structures = structures
+        for structure_id, structure in structures.items():
+            row, column = structure.get_position()
+            self._structures_overlay.set_entry(structure_id, column, row)
+
+    def _draw_structures_at(self, row, column) -> None:
+        for structure in self.scenario.server_scenario.get_structures_at(row, column) or []:
+            self._structures[structure.get_id()] = structure
+            self._structures_overlay.set_entry(structure.get_id(), column, row)
+
+    @staticmethod
+    def _create_structure_items(scene):
+        item = scene.addPixmap(QtGui.QPixmap())
+        item.setZValue(20)
+        return [item]
+
+    def _show_structure_items(self, items, structure_id, column, row):
+        item = items[0]
+        structure = self._structures[structure_id]
         pixmap = self.scenario.get_structure_type_to_pixmap_mapper().get_pixmap_of_type(structure.get_type().value)
         if pixmap is None:
             logger.warning("No pixmap defined for type:%s, col:%s, row:%s", structure.get_type(), column, row)
+            item.hide()
             return
 
         logger.debug("Draw structure:%s, row:%s, col:%s", structure.get_type(), row, column)
+        item.setPixmap(pixmap)
         sx, sy = scene_position(column, row)
         # TODO draw same count of structures as structure level
-        scene_utils.put_pixmap_in_tile_center(self.scene, pixmap, sx, sy, 20)
+        item.setOffset((sx + 0.5) * constants.TILE_SIZE - pixmap.width() / 2,
+                       (sy + 0.5) * constants.TILE_SIZE - pixmap.height() / 2)
 
     def draw_road(self, start: (), stop: ()) -> None:
+        key = frozenset((tuple(start), tuple(stop)))
+        if key in self._roads:
+            return
+
         logger.debug("Draw road from:%s, to:%s", start, stop)
 
         # TODO use proper icons/pixmaps
@@ -327,7 +578,12 @@ class MainMap(QtWidgets.QGraphicsView):
         item = self.scene.addPath(path, pen=road_pen)
         item.setZValue(2)
 
-        self._roads.append(item)
+        self._roads[key] = item
+
+    def _remove_road(self, start: (), stop: ()) -> None:
+        item = self._roads.pop(frozenset((tuple(start), tuple(stop))), None)
+        if item is not None:
+            self.scene.removeItem(item)
 
     def visible_rect(self) -> QRectF:
         """
@@ -358,6 +614,16 @@ class MainMap(QtWidgets.QGraphicsView):
         # center on it
         self.centerOn(x, y)
 
+    def scrollContentsBy(self, dx, dy) -> None:  # noqa: N802
+        super().scrollContentsBy(dx, dy)
+
+        self._update_overlay_region()
+
+    def resizeEvent(self, event) -> None:  # noqa: N802
+        super().resizeEvent(event)
+
+        self._update_overlay_region()
+
     def mouseMoveEvent(self, event) -> None:  # noqa: N802
         """
         The mouse on the view has been moved. Emit signal mouse_position_changed if we now hover over a different tile.
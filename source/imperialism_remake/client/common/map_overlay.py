@@ -0,0 +1,176 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+Graphics items of the main map which only exist for the part of the map that is visible.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MapOverlay:
+    """
+    The graphics items of things at tiles of the map (towns, structures, ...), each thing is an entry with a key and a
+    tile. The items of an entry only exist while its tile is in the region (see set_region), usually the visible part
+    of the map. The items of entries leaving the region are hidden and used again for entries entering it, so the
+    number of items depends on the size of the region, not of the map.
+
+    create_items(scene) creates the items for one entry in the scene and returns them as list, show_items(items, key,
+    column, row) sets them up (text, pixmap, position, ...) for an entry.
+    """
+
+    def __init__(self, scene, create_items, show_items):
+        self._scene = scene
+        self._create_items = create_items
+        self._show_items = show_items
+        self._visible = True
+
+        # key -> tile (column, row)
+        self._entries = {}
+        # tile -> keys of the entries at this tile
+        self._tiles = {}
+        # region (columns, rows), both ranges
+        self._region = range(0), range(0)
+        # key -> items of the entries in the region
+        self._shown = {}
+        # items not used by an entry
+        self._unused = []
+
+    def set_entry(self, key, column, row) -> None:
+        """
+        Adds an entry or moves it to another tile. The items of an entry already shown are set up again.
+        """
+        tile = self._entries.get(key)
+        if tile != (column, row):
+            if tile is not None:
+                self._remove_from_tile(key, tile)
+            self._entries[key] = column, row
+            self._tiles.setdefault((column, row), {})[key] = None
+
+        if self._in_region(column, row):
+            self._show(key)
+        elif key in self._shown:
+            self._hide(key)
+
+    def remove_entry(self, key) -> None:
+        tile = self._entries.pop(key, None)
+        if tile is not None:
+            self._remove_from_tile(key, tile)
+            if key in self._shown:
+                self._hide(key)
+
+    def get_keys(self):
+        return self._entries.keys()
+
+    def clear(self) -> None:
+        """
+        Removes all entries, the items are kept for new entries.
+        """
+        for key in list(self._shown):
+            self._hide(key)
+        self._entries = {}
+        self._tiles = {}
+
+    def set_region(self, columns: range, rows: range) -> None:
+        """
+        Only entries with tiles in the region have items.
+        """
+        self._region = columns, rows
+        keys = self._keys_in_region() if self._visible else {}
+        for key in [key for key in self._shown if key not in keys]:
+            self._hide(key)
+        for key in keys:
+            if key not in self._shown:
+                self._show(key)
+
+    def set_visible(self, visible) -> None:
+        """
+        An invisible overlay has no items shown.
+        """
+        self._visible = visible
+        self.set_region(*self._region)
+
+    def is_visible(self) -> bool:
+        return self._visible
+
+    def get_items_count(self) -> int:
+        """
+        Number of items created so far, the shown and the unused.
+        """
+        return sum(len(items) for items in self._shown.values()) + sum(len(items) for items in self._unused)
+
+    def _keys_in_region(self):
+        columns, rows = self._region
+        keys = {}
+        if len(columns) * len(rows) < len(self._tiles):
+            for row in rows:
+                for column in columns:
+                    keys.update(self._tiles.get((column, row), {}))
+        else:
+            for key, (column, row) in self._entries.items():
+                if column in columns and row in rows:
+                    keys[key] = None
+        return keys
+
+    def _in_region(self, column, row) -> bool:
+        return self._visible and column in self._region[0] and row in self._region[1]
+
+    def _remove_from_tile(self, key, tile):
+        keys = self._tiles[tile]
+        del keys[key]
+        if not keys:
+            del self._tiles[tile]
+
+    def _show(self, key):
+        items = self._shown.get(key)
+        if items is None:
+            if self._unused:
+                items = self._unused.pop()
+            else:
+                items = self._create_items(self._scene)
+            self._shown[key] = items
+        for item in items:
+            item.show()
+        column, row = self._entries[key]
+        self._show_items(items, key, column, row)
+
+    def _hide(self, key):
+        items = self._shown.pop(key)
+        for item in items:
+            item.hide()
+        self._unused.append(items)
+
+
+class GridOverlay(MapOverlay):
+    """
+    An overlay with an entry for every tile of the map (key is the tile), without storing them.
+    """
+
+    def set_entry(self, key, column, row) -> None:
+        raise RuntimeError('A grid overlay has an entry for every tile.')
+
+    def _keys_in_region(self):
+        columns, rows = self._region
+        return {(column, row): None for row in rows for column in columns}
+
+    def _show(self, key):
+        self._entries[key] = key
+        super()._show(key)
+
+    def _hide(self, key):
+        del self._entries[key]
+        super()._hide(key)
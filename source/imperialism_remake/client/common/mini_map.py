@@ -19,11 +19,16 @@ import math
 from PyQt5 import QtCore, QtGui, QtWidgets
 
 from imperialism_remake.base import constants, tools
-from imperialism_remake.client.utils.scene_utils import scene_position
+from imperialism_remake.client.utils.layer_image import layer_image
 from imperialism_remake.lib import qt
+from imperialism_remake.server.models.scenario_change_log import ScenarioChangeLog
 
 logger = logging.getLogger(__name__)
 
+#: colors of the terrains in the geographical view, sea (0) is the background
+TERRAIN_COLORS = {1: QtCore.Qt.green, 2: QtCore.Qt.darkGreen, 3: QtCore.Qt.darkGray, 4: QtCore.Qt.white,
+                  5: QtCore.Qt.darkYellow, 6: QtCore.Qt.yellow}
+
 
 class MiniMap(QtWidgets.QWidget):
     """
@@ -99,8 +104,16 @@ class MiniMap(QtWidgets.QWidget):
         # add layout containing tool bar
         layout.addLayout(tl)
 
-        # graphics items in scene (except the tracker)
-        self.scene_items = []
+        # the image of the map
+        self.image_item = QtWidgets.QGraphicsPixmapItem()
+        self.image_item.setTransformationMode(QtCore.Qt.SmoothTransformation)
+        self.image_item.setZValue(0)
+        self.scene.addItem(self.image_item)
+
+        # mode -> (layer, block size, colors, image), images are only created again when their layer changed
+        self._images = {}
+        self._observed_scenario = None
+        self._redraw_scheduled = False
 
     def redraw(self):
         """
@@ -119,85 +132,77 @@ class MiniMap(QtWidgets.QWidget):
         view_height = math.floor(tile_size * rows)
         self.view.setFixedHeight(view_height)
 
-        # remove everything except the tracker from the scene
-        for item in self.scene_items:
-            self.scene.removeItem(item)
-        self.scene_items = []
-
         # set scene rect
         self.scene.setSceneRect(0, 0, columns * tile_size, rows * tile_size)
         self.view.fitInView(self.scene.sceneRect())
         # by design there should be almost no scaling or anything else
 
-        if self.mode == constants.OverviewMapMode.POLITICAL:
-            # political mode
-
-            # fill the ground layer with a neutral color
-            item = self.scene.addRect(0, 0, columns * tile_size, rows * tile_size)
-            item.setBrush(QtCore.Qt.lightGray)
-            item.setPen(qt.TRANSPARENT_PEN)
-            item.setZValue(0)
-            self.scene_items.extend([item])
-
-            # draw the nation borders and content (non-smooth)
-
-            # for all nations
-            for nation in self.scenario.server_scenario.nations():
-                # get nation color
-                color_string = self.scenario.server_scenario.nation_property(nation, constants.NationProperty.COLOR)
-                color = QtGui.QColor()
-                color.setNamedColor(color_string)
-                # get all provinces
-                provinces = self.scenario.server_scenario.provinces_of_nation(nation)
-                tiles = []
-                # get all tiles
-                for province in provinces:
-                    tiles.extend(self.scenario.server_scenario.province_property(province,
-                                                                                 constants.ProvinceProperty.TILES))
-                # get rectangular path for each tile
-                path = QtGui.QPainterPath()
-                for tile in tiles:
-                    sx, sy = scene_position(*tile)
-                    path.addRect(sx * tile_size, sy * tile_size, tile_size, tile_size)
-                # simply (creates outline)
-                path = path.simplified()
-                # create a brush from the color
-                brush = QtGui.QBrush(color)
-                item = self.scene.addPath(path, brush=brush)  # will use the default pen for outline
-                item.setZValue(1)
-                self.scene_items.extend([item])
-
-        elif self.mode == constants.OverviewMapMode.GEOGRAPHICAL:
-
-            # fill the background with sea (blue)
-            item = self.scene.addRect(0, 0, columns * tile_size, rows * tile_size)
-            item.setBrush(QtCore.Qt.blue)
-            item.setPen(qt.TRANSPARENT_PEN)
-            item.setZValue(0)
-            self.scene_items.extend([item])
-
-            # six terrains left, plains, hills, mountains, tundra, swamp, desert
-
-            # go through each position
-            paths = {}
-            for t in range(1, len(self.scenario.server_scenario.get_terrain_settings())):
-                paths[t] = QtGui.QPainterPath()
-            for column in range(0, columns):
-                for row in range(0, rows):
-                    t = self.scenario.server_scenario.terrain_at(column, row)
-                    if t != 0:
-                        # not for sea
-                        sx, sy = scene_position(column, row)
-                        paths[t].addRect(sx * tile_size, sy * tile_size, tile_size, tile_size)
-            colors = {1: QtCore.Qt.green, 2: QtCore.Qt.darkGreen, 3: QtCore.Qt.darkGray, 4: QtCore.Qt.white,
-                      5: QtCore.Qt.darkYellow, 6: QtCore.Qt.yellow}
-            for t in paths:
-                path = paths[t]
-                path = path.simplified()
-                brush = QtGui.QBrush(colors[t])
-                item = self.scene.addPath(path, brush=brush, pen=qt.TRANSPARENT_PEN)
-                item.setZValue(1)
-                self.scene_items.extend([item])
+        self._observe_scenario()
+
+        # the image has at least as many pixels per tile as the view (staggered rows need an even number)
+        block_size = max(2, 2 * math.ceil(tile_size / 2))
+        self.image_item.setPixmap(QtGui.QPixmap.fromImage(self._image(self.mode, block_size)))
+        self.image_item.setScale(tile_size / block_size)
+
+    def _image(self, mode, block_size) -> QtGui.QImage:
+        """
+        The image of the map in a mode, created again only if the layer or the colors changed.
+        """
+        server_scenario = self.scenario.server_scenario
+        if mode == constants.OverviewMapMode.POLITICAL:
+            # nations on a neutral color
+            layer = server_scenario.get_nation_layer()
+            colors = {nation: server_scenario.nation_property(nation, constants.NationProperty.COLOR)
+                      for nation in server_scenario.nations()}
+            background = QtCore.Qt.lightGray
+        else:
+            # terrains on sea (blue)
+            layer = server_scenario.get_terrain_layer()
+            colors = TERRAIN_COLORS
+            background = QtCore.Qt.blue
+
+        cached = self._images.get(mode)
+        if cached is not None and cached[0] is layer and cached[1] == block_size and cached[2] == colors:
+            return cached[3]
+
+        logger.debug('_image mode:%s block_size:%s', mode, block_size)
+        columns = server_scenario[constants.ScenarioProperty.MAP_COLUMNS]
+        rows = server_scenario[constants.ScenarioProperty.MAP_ROWS]
+        image = layer_image(layer, columns, rows, {value: QtGui.QColor(color) for value, color in colors.items()},
+                            QtGui.QColor(background), block_size, staggered=True)
+        self._images[mode] = layer, block_size, colors, image
+        return image
+
+    def _observe_scenario(self) -> None:
+        server_scenario = self.scenario.server_scenario
+        if self._observed_scenario is not server_scenario:
+            if self._observed_scenario is not None:
+                self._observed_scenario.remove_change_event_handler(self._scenario_changed)
+            server_scenario.add_change_event_handler(self._scenario_changed)
+            self._observed_scenario = server_scenario
+            self._images = {}
+
+    def _scenario_changed(self, kind, arguments) -> None:
+        """
+        A change of the scenario (see ScenarioChangeLog), the image of a mode is created again if its layer changed.
+        """
+        if kind == ScenarioChangeLog.TERRAIN:
+            mode = constants.OverviewMapMode.GEOGRAPHICAL
+        elif kind in (ScenarioChangeLog.PROVINCE_TILE, ScenarioChangeLog.REMOVED_PROVINCE_TILE,
+                      ScenarioChangeLog.PROVINCE_NATION):
+            mode = constants.OverviewMapMode.POLITICAL
+        else:
+            return
+        self._images.pop(mode, None)
+
+        # an edit changes several tiles at once, the map is drawn once after it
+        if mode == self.mode and not self._redraw_scheduled:
+            self._redraw_scheduled = True
+            QtCore.QTimer.singleShot(0, self._redraw_changed)
+
+    def _redraw_changed(self) -> None:
+        self._redraw_scheduled = False
+        self.redraw()
 
     def switch_to_political_view(self, checked):
         """
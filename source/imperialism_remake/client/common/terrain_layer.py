@@ -0,0 +1,158 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+The terrain of the main map, rendered in chunks of tiles instead of a graphics item per tile.
+"""
+
+import collections
+import logging
+import math
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from imperialism_remake.base import constants
+
+logger = logging.getLogger(__name__)
+
+#: number of tiles along each side of a chunk
+CHUNK_SIZE = 16
+
+#: number of rendered chunks kept at most, a 16x16 chunk takes about 6.5 MB
+MAX_CACHED_CHUNKS = 16
+
+
+class TerrainLayer(QtWidgets.QGraphicsItem):
+    """
+    The terrain and the terrain resources of all tiles of the map as a single graphics item.
+
+    The map is divided into chunks of chunk_size x chunk_size tiles. A chunk is rendered (terrain first, resource on
+    top) into a pixmap when it is painted for the first time, the last painted max_cached_chunks chunks are kept.
+    Changing a tile (see invalidate_tile) only renders its chunk again, replacing the terrain or resource layer of the
+    scenario as a whole (a new scenario base) renders all chunks again.
+    """
+
+    def __init__(self, server_scenario, terrain_mapper, resource_mapper, chunk_size=CHUNK_SIZE,
+                 max_cached_chunks=MAX_CACHED_CHUNKS):
+        super().__init__()
+
+        self._server_scenario = server_scenario
+        self._terrain_mapper = terrain_mapper
+        self._resource_mapper = resource_mapper
+        self._chunk_size = chunk_size
+        self._max_cached_chunks = max_cached_chunks
+
+        self._columns = server_scenario[constants.ScenarioProperty.MAP_COLUMNS]
+        self._rows = server_scenario[constants.ScenarioProperty.MAP_ROWS]
+        self._bounding_rect = QtCore.QRectF(0, 0, (self._columns + 0.5) * constants.TILE_SIZE,
+                                            self._rows * constants.TILE_SIZE)
+
+        # (chunk column, chunk row) -> pixmap, least recently painted first
+        self._chunks = collections.OrderedDict()
+        # the layers the chunks were rendered from
+        self._layers = None
+
+        # paint only gets the exposed rectangle with this flag
+        self.setFlag(QtWidgets.QGraphicsItem.ItemUsesExtendedStyleOption)
+
+    def boundingRect(self) -> QtCore.QRectF:  # noqa: N802
+        return self._bounding_rect
+
+    def paint(self, painter: QtGui.QPainter, option: QtWidgets.QStyleOptionGraphicsItem, widget=None) -> None:
+        """
+        Paints the chunks overlapping the exposed rectangle, renders those which are not cached.
+        """
+        layers = self._server_scenario.get_terrain_layer(), self._server_scenario.get_terrain_resource_layer()
+        if self._layers is None or any(layer is not old_layer for layer, old_layer in zip(layers, self._layers)):
+            self._chunks.clear()
+            self._layers = layers
+
+        chunk_size = self._chunk_size * constants.TILE_SIZE
+        exposed = option.exposedRect
+        # the exposed rectangle is the whole item when not painted by a view (QGraphicsScene.render)
+        transform, invertible = painter.combinedTransform().inverted()
+        if invertible and painter.device() is not None:
+            exposed = exposed.intersected(transform.mapRect(QtCore.QRectF(painter.device().rect())))
+        # a chunk reaches half a tile into the next chunk to the right (the shifted odd rows)
+        first_chunk_column = max(0, math.floor((exposed.left() - constants.TILE_SIZE / 2) / chunk_size))
+        last_chunk_column = min(math.ceil(self._columns / self._chunk_size), math.ceil(exposed.right() / chunk_size))
+        first_chunk_row = max(0, math.floor(exposed.top() / chunk_size))
+        last_chunk_row = min(math.ceil(self._rows / self._chunk_size), math.ceil(exposed.bottom() / chunk_size))
+
+        for chunk_row in range(first_chunk_row, last_chunk_row):
+            for chunk_column in range(first_chunk_column, last_chunk_column):
+                painter.drawPixmap(QtCore.QPointF(chunk_column * chunk_size, chunk_row * chunk_size),
+                                   self._chunk_pixmap(chunk_column, chunk_row))
+
+    def _chunk_pixmap(self, chunk_column, chunk_row) -> QtGui.QPixmap:
+        key = chunk_column, chunk_row
+        pixmap = self._chunks.get(key)
+        if pixmap is None:
+            pixmap = self._render_chunk(chunk_column, chunk_row)
+            self._chunks[key] = pixmap
+            if len(self._chunks) > self._max_cached_chunks:
+                self._chunks.popitem(last=False)
+        else:
+            self._chunks.move_to_end(key)
+        return pixmap
+
+    def _render_chunk(self, chunk_column, chunk_row) -> QtGui.QPixmap:
+        logger.debug('_render_chunk chunk_column:%s, chunk_row:%s', chunk_column, chunk_row)
+        first_column = chunk_column * self._chunk_size
+        first_row = chunk_row * self._chunk_size
+        columns = range(first_column, min(first_column + self._chunk_size, self._columns))
+        rows = range(first_row, min(first_row + self._chunk_size, self._rows))
+
+        pixmap = QtGui.QPixmap(math.ceil((len(columns) + 0.5) * constants.TILE_SIZE), len(rows) * constants.TILE_SIZE)
+        pixmap.fill(QtCore.Qt.transparent)
+
+        terrain_layer, resource_layer = self._layers
+        painter = QtGui.QPainter(pixmap)
+        for row in rows:
+            # every second row is shifted right by half a tile (see scene_utils.scene_position)
+            x0 = (row % 2) / 2 - first_column
+            y = (row - first_row) * constants.TILE_SIZE
+            for column in columns:
+                index = row * self._columns + column
+                point = QtCore.QPointF((x0 + column) * constants.TILE_SIZE, y)
+                for mapper, layer in ((self._terrain_mapper, terrain_layer), (self._resource_mapper, resource_layer)):
+                    tile_pixmap = mapper.get_pixmap_of_type(layer[index])
+                    if tile_pixmap is not None:
+                        painter.drawPixmap(point, tile_pixmap)
+        painter.end()
+        return pixmap
+
+    def _chunk_rect(self, chunk_column, chunk_row) -> QtCore.QRectF:
+        chunk_size = self._chunk_size * constants.TILE_SIZE
+        return QtCore.QRectF(chunk_column * chunk_size, chunk_row * chunk_size,
+                             chunk_size + constants.TILE_SIZE / 2, chunk_size)
+
+    def invalidate_tile(self, column, row) -> None:
+        """
+        The terrain or resource of a tile changed, its chunk is rendered again when painted the next time.
+        """
+        key = column // self._chunk_size, row // self._chunk_size
+        self._chunks.pop(key, None)
+        self.update(self._chunk_rect(*key))
+
+    def invalidate(self) -> None:
+        """
+        All chunks are rendered again when painted the next time.
+        """
+        self._chunks.clear()
+        self.update()
+
+    def get_cached_chunks_count(self) -> int:
+        return len(self._chunks)
@@ -67,7 +67,7 @@ class ChangeTextureWidget(QtWidgets.QGraphicsView):
 
         logger.debug("fill_texture tile_x:%s, tile_y:%s, tile_number:%s", tile_x, tile_y, tile_number)
 
+        # the main map draws the changed tile again by itself
         self._texture_setter(self._column, self._row, tile_number)
-        self._main_map.fill_texture(self._column, self._row, self._mapper, tile_number)
 
         self._main_map.change_texture_tile(self._row, self._column)
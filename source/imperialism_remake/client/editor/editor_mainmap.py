@@ -88,15 +88,8 @@ class EditorMainMap(MainMap):
         menu.exec(event.globalPos())
 
     def _add_menu_item_workforce(self, column, menu, row):
-        on_workforce = None
-
-        selected_nation = self.scenario.server_scenario.nation_at(row, column)
-        workforces = self.scenario.server_scenario.get_nation_asset(selected_nation).get_workforces()
-
-        for id, w in workforces.items():
-            if w.get_current_position() == (row, column):
-                on_workforce = w
-                break
+        workforces = self.scenario.server_scenario.get_workforces_at(row, column)
+        on_workforce = workforces[0] if workforces else None
 
         if on_workforce:
             a = qt.create_action(tools.load_ui_icon('icon.editor.change_terrain_resource.png'),
@@ -112,20 +105,12 @@ class EditorMainMap(MainMap):
             menu.addAction(a)
 
     def _add_menu_item_roads(self, column, menu, row):
-        roads = self.scenario.server_scenario.get_roads()
+        server_scenario = self.scenario.server_scenario
 
-        not_on_road = True
-        for road in roads:
-            if [row, column] in road:
-                not_on_road = False
+        not_on_road = not server_scenario.roads_at(row, column)
 
-        road_tiles = []
-        for road in roads:
-            if len(road) > 0:
-                neighbors = self.scenario.server_scenario.neighbored_tiles(column, row)
-                for neighbor in neighbors:
-                    if [neighbor[1], neighbor[0]] in road:
-                        road_tiles.append([neighbor[0], neighbor[1]])
+        road_tiles = [neighbor for neighbor in server_scenario.neighbored_tiles(column, row)
+                      if neighbor is not None and server_scenario.roads_at(neighbor[1], neighbor[0])]
 
         if not_on_road:
             province_id = self.scenario.server_scenario.province_at(column, row)
@@ -145,10 +130,12 @@ class EditorMainMap(MainMap):
                 menu.addAction(a)
 
         else:
-            if len(road_tiles) > 0:
+            # only the road sections starting here can be removed
+            connected_tiles = [[position[1], position[0]] for _, position in server_scenario.roads_at(row, column)]
+            if len(connected_tiles) > 0:
                 a = qt.create_action(tools.load_ui_icon('icon.editor.change_terrain_resource.png'), 'Remove road',
                                      self,
-                                     partial(self._remove_road_event, column, row, road_tiles))
+                                     partial(self._remove_road_event, column, row, connected_tiles))
                 menu.addAction(a)
 
             # TODO allow road merge
@@ -158,26 +145,14 @@ class EditorMainMap(MainMap):
         self.scenario.server_scenario.add_road([row, column],
                                                [road_tiles[rand_road_index][1], road_tiles[rand_road_index][0]])
 
-        self._draw_roads()
-
     def _remove_road_event(self, column, row, road_tiles):
-        roads = self.scenario.server_scenario.get_roads()
-        for road in roads:
-            for road_tile in road_tiles:
-                if ([row, column], [road_tile[1], road_tile[0]]) == road:
-                    roads.remove(([row, column], [road_tile[1], road_tile[0]]))
-                    self._draw_roads()
-                    return
-                elif ([road_tile[1], road_tile[0]], [row, column]) == road:
-                    roads.remove(([road_tile[1], road_tile[0]], [row, column]))
-                    self._draw_roads()
-                    return
+        for road_tile in road_tiles:
+            if self.scenario.server_scenario.remove_road([row, column], [road_tile[1], road_tile[0]]):
+                return
 
     def _start_road_event(self, column, row, city_position):
         self.scenario.server_scenario.add_road([row, column], [city_position[1], city_position[0]])
 
-        self._draw_roads()
-
     def _add_menu_item_river(self, column, menu, row):
         rivers = self.scenario.server_scenario.get_rivers()
 
@@ -275,12 +250,8 @@ class EditorMainMap(MainMap):
             if terrain == TerrainType.SEA.value:
                 self.scenario.server_scenario.remove_province_map_tile(province, [column, row])
 
-        self._draw_province_and_nation_borders()
-
     def change_nation_tile(self, row, column, province) -> None:
         logger.debug(f"change_nation_tile {row}, {column}, province:{province}")
 
         self.scenario.server_scenario.change_province_map_tile(province, [column, row])
 
-        self._draw_province_and_nation_borders()
-
@@ -23,8 +23,8 @@ import os
 
 from imperialism_remake.base import constants
 from imperialism_remake.client.common.generic_scenario import GenericScenario
-from imperialism_remake.lib import utils
 from imperialism_remake.server.models.server_scenario_base import ServerScenarioBase
+from imperialism_remake.server.scenario_archive import read_rules
 from imperialism_remake.server.server_scenario import ServerScenario
 
 logger = logging.getLogger(__name__)
@@ -77,8 +77,7 @@ class EditorScenario(GenericScenario):
         self.server_scenario[constants.ScenarioProperty.RULES] = 'standard.rules'
         # self.scenario.load_rules()
         # TODO rules as extra?
-        rule_file = constants.extend(constants.SCENARIO_RULESET_FOLDER,
-                                     self.server_scenario[constants.ScenarioProperty.RULES])
-        self.server_scenario.get_scenario_base()._rules = utils.read_from_file(rule_file)
+        rules = read_rules(self.server_scenario[constants.ScenarioProperty.RULES])
+        self.server_scenario.get_scenario_base().rules = rules
 
         self._init()
@@ -92,6 +92,7 @@ class EditorScreen(GenericScreen):
         self._layout.setRowStretch(2, 1)  # the info box will take all vertical space left
         self._layout.setColumnStretch(1, 1)  # the main map will take all horizontal space left
 
+        self._add_grid_button()
         self._add_help_and_exit_buttons(client)
 
         self._workforce_widgets = {}
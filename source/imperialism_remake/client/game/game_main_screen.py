@@ -46,7 +46,7 @@ class GameMainScreen(GenericScreen):
         The whole screen (layout of single elements and interactions.
     """
 
-    def __init__(self, client, server_base_scenario, selected_nation):
+    def __init__(self, client, server_base_scenario, selected_nation, scenario_version=None):
         logger.debug('__init__ server_base_scenario:%s, selected_nation:%s', server_base_scenario, selected_nation)
 
         self._selected_nation = selected_nation
@@ -67,7 +67,7 @@ class GameMainScreen(GenericScreen):
         self._main_map.mouse_press_event.connect(self._main_map_mouse_press_event)
         self._main_map.mouse_move_event.connect(self._main_map_mouse_move_event)
 
-        self._turn_manager = TurnManager(self.scenario, selected_nation)
+        self._turn_manager = TurnManager(self.scenario, selected_nation, scenario_version)
         self._turn_manager.event_turn_completed.connect(self._event_turn_completed)
 
         turn_end_widget = TurnEndWidget(self._turn_manager)
@@ -98,6 +98,7 @@ class GameMainScreen(GenericScreen):
                              self.save_scenario_dialog)
         self._toolbar.addAction(a)
 
+        self._add_grid_button()
         self._add_help_and_exit_buttons(client)
 
         self._add_workforces()
@@ -184,7 +185,11 @@ class GameMainScreen(GenericScreen):
             del wf_widget
         self._workforce_widgets = {}
 
-        self.scenario.server_scenario.update_scenario_base(turn_result.get_server_scenario_base())
+        if turn_result.is_full():
+            self.scenario.server_scenario.update_scenario_base(turn_result.get_server_scenario_base())
+        else:
+            self.scenario.server_scenario.apply_changes(turn_result.get_changes())
+            self.scenario.server_scenario.set_nation_asset(self._selected_nation, turn_result.get_nation_asset())
 
         self._add_workforces()
 
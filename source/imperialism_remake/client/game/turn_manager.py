@@ -29,14 +29,16 @@ logger = logging.getLogger(__name__)
 class TurnManager(QtCore.QObject):
     event_turn_completed = QtCore.pyqtSignal(TurnResult)
 
-    def __init__(self, scenario, selected_nation):
+    def __init__(self, scenario, selected_nation, scenario_version=None):
         super().__init__()
 
         logger.debug('__init__')
 
         self._scenario = scenario
         self._selected_nation = selected_nation
-        self._turn_planned = TurnPlanned(self._selected_nation)
+        # version of the scenario the client has, the server only sends what changed since
+        self._scenario_version = scenario_version
+        self._turn_planned = self._create_turn_planned()
 
         network_connection.connect_to_game(self._game_message_received)
 
@@ -46,6 +48,11 @@ class TurnManager(QtCore.QObject):
     def get_turn_planned(self) -> TurnPlanned:
         return self._turn_planned
 
+    def _create_turn_planned(self) -> TurnPlanned:
+        turn_planned = TurnPlanned(self._selected_nation)
+        turn_planned.set_acknowledged_version(self._scenario_version)
+        return turn_planned
+
     def make_turn(self) -> None:
         logger.debug("make_turn start")
 
@@ -58,7 +65,8 @@ class TurnManager(QtCore.QObject):
         logger.debug("_process_turn_result")
 
         del self._turn_planned
-        self._turn_planned = TurnPlanned(self._selected_nation)
+        self._scenario_version = turn_result.get_version()
+        self._turn_planned = self._create_turn_planned()
 
         self.event_turn_completed.emit(turn_result)
 
@@ -18,6 +18,7 @@
 Game lobby. Place for starting/loading games.
 """
 import logging
+from array import array
 from functools import partial
 
 from PyQt5 import QtCore, QtGui, QtWidgets
@@ -25,6 +26,7 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 from imperialism_remake.base import constants, tools
 from imperialism_remake.client.client.client_network_connection import network_connection
 from imperialism_remake.client.graphics.minimap_nation_item import MiniMapNationItem
+from imperialism_remake.client.utils.layer_image import layer_path
 from imperialism_remake.lib import qt, utils
 
 logger = logging.getLogger(__name__)
@@ -134,6 +136,7 @@ class SinglePlayerScenarioPreview(QtWidgets.QWidget):
         item.setZValue(0)
 
         # for all nations
+        nation_map = array('i', message['map'])
         for nation_id, nation in message[constants.SCENARIO_FILE_NATIONS].items():
 
             # get nation color
@@ -145,13 +148,7 @@ class SinglePlayerScenarioPreview(QtWidgets.QWidget):
             nation_name = nation[constants.NationProperty.NAME]
 
             # get nation outline
-            path = QtGui.QPainterPath()
-            # TODO traversing everything is quite slow go only once and add to paths
-            for column in range(0, columns):
-                for row in range(0, rows):
-                    if nation_id == message['map'][column + row * columns]:
-                        path.addRect(column, row, 1, 1)
-            path = path.simplified()
+            path = layer_path(nation_map, columns, rows, nation_id)
 
             item = MiniMapNationItem(path)
             item.signaller.clicked.connect(
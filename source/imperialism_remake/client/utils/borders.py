@@ -0,0 +1,139 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+Outlines of the areas (provinces, nations) of the map, computed from the owner of each tile.
+"""
+
+from array import array
+
+from imperialism_remake.server.models.neighbor_table import NO_NEIGHBOR
+from imperialism_remake.server.models.tile_index import NO_ID
+
+# the side of a tile facing the neighbor in each direction (in the order of constants.TileDirections) as start and
+# end point relative to the upper left corner, clockwise around the tile, x in half tiles, y in tiles: west,
+# north west, north east, east, south east, south west
+_SIDES = (((0, 1), (0, 0)), ((0, 0), (1, 0)), ((1, 0), (2, 0)), ((2, 0), (2, 1)), ((2, 1), (1, 1)), ((1, 1), (0, 1)))
+
+
+class Outlines:
+    """
+    The outlines of the areas of one owner layer (province or nation of each tile, see tile_index.TileIndex) on the
+    staggered map. The tiles are the rectangles the main map draws (see scene_utils.scene_position), so the outline of
+    an area is made of the sides of its tiles which face a neighbor of another owner or the map border.
+
+    Outlines are computed when asked for and kept until a tile of their owner changes. The layer is changed outside,
+    update() is told which tiles changed and compares them to the owners it has seen before.
+    """
+
+    def __init__(self, neighbor_table, layer):
+        """
+        :param neighbor_table: The neighbor table of the map.
+        :param layer: The owner of each tile, index row * columns + column, NO_ID for none.
+        """
+        self._neighbor_table = neighbor_table
+        self._layer = layer
+        # owners as seen when the outlines were computed
+        self._owners = array('i', layer)
+        # owner -> indices of its tiles
+        self._tiles = {}
+        for index, owner in enumerate(self._owners):
+            if owner != NO_ID:
+                self._tiles.setdefault(owner, set()).add(index)
+        # owner -> outline
+        self._outlines = {}
+
+    def get_layer(self):
+        return self._layer
+
+    def owners(self):
+        """
+        The owners that have tiles.
+        """
+        return self._tiles.keys()
+
+    def update(self, indices) -> set:
+        """
+        Some tiles may have changed their owner in the layer. Returns the owners whose outline changed, the old and new
+        owners of the changed tiles. The outline of the neighbors does not change, the side between them and a changed
+        tile was and is a border.
+        """
+        changed = set()
+        for index in indices:
+            old_owner = self._owners[index]
+            new_owner = self._layer[index]
+            if old_owner == new_owner:
+                continue
+            self._owners[index] = new_owner
+            if old_owner != NO_ID:
+                self._tiles[old_owner].discard(index)
+                if not self._tiles[old_owner]:
+                    del self._tiles[old_owner]
+                changed.add(old_owner)
+            if new_owner != NO_ID:
+                self._tiles.setdefault(new_owner, set()).add(index)
+                changed.add(new_owner)
+
+        for owner in changed:
+            self._outlines.pop(owner, None)
+        return changed
+
+    def outline(self, owner) -> list:
+        """
+        The outline of the tiles of an owner as list of closed polygons (a list of corner points (x, y) in tiles, see
+        scene_utils.scene_position), empty if the owner has no tiles.
+        """
+        outline = self._outlines.get(owner)
+        if outline is None:
+            outline = self._compute_outline(owner)
+            self._outlines[owner] = outline
+        return outline
+
+    def _compute_outline(self, owner) -> list:
+        columns = self._neighbor_table.get_columns()
+        neighbor = self._neighbor_table.neighbor
+        owners = self._owners
+
+        # the border sides, start point -> end point, in half tiles and tiles so that points are integers
+        sides = {}
+        for index in self._tiles.get(owner, ()):
+            row, column = divmod(index, columns)
+            x = 2 * column + row % 2
+            for direction, ((x1, y1), (x2, y2)) in enumerate(_SIDES):
+                other = neighbor(index, direction)
+                if other == NO_NEIGHBOR or owners[other] != owner:
+                    sides[(x + x1, row + y1)] = (x + x2, row + y2)
+
+        # the sides of a border form closed polygons, at every corner only one of them starts (three tiles meet at a
+        # corner of the staggered map)
+        polygons = []
+        while sides:
+            start, second = sides.popitem()
+            polygon = [start]
+            previous, point = start, second
+            while point != start:
+                following = sides.pop(point)
+                if _is_corner(previous, point, following):
+                    polygon.append(point)
+                previous, point = point, following
+            if not _is_corner(previous, start, second):
+                polygon.pop(0)
+            polygons.append([(x / 2, y) for x, y in polygon])
+        return polygons
+
+
+def _is_corner(previous, point, following) -> bool:
+    # the direction changes at the point
+    return (point[0] - previous[0]) * (following[1] - point[1]) != (point[1] - previous[1]) * (following[0] - point[0])
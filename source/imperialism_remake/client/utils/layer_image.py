@@ -0,0 +1,99 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+Images of map layers (terrain, nation of each tile) for overview maps, a colored block per tile.
+"""
+
+import sys
+from array import array
+
+from PyQt5 import QtCore, QtGui
+
+
+def layer_image(layer, columns, rows, colors, background, block_size=1, staggered=False) -> QtGui.QImage:
+    """
+    An image of a layer with a block of block_size x block_size pixels per tile, colored by the value of the tile.
+
+    The colors are looked up for all tiles at once: the values are turned into bytes, translated to indices of a color
+    table and expanded to blocks by Qt. With staggered, every second row is shifted right by half a block like the
+    main map (see scene_utils.scene_position), the image is then half a block wider and block_size should be even.
+
+    :param layer: The value of each tile, index row * columns + column, an array or a list of integers.
+    :param colors: Value -> QColor, values without color get the background color.
+    :param background: QColor of the tiles without color.
+    """
+    color_table = [QtGui.QColor(background).rgba()]
+    # value -> index in the color table
+    indices = {}
+    for value, color in colors.items():
+        indices[value] = len(color_table)
+        color_table.append(QtGui.QColor(color).rgba())
+    if len(color_table) > 256:
+        raise RuntimeError('At most 255 colors in a layer image.')
+
+    # one byte per tile, the index in the color table
+    if not isinstance(layer, array):
+        layer = array('i', layer)
+    if layer and all(0 <= value < 255 for value in indices) and -1 <= min(layer) and max(layer) < 255:
+        # the low byte of each value is the value (255 for -1, which has no color)
+        data = layer.tobytes()
+        if layer.itemsize > 1:
+            low_byte = 0 if sys.byteorder == 'little' else layer.itemsize - 1
+            data = data[low_byte::layer.itemsize]
+        translation = bytearray(256)
+        for value, index in indices.items():
+            translation[value] = index
+        data = data.translate(translation)
+    else:
+        data = bytes(indices.get(value, 0) for value in layer)
+
+    # every tile is two pixels wide, odd rows start one pixel later, so that they can be shifted by half a tile
+    width = 2 * columns + 1 if staggered else columns
+    bytes_per_line = (width + 3) // 4 * 4
+    pixels = bytearray(bytes_per_line * rows)
+    for row in range(rows):
+        tiles = data[row * columns:(row + 1) * columns]
+        start = row * bytes_per_line
+        if staggered:
+            start += row % 2
+            pixels[start:start + 2 * columns:2] = tiles
+            pixels[start + 1:start + 2 * columns:2] = tiles
+        else:
+            pixels[start:start + columns] = tiles
+
+    image = QtGui.QImage(bytes(pixels), width, rows, bytes_per_line, QtGui.QImage.Format_Indexed8)
+    image.setColorTable(color_table)
+    # the image does not own the pixels, copy before they are gone
+    image = image.copy()
+    if staggered:
+        size = QtCore.QSize(width * block_size // 2, rows * block_size)
+    else:
+        size = QtCore.QSize(width * block_size, rows * block_size)
+    if size != image.size():
+        image = image.scaled(size, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.FastTransformation)
+    return image
+
+
+def layer_path(layer, columns, rows, value) -> QtGui.QPainterPath:
+    """
+    The outline of the tiles with a value in a layer, a square of size one per tile, rows not staggered.
+    """
+    image = layer_image(layer, columns, rows, {value: QtGui.QColor(QtCore.Qt.black)}, QtGui.QColor(QtCore.Qt.white))
+    mask = QtGui.QBitmap.fromImage(image.createMaskFromColor(QtGui.QColor(QtCore.Qt.black).rgba(),
+                                                             QtCore.Qt.MaskOutColor))
+    path = QtGui.QPainterPath()
+    path.addRegion(QtGui.QRegion(mask))
+    return path.simplified()
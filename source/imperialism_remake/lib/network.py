@@ -17,16 +17,17 @@
 """
 Basic general network functionality (client and server) wrapping around QtNetwork.QTcpSocket and QtNetwork.QTcpServer.
 
-Messages are sent using pickle (for serialization) and zlib (for compression).
+Messages are sent with the protocol of wire_protocol.
 """
 
 import logging
-import pickle
 import time
-import zlib
 
 from PyQt5 import QtCore, QtNetwork
 
+from imperialism_remake.lib import wire_protocol
+from imperialism_remake.lib.wire_protocol import COMPRESSION_THRESHOLD, MAX_FRAME_SIZE
+
 #: shortcut for QtNetwork.QHostAddress.LocalHost/Any
 SCOPE = {'local': QtNetwork.QHostAddress.LocalHost, 'any': QtNetwork.QHostAddress.Any}
 
@@ -36,8 +37,15 @@ logger = logging.getLogger(__name__)
 class ExtendedTcpSocket(QtCore.QObject):
     """
     Wrapper around QtNetwork.QTcpSocket. The socket can either be given in the initialization or be created there.
-    Sends and reads messages via serialization (pickle), compression (zlib) and wrapping (QByteArray) as well as
-    un-wrapping, de-compressing and de-serialization on the other side.
+    Sends and reads messages via serialization (a codec), compression (zlib, only above a threshold) and wrapping
+    (a frame with a length prefix) as well as reassembling the frames, de-compressing and de-serialization on the other
+    side, see wire_protocol.WireProtocol.
+
+    With batching on (see set_batching()), sent messages are queued and written together in a single write once the
+    event loop runs again, messages with a lower priority number first. flush() writes them right away.
+
+    Counters for back pressure: bytes_written, max_bytes_to_write (the most bytes sent but not yet written to the
+    network) and those of the protocol (protocol.frames_sent, protocol.frame_buffer.partial_reads, ...).
     """
 
     #: signal for socket connected
@@ -49,15 +57,25 @@ class ExtendedTcpSocket(QtCore.QObject):
     #: signal for a received message (only whole messages are emitted)
     received = QtCore.pyqtSignal(object)
 
-    def __init__(self, socket: QtNetwork.QTcpSocket = None):
+    def __init__(self, socket: QtNetwork.QTcpSocket = None, codecs=None, compression_threshold=COMPRESSION_THRESHOLD,
+                 max_frame_size=MAX_FRAME_SIZE):
         """
         Initializes the extended TCP socket. Either wraps around an existing socket or creates its own and resets
         the number of bytes written.
 
         :param socket: An already existing socket or None if none is given.
+        :param codecs: The codecs this socket can use, preferred first, or None for the compact codec. Network clients
+            use the ones of base.letters.create_codecs().
+        :param compression_threshold: Encoded messages larger than this (in bytes) are compressed.
+        :param max_frame_size: Largest frame (in bytes) to send or accept, a larger received frame closes the
+            connection.
         """
         super().__init__()
 
+        self.protocol = wire_protocol.WireProtocol(self._write, self._deliver, self._abort,
+                                                   lambda callback: QtCore.QTimer.singleShot(0, callback),
+                                                   codecs, compression_threshold, max_frame_size)
+
         # new QTcpSocket() if none is given
         if socket is not None:
             self.socket = socket
@@ -69,9 +87,24 @@ class ExtendedTcpSocket(QtCore.QObject):
         self.socket.error.connect(self.error)
         self.socket.connected.connect(self.connected)
         self.socket.disconnected.connect(self.disconnected)
+        self.socket.connected.connect(self.protocol.send_handshake)
+        self.socket.disconnected.connect(self.protocol.reset)
         self.socket.bytesWritten.connect(self.count_bytes_written)
 
         self.bytes_written = 0
+        self.max_bytes_to_write = 0
+
+        # a given socket is usually connected already
+        if self.is_connected():
+            self.protocol.send_handshake()
+            if self.socket.bytesAvailable() > 0:
+                self._receive()
+
+    def get_codec(self):
+        """
+        The codec used for sending, None as long as the other side has not told which codecs it can decode.
+        """
+        return self.protocol.get_codec()
 
     def peer_address(self):
         """
@@ -119,51 +152,64 @@ class ExtendedTcpSocket(QtCore.QObject):
         """
         return self.socket.state() == QtNetwork.QAbstractSocket.ConnectedState
 
+    def bytes_to_write(self) -> int:
+        """
+        Number of bytes sent but not yet written to the network.
+        """
+        return self.socket.bytesToWrite()
+
     def _receive(self):
         """
         Called by the sockets readyRead signal. Not intended for outside use.
-        While there are messages available read them and process them.
-        Reading is reading of a QByteArray from the TCPSocket, un-compressing and de-serializing.
+        Reads all available bytes and gives them to the protocol, which emits the completed messages.
         """
-        while self.socket.bytesAvailable() > 0:
-            logger.info('socket will receive')
-            # read a QByteArray using a data stream
-            reader = QtCore.QDataStream(self.socket)
-            bytearray = QtCore.QByteArray()
-            reader >> bytearray
-
-            # uncompress bytes from bytearray
-            uncompressed = zlib.decompress(bytearray.data())
+        self.protocol.receive(self.socket.readAll().data())
 
-            # security validator (check for everything that we do not like (!!python)
-            # TODO implement this
+    def _deliver(self, value):
+        logger.debug('socket received: %s', value)
 
-            value = pickle.loads(uncompressed)
+        self.received.emit(value)
 
-            logger.debug('socket received: %s', value)
+    def set_batching(self, batching) -> None:
+        """
+        Switches batching of sent messages on or off, switching it off writes the queued messages.
+        """
+        self.protocol.set_batching(batching)
 
-            self.received.emit(value)
+    def flush(self) -> None:
+        """
+        Writes the queued messages (if batching) and as much as possible of the socket's buffer to the network without
+        blocking.
+        """
+        self.protocol.flush()
+        self.socket.flush()
 
-    def send(self, value):
+    def send(self, value, priority=0):
         """
-        Sends a message by serializing, compressing and wrapping to a QByteArray, then streaming over the TCP socket.
+        Sends a message by encoding, compressing if large and wrapping in a frame, then streaming over the TCP
+        socket. Until the codec is agreed on, the message waits.
 
         :param value: The message to send.
+        :param priority: If batching, messages with lower numbers are written first.
         """
         if not self.is_connected():
             raise RuntimeError('Try to send on unconnected socket.')
 
         logger.debug('socket send: %s', value)
 
-        compressed = zlib.compress(pickle.dumps(value))
+        self.protocol.send(value, priority)
 
-        # wrap in QByteArray
-        bytearray = QtCore.QByteArray(compressed)
+    def _write(self, data):
+        if self.is_connected():
+            self.socket.write(data)
+            self.max_bytes_to_write = max(self.max_bytes_to_write, self.socket.bytesToWrite())
 
-        # write using a data stream
-        writer = QtCore.QDataStream(self.socket)
-        writer.setVersion(QtCore.QDataStream.Qt_5_10)
-        writer << bytearray
+    def _abort(self, reason):
+        """
+        The other side does not follow the protocol, the connection is closed. Not intended for outside use.
+        """
+        logger.error('socket closes connection: %s', reason)
+        self.socket.abort()
 
     def count_bytes_written(self, bytes):
         """
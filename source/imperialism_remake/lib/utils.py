@@ -66,12 +66,18 @@ class ZipArchiveReader:
 
     def __init__(self, file):
         """
-        Opens the zip file in read-only mode.
+        Opens the zip file in read-only mode. Close it with close() or use the reader in a with statement.
 
         :param file: File name
         """
         self.zip = zipfile.ZipFile(file)  # mode is 'r' by default
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def read_from_file(self, name):
         """
         Reads the file name from the zip archive
@@ -83,9 +89,9 @@ class ZipArchiveReader:
         obj = pickle.loads(data)
         return obj
 
-    def __del__(self):
+    def close(self):
         """
-        Closes the zip upon deletion.
+        Closes the zip.
         """
         self.zip.close()
 
@@ -99,12 +105,19 @@ class ZipArchiveWriter:
 
     def __init__(self, file):
         """
-        Open the zip file in write mode with standard zlib compression mode.
+        Open the zip file in write mode with standard zlib compression mode. Close it with close() or use the writer
+        in a with statement.
 
         :param file: File name
         """
         self.zip = zipfile.ZipFile(file, mode='w', compression=zipfile.ZIP_DEFLATED)
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def write_to_file(self, name, obj):
         """
         Writes a Python value into a file in the archive.
@@ -115,9 +128,9 @@ class ZipArchiveWriter:
         data = pickle.dumps(obj)
         self.zip.writestr(name, data)
 
-    def __del__(self):
+    def close(self):
         """
-        Closes the zip upon deletion.
+        Closes the zip, only then the archive is complete.
         """
         self.zip.close()
 
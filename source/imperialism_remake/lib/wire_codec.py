@@ -0,0 +1,327 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Codecs turning the messages sent over an ExtendedTcpSocket into bytes and back.
+
+The compact codec writes a tagged binary encoding of the basic Python values (None, bool, int, float, str, bytes,
+list, tuple, dict, set, UUID) and of the types registered with an encoder, values of other types cannot be sent.
+Nothing received is unpickled.
+
+Values can be encoded ahead, for example in another process, and sent as part of a message (see Encoded).
+"""
+
+import struct
+import uuid
+
+# value tags of the compact encoding
+_NONE = 0
+_FALSE = 1
+_TRUE = 2
+_INT = 3
+_FLOAT = 4
+_STR = 5
+_BYTES = 6
+_LIST = 7
+_TUPLE = 8
+_DICT = 9
+_SET = 10
+_UUID = 11
+_REGISTERED = 12
+# 13 were pickled values, they are not accepted anymore
+# tags from here on are small non-negative ints in a single byte
+_SMALL_INT = 64
+_SMALL_INT_LIMIT = 256 - _SMALL_INT
+
+_DOUBLE = struct.Struct('>d')
+
+
+class Encoded(bytes):
+    """
+    A value encoded by a compact codec, a compact codec with the same registrations writes it as is. The other side of
+    the connection decodes the value itself, so the costly encoding of a large value can be done elsewhere.
+    """
+
+
+class Codec:
+    """
+    Base class of the codecs. Each codec has a unique id (1..255) that is sent along with each message, so the
+    receiving socket knows how to decode it.
+    """
+
+    #: unique id of the codec
+    codec_id = None
+
+    def encode(self, value) -> bytes:
+        raise NotImplementedError()
+
+    def decode(self, data):
+        raise NotImplementedError()
+
+
+class CompactCodec(Codec):
+    """
+    Tagged binary encoding of the basic values with encoders for registered types. Encoding a value of another type
+    raises a RuntimeError.
+
+    A registered type is written as its registration code followed by the value its encoder returns, which must
+    consist of encodable values again. The decoder gets that value back and creates the object from it.
+    """
+
+    # 1 was the pickle codec
+    codec_id = 2
+
+    def __init__(self):
+        # type -> (code, encoder), code -> decoder
+        self._encoders = {}
+        self._decoders = {}
+
+        self._writers = {type(None): self._write_none, bool: self._write_bool, int: self._write_int,
+                         float: self._write_float, str: self._write_str, bytes: self._write_bytes,
+                         list: self._write_list, tuple: self._write_tuple, dict: self._write_dict,
+                         set: self._write_set, uuid.UUID: self._write_uuid, Encoded: self._write_encoded}
+        # indexed by tag
+        self._readers = [self._read_none, self._read_false, self._read_true, self._read_int, self._read_float,
+                         self._read_str, self._read_bytes, self._read_list, self._read_tuple, self._read_dict,
+                         self._read_set, self._read_uuid, self._read_registered]
+        self._readers += [self._read_unknown] * (_SMALL_INT - len(self._readers))
+
+    def register(self, value_type, code, encoder, decoder) -> None:
+        """
+        Registers an encoder (object -> encodable value) and a decoder (encodable value -> object) for a type.
+        Codes must be unique and the same on both sides of a connection.
+        """
+        if code in self._decoders:
+            raise RuntimeError('Wire code {} already registered.'.format(code))
+        self._encoders[value_type] = (code, encoder)
+        self._decoders[code] = decoder
+
+    def register_enum(self, enum_type, code) -> None:
+        """
+        Registers an enum type, its members are sent as their values.
+        """
+        members = {member.value: member for member in enum_type}
+        self.register(enum_type, code, lambda member: member.value, members.__getitem__)
+
+    def encode(self, value) -> bytes:
+        buffer = bytearray()
+        self._write(buffer, value)
+        return bytes(buffer)
+
+    def decode(self, data):
+        value, position = self._read(memoryview(data), 0)
+        if position != len(data):
+            raise RuntimeError('Trailing bytes after the encoded value.')
+        return value
+
+    def _write(self, buffer, value) -> None:
+        value_type = type(value)
+        if value_type is int and 0 <= value < _SMALL_INT_LIMIT:
+            buffer.append(_SMALL_INT + value)
+            return
+        writer = self._writers.get(value_type)
+        if writer is not None:
+            writer(buffer, value)
+            return
+        registered = self._encoders.get(value_type)
+        if registered is not None:
+            code, encoder = registered
+            buffer.append(_REGISTERED)
+            _write_unsigned(buffer, code)
+            self._write(buffer, encoder(value))
+            return
+        raise RuntimeError('No encoder for values of type {}.'.format(value_type.__name__))
+
+    def _read(self, data, position):
+        tag = data[position]
+        if tag >= _SMALL_INT:
+            return tag - _SMALL_INT, position + 1
+        return self._readers[tag](data, position + 1)
+
+    @staticmethod
+    def _read_unknown(data, position):
+        raise RuntimeError('Unknown value tag {}.'.format(data[position - 1]))
+
+    @staticmethod
+    def _write_none(buffer, value):
+        buffer.append(_NONE)
+
+    @staticmethod
+    def _write_bool(buffer, value):
+        buffer.append(_TRUE if value else _FALSE)
+
+    @staticmethod
+    def _write_int(buffer, value):
+        buffer.append(_INT)
+        # zigzag, small negative numbers stay small
+        _write_unsigned(buffer, value * 2 if value >= 0 else -value * 2 - 1)
+
+    @staticmethod
+    def _write_float(buffer, value):
+        buffer.append(_FLOAT)
+        buffer += _DOUBLE.pack(value)
+
+    @staticmethod
+    def _write_str(buffer, value):
+        data = value.encode('utf-8')
+        buffer.append(_STR)
+        _write_unsigned(buffer, len(data))
+        buffer += data
+
+    @staticmethod
+    def _write_bytes(buffer, value):
+        buffer.append(_BYTES)
+        _write_unsigned(buffer, len(value))
+        buffer += value
+
+    @staticmethod
+    def _write_uuid(buffer, value):
+        buffer.append(_UUID)
+        buffer += value.bytes
+
+    @staticmethod
+    def _write_encoded(buffer, value):
+        buffer += value
+
+    def _write_items(self, buffer, tag, values):
+        buffer.append(tag)
+        _write_unsigned(buffer, len(values))
+        write = self._write
+        for value in values:
+            # small ints inline, they are most of the items
+            if type(value) is int and 0 <= value < _SMALL_INT_LIMIT:
+                buffer.append(_SMALL_INT + value)
+            else:
+                write(buffer, value)
+
+    def _write_list(self, buffer, value):
+        self._write_items(buffer, _LIST, value)
+
+    def _write_tuple(self, buffer, value):
+        self._write_items(buffer, _TUPLE, value)
+
+    def _write_set(self, buffer, value):
+        self._write_items(buffer, _SET, value)
+
+    def _write_dict(self, buffer, value):
+        buffer.append(_DICT)
+        _write_unsigned(buffer, len(value))
+        for key, item in value.items():
+            self._write(buffer, key)
+            self._write(buffer, item)
+
+    @staticmethod
+    def _read_none(data, position):
+        return None, position
+
+    @staticmethod
+    def _read_false(data, position):
+        return False, position
+
+    @staticmethod
+    def _read_true(data, position):
+        return True, position
+
+    @staticmethod
+    def _read_int(data, position):
+        number, position = _read_unsigned(data, position)
+        return (number >> 1) if not number & 1 else -((number + 1) >> 1), position
+
+    @staticmethod
+    def _read_float(data, position):
+        return _DOUBLE.unpack_from(data, position)[0], position + _DOUBLE.size
+
+    @staticmethod
+    def _read_str(data, position):
+        length, position = _read_unsigned(data, position)
+        return str(data[position:position + length], 'utf-8'), position + length
+
+    @staticmethod
+    def _read_bytes(data, position):
+        length, position = _read_unsigned(data, position)
+        return bytes(data[position:position + length]), position + length
+
+    @staticmethod
+    def _read_uuid(data, position):
+        return uuid.UUID(bytes=bytes(data[position:position + 16])), position + 16
+
+    def _read_items(self, data, position):
+        length, position = _read_unsigned(data, position)
+        values = []
+        readers = self._readers
+        for _ in range(length):
+            # small ints inline, they are most of the items
+            tag = data[position]
+            if tag >= _SMALL_INT:
+                values.append(tag - _SMALL_INT)
+                position += 1
+            else:
+                value, position = readers[tag](data, position + 1)
+                values.append(value)
+        return values, position
+
+    def _read_list(self, data, position):
+        return self._read_items(data, position)
+
+    def _read_tuple(self, data, position):
+        values, position = self._read_items(data, position)
+        return tuple(values), position
+
+    def _read_set(self, data, position):
+        values, position = self._read_items(data, position)
+        return set(values), position
+
+    def _read_dict(self, data, position):
+        length, position = _read_unsigned(data, position)
+        value = {}
+        for _ in range(length):
+            key, position = self._read(data, position)
+            value[key], position = self._read(data, position)
+        return value, position
+
+    def _read_registered(self, data, position):
+        code, position = _read_unsigned(data, position)
+        decoder = self._decoders.get(code)
+        if decoder is None:
+            raise RuntimeError('Unknown wire code {}.'.format(code))
+        tag = data[position]
+        if tag >= _SMALL_INT:
+            return decoder(tag - _SMALL_INT), position + 1
+        value, position = self._readers[tag](data, position + 1)
+        return decoder(value), position
+
+
+def _write_unsigned(buffer, number) -> None:
+    # seven bits per byte, the high bit tells that more bytes follow
+    while number > 0x7f:
+        buffer.append((number & 0x7f) | 0x80)
+        number >>= 7
+    buffer.append(number)
+
+
+def _read_unsigned(data, position):
+    number = data[position]
+    if number < 0x80:
+        return number, position + 1
+    number = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        number |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return number, position
+        shift += 7
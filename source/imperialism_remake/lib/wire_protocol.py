@@ -0,0 +1,307 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+The protocol spoken on a connection, independent of the transport (Qt sockets in network, asyncio streams in
+async_network).
+
+Messages are serialized by a codec (see wire_codec) negotiated per connection, compressed with zlib if they are
+large and sent as frames: a 4 byte big endian length followed by the codec id, the flags and the payload.
+"""
+
+import logging
+import zlib
+
+from imperialism_remake.lib import wire_codec
+
+#: encoded messages larger than this (in bytes) are compressed
+COMPRESSION_THRESHOLD = 512
+
+#: largest frame (in bytes) a connection sends or accepts by default
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+# number of bytes of the length prefix of a frame
+_LENGTH_SIZE = 4
+
+# number of bytes of a frame before the payload: codec id and flags
+_HEADER_SIZE = 2
+
+# codec id of the handshake message, which contains the ids of the codecs the sender can decode
+_HANDSHAKE = 0
+
+# flags of a message
+_COMPRESSED = 1
+
+logger = logging.getLogger(__name__)
+
+
+class FrameBuffer:
+    """
+    Reassembles the frames (a 4 byte big endian length followed by that many bytes, at least the codec id and the
+    flags) from the bytes as they arrive. A read may contain parts of frames as well as several frames.
+    """
+
+    def __init__(self, max_frame_size=MAX_FRAME_SIZE):
+        self._max_frame_size = max_frame_size
+        self._buffer = bytearray()
+
+        #: number of frames completed so far
+        self.frames = 0
+        #: number of reads that left a partial frame in the buffer
+        self.partial_reads = 0
+        #: largest number of bytes that waited in the buffer for the rest of their frame
+        self.max_buffered = 0
+
+    def add(self, data) -> []:
+        """
+        Adds received bytes, returns the frames completed by them. Raises a RuntimeError if a frame is larger than the
+        maximal frame size or shorter than the codec id and the flags, the buffer is useless then.
+        """
+        buffer = self._buffer
+        buffer += data
+
+        frames = []
+        position = 0
+        while len(buffer) - position >= _LENGTH_SIZE:
+            length = int.from_bytes(buffer[position:position + _LENGTH_SIZE], 'big')
+            if length > self._max_frame_size:
+                raise RuntimeError('Frame of {} bytes is larger than the maximum {}.'.format(
+                    length, self._max_frame_size))
+            if length < _HEADER_SIZE:
+                raise RuntimeError('Frame of {} bytes has no codec id and flags.'.format(length))
+            end = position + _LENGTH_SIZE + length
+            if end > len(buffer):
+                break
+            frames.append(bytes(buffer[position + _LENGTH_SIZE:end]))
+            position = end
+        # remove the completed frames at once
+        del buffer[:position]
+
+        self.frames += len(frames)
+        if buffer:
+            self.partial_reads += 1
+            self.max_buffered = max(self.max_buffered, len(buffer))
+        return frames
+
+    def buffered(self) -> int:
+        """
+        Number of bytes waiting for the rest of their frame.
+        """
+        return len(self._buffer)
+
+    def clear(self) -> None:
+        self._buffer.clear()
+
+
+class WireProtocol:
+    """
+    State of the protocol on one connection. The transport gives the received bytes to receive() and gets the bytes to
+    send through the write callback, received messages are given to the deliver callback.
+
+    After connecting, both sides send a handshake with the codecs they can decode. Each side then sends with the first
+    of its own codecs that the other side can decode, messages sent before the handshake of the other side arrived
+    wait for it.
+
+    With batching on, sent messages are queued and written together in a single write when the transport calls the
+    flush scheduled with call_soon, messages with a lower priority number first.
+
+    Counters for back pressure: bytes_received, frames_sent, writes, frames_received and those of the frame buffer
+    (frame_buffer.partial_reads, frame_buffer.max_buffered).
+    """
+
+    def __init__(self, write, deliver, abort, call_soon, codecs=None, compression_threshold=COMPRESSION_THRESHOLD,
+                 max_frame_size=MAX_FRAME_SIZE):
+        """
+        :param write: Called with bytes to write to the connection.
+        :param deliver: Called with each received message.
+        :param abort: Called with a reason if the other side does not follow the protocol, should close the connection.
+        :param call_soon: Called with a callable to call once the event loop runs again.
+        :param codecs: The codecs this side can use, preferred first, or None for the compact codec.
+        :param compression_threshold: Encoded messages larger than this (in bytes) are compressed.
+        :param max_frame_size: Largest frame (in bytes) to send or accept.
+        """
+        self._write = write
+        self._deliver = deliver
+        self._abort = abort
+        self._call_soon = call_soon
+
+        if codecs is None:
+            codecs = [wire_codec.CompactCodec()]
+        self._codecs = {codec.codec_id: codec for codec in codecs}
+        self._codec_ids = bytes(codec.codec_id for codec in codecs)
+        self._compression_threshold = compression_threshold
+        self._max_frame_size = max_frame_size
+        self.frame_buffer = FrameBuffer(max_frame_size)
+
+        # codec agreed with the other side and (message, priority) waiting for it
+        self._send_codec = None
+        self._waiting_values = []
+        self._handshake_sent = False
+
+        # (priority, frame) queued for the next write if batching
+        self._batching = False
+        self._queued_frames = []
+        self._flush_scheduled = False
+
+        self.bytes_received = 0
+        self.frames_sent = 0
+        self.writes = 0
+        self.frames_received = 0
+
+    def get_codec(self):
+        """
+        The codec used for sending, None as long as the other side has not told which codecs it can decode.
+        """
+        return self._send_codec
+
+    def send_handshake(self) -> None:
+        """
+        Tells the other side which codecs this side can decode, once per connection.
+        """
+        if not self._handshake_sent:
+            self._handshake_sent = True
+            self._write_frames(self._frame(_HANDSHAKE, 0, self._codec_ids), 1)
+
+    def send(self, value, priority=0) -> None:
+        """
+        Encodes a message, compresses it if large and writes (or queues if batching) it as a frame. Until the codec is
+        agreed on, the message waits.
+        """
+        if self._send_codec is None:
+            self._waiting_values.append((value, priority))
+            return
+
+        payload = self._send_codec.encode(value)
+        flags = 0
+        if len(payload) > self._compression_threshold:
+            payload = zlib.compress(payload)
+            flags |= _COMPRESSED
+
+        frame = self._frame(self._send_codec.codec_id, flags, payload)
+        if self._batching:
+            self._queued_frames.append((priority, frame))
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                self._call_soon(self._scheduled_flush)
+        else:
+            self._write_frames(frame, 1)
+
+    def set_batching(self, batching) -> None:
+        """
+        Switches batching of sent messages on or off, switching it off writes the queued messages.
+        """
+        self._batching = batching
+        if not batching:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes the queued messages.
+        """
+        if self._queued_frames:
+            # sort is stable, same priorities stay in the order they were sent
+            self._queued_frames.sort(key=lambda queued_frame: queued_frame[0])
+            self._write_frames(b''.join(frame for _, frame in self._queued_frames), len(self._queued_frames))
+            self._queued_frames = []
+
+    def receive(self, data) -> None:
+        """
+        Processes received bytes, delivers the messages of the frames completed by them. Incomplete frames stay in the
+        frame buffer until the rest arrives.
+        """
+        self.bytes_received += len(data)
+        try:
+            frames = self.frame_buffer.add(data)
+        except RuntimeError as error:
+            self._abort(str(error))
+            return
+
+        for frame in frames:
+            self.frames_received += 1
+            codec_id, flags, payload = frame[0], frame[1], frame[2:]
+            if codec_id == _HANDSHAKE:
+                if not self._receive_handshake(payload):
+                    return
+                continue
+
+            codec = self._codecs.get(codec_id)
+            if codec is None:
+                self._abort('Received message with unknown codec {}.'.format(codec_id))
+                return
+
+            try:
+                if flags & _COMPRESSED:
+                    payload = self._decompress(payload)
+                value = codec.decode(payload)
+            except Exception as error:
+                # whatever the other side sent, it must not get further than this connection
+                self._abort('Received message that cannot be decoded: {!r}'.format(error))
+                return
+
+            self._deliver(value)
+
+    def reset(self) -> None:
+        """
+        A new connection has to agree on a codec again and starts with a new frame.
+        """
+        self._send_codec = None
+        self._waiting_values = []
+        self._handshake_sent = False
+        self._queued_frames = []
+        self.frame_buffer.clear()
+
+    def _decompress(self, payload) -> bytes:
+        # a small compressed frame must not inflate beyond the maximal frame size
+        decompressor = zlib.decompressobj()
+        data = decompressor.decompress(payload, self._max_frame_size)
+        if decompressor.unconsumed_tail:
+            raise RuntimeError('Decompressed message is larger than the maximum {}.'.format(self._max_frame_size))
+        if not decompressor.eof:
+            raise RuntimeError('Compressed message is incomplete.')
+        return data
+
+    def _scheduled_flush(self):
+        self._flush_scheduled = False
+        if self._send_codec is not None:
+            self.flush()
+
+    def _receive_handshake(self, codec_ids) -> bool:
+        # choose the first of our codecs the other side can decode and send the waiting messages
+        for codec_id in self._codec_ids:
+            if codec_id in codec_ids:
+                self._send_codec = self._codecs[codec_id]
+                break
+        else:
+            self._abort('No common codec with the other side.')
+            return False
+        logger.info('connection sends with codec %d', self._send_codec.codec_id)
+
+        waiting_values, self._waiting_values = self._waiting_values, []
+        for value, priority in waiting_values:
+            self.send(value, priority)
+        return True
+
+    def _frame(self, codec_id, flags, payload) -> bytes:
+        length = len(payload) + _HEADER_SIZE
+        if length > self._max_frame_size:
+            raise RuntimeError('Frame of {} bytes is larger than the maximum {}.'.format(length, self._max_frame_size))
+        # length prefix, codec id, flags and payload
+        return length.to_bytes(_LENGTH_SIZE, 'big') + bytes((codec_id, flags)) + payload
+
+    def _write_frames(self, frames, number):
+        self._write(frames)
+        self.frames_sent += number
+        self.writes += 1
@@ -0,0 +1,147 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Headless dedicated server on asyncio, an alternative to the Qt server process (server_process) that does not need Qt.
+Serves the same clients with the same services (ServerHandlers). With scope any, clients on other machines only get
+the lobby, general, chat and game channels, the system channel (shut down, save and load games) is for local clients.
+
+Run with: python -m imperialism_remake.server.async_server [--port PORT] [--scope local|any] [--workers N]
+    [--turn-workers N] [--debug]
+"""
+
+import argparse
+import asyncio
+import logging
+import logging.config
+import os
+
+from imperialism_remake.base import constants
+from imperialism_remake.base.async_network import AsyncNetworkClient
+from imperialism_remake.server import server_config_log, wire_encoders
+from imperialism_remake.server.server_handlers import ServerHandlers
+
+#: host addresses to listen on for the scopes of lib.network.SCOPE
+SCOPE = {'local': '127.0.0.1', 'any': '0.0.0.0'}
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncServerNetworkClient(AsyncNetworkClient):
+    """
+    Server network client on asyncio, see server_network_client.ServerNetworkClient.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # important properties
+        self.subscribed_to_chat = False
+        self.name = ''
+
+
+class AsyncServerManager(ServerHandlers):
+    """
+    Accepts connections on asyncio streams and adds them as server clients. Each connection is served by its own
+    task, all of them run on a single event loop.
+    """
+
+    def __init__(self, session_workers=0, turn_workers=None, turn_processes=None):
+        super().__init__(session_workers, turn_workers, turn_processes)
+        logger.info("AsyncServerManager started")
+        self._loop = None
+        self._server = None
+        self._stopped = None
+
+    async def start(self, port=constants.NETWORK_PORT, scope='local'):
+        """
+        Starts listening.
+        """
+        host = SCOPE[scope]
+        logger.info('server listens on host=%s port=%d (pid=%d)', host, port, os.getpid())
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._server = await asyncio.start_server(self._new_connection, host, port)
+
+    def get_port(self) -> int:
+        """
+        The port the server listens on, useful if it was started on port 0 (any free port).
+        """
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve(self, port=constants.NETWORK_PORT, scope='local'):
+        """
+        Starts listening and serves until a client asks the server to shut down.
+        """
+        await self.start(port, scope)
+        await self._stopped.wait()
+
+    def _shut_down(self):
+        self._server.close()
+        for client in self.server_clients:
+            client.disconnect_from_host()
+        self._stopped.set()
+
+    def _watch(self, file_descriptor, callback):
+        self._loop.add_reader(file_descriptor, callback)
+
+    def _unwatch(self, file_descriptor):
+        self._loop.remove_reader(file_descriptor)
+
+    def _call_soon_threadsafe(self, callback):
+        self._loop.call_soon_threadsafe(callback)
+
+    async def _new_connection(self, reader, writer):
+        """
+        A new connection to the server occurred, wrap it into a server client, add it and serve it until it is closed.
+        Not intended for outside use.
+        """
+        client = AsyncServerNetworkClient(reader, writer, wire_encoders.create_codecs())
+        client.set_batching(True)
+        self._add_client(client)
+        try:
+            await client.run()
+        finally:
+            if client in self.server_clients:
+                self._remove_client(client)
+
+
+def main():
+    """
+    Entry point of the dedicated server.
+    """
+    parser = argparse.ArgumentParser(prog='imperialism_remake_server')
+    parser.add_argument('--port', type=int, default=constants.NETWORK_PORT, help='port to listen on')
+    parser.add_argument('--scope', choices=sorted(SCOPE), default='local', help='listen on the local host or on all')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='number of worker processes for the games, 0 runs them in the server process')
+    parser.add_argument('--turn-workers', dest='turn_workers', type=int, default=None,
+                        help='number of threads processing the turns (per worker process)')
+    parser.add_argument('--turn-processes', dest='turn_processes', type=int, default=None,
+                        help='number of processes creating the turn results with the whole scenario, 0 for none')
+    parser.add_argument('--debug', dest='debug', action='store_true', help='enable detailed debug logging')
+    args = parser.parse_args()
+
+    # the log files are in the user folder
+    os.makedirs(constants.get_user_directory(), exist_ok=True)
+    logging.config.dictConfig(server_config_log.LOG_CONFIG)
+    logging.getLogger().setLevel(logging.DEBUG if args.debug else logging.INFO)
+
+    asyncio.run(AsyncServerManager(args.workers, args.turn_workers, args.turn_processes).serve(args.port, args.scope))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+Game sessions: the games a server hosts at the same time, each with its own scenario, players and turn processing.
+
+A session host runs sessions and is told what to do with commands (see SessionHost.execute). It answers with events
+(event, game_id, client_id, content) given to its event handler, either directly (SessionHost, in the server process)
+or once a worker process answers (session_pool.SessionProcessPool). Only client ids go to a session host, the server
+maps them back to its clients.
+"""
+
+import logging
+
+from imperialism_remake.server.server_scenario import ServerScenario
+from imperialism_remake.server.turn_processing.server_turn_processor import ServerTurnProcessor
+
+logger = logging.getLogger(__name__)
+
+# commands of a session host
+CREATE = 'create'
+CLOSE = 'close'
+JOIN = 'join'
+LEAVE = 'leave'
+TURN_ENDED = 'turn_ended'
+SAVE = 'save'
+
+# events of a session host
+JOINED = 'joined'
+TURN_PROCESSED = 'turn_processed'
+SAVED = 'saved'
+FAILED = 'failed'
+
+
+class SessionMember:
+    """
+    A client playing in a session, the turn processor only needs its id.
+    """
+
+    def __init__(self, client_id):
+        self.client_id = client_id
+
+    def __repr__(self):
+        return 'SessionMember({})'.format(self.client_id)
+
+
+class GameSession:
+    """
+    A game: a scenario, the clients playing it (members) and the processing of their turns, independent of all other
+    sessions.
+    """
+
+    def __init__(self, game_id, server_scenario, turn_processing_finished_event_handler, executor=None,
+                 call_soon_threadsafe=None, process_executor=None):
+        """
+        :param turn_processing_finished_event_handler: Called with the member and the turn result for every member
+            once a turn is processed.
+        :param executor: Executor for the turn processing, see ServerTurnProcessor.set_executor().
+        :param process_executor: Process pool for the turn results, see ServerTurnProcessor.set_executor().
+        """
+        self.game_id = game_id
+        self._members = {}
+
+        self._server_turn_processor = ServerTurnProcessor()
+        self._server_turn_processor.set_turn_processing_finished_event_handler(turn_processing_finished_event_handler)
+        self._server_turn_processor.set_scenario(server_scenario)
+        self._server_turn_processor.set_executor(executor, call_soon_threadsafe, process_executor)
+
+    def get_scenario(self) -> ServerScenario:
+        return self._server_turn_processor.get_scenario()
+
+    def join(self, client_id, nation) -> dict:
+        """
+        A client joins the game playing a nation (-1 for the player nation stored in the scenario). Returns the load
+        response for the client.
+        """
+        server_scenario = self.get_scenario()
+        if nation == -1:
+            nation = server_scenario.get_player_nation()
+            logger.info("This is loading saved file. Use nation from it: %s", nation)
+        else:
+            server_scenario.set_player_nation(nation)
+            logger.info("This is loading saved file. Set current player nation to: %s", nation)
+
+        if client_id not in self._members:
+            member = SessionMember(client_id)
+            self._members[client_id] = member
+            self._server_turn_processor.add_client(member)
+
+        return {'server_scenario_base': server_scenario.get_scenario_base_for_nation(nation), 'nation': nation,
+                'version': server_scenario.get_change_log().get_version(), 'game_id': self.game_id}
+
+    def leave(self, client_id) -> None:
+        member = self._members.pop(client_id, None)
+        if member is not None:
+            self._server_turn_processor.remove_client(member)
+
+    def client_turn_ended(self, client_id, turn_planned) -> None:
+        self._server_turn_processor.client_turn_ended(self._members[client_id], turn_planned)
+
+    def save(self, file_name) -> None:
+        self.get_scenario().save(file_name)
+
+    def is_empty(self) -> bool:
+        return not self._members
+
+    def close(self) -> None:
+        """
+        The game ends, a turn still being processed is not finished.
+        """
+        self._server_turn_processor.cancel()
+
+
+class SessionHost:
+    """
+    Runs game sessions in this process.
+    """
+
+    def __init__(self, event_handler, executor=None, call_soon_threadsafe=None, process_executor=None):
+        """
+        :param event_handler: Called with (event, game_id, client_id, content) for every event of the sessions.
+        :param executor: Executor for the turn processing of the sessions, see ServerTurnProcessor.set_executor().
+        :param call_soon_threadsafe: Called from any thread with a callable to call on the event loop.
+        :param process_executor: Process pool for the turn results of the sessions, see
+            ServerTurnProcessor.set_executor().
+        """
+        self._event_handler = event_handler
+        self._executor = executor
+        self._call_soon_threadsafe = call_soon_threadsafe
+        self._process_executor = process_executor
+        self._sessions = {}
+
+    def execute(self, command, game_id, client_id=None, content=None) -> None:
+        """
+        Executes a command for a session:
+
+        - CREATE: loads the scenario file (content) as a new session
+        - CLOSE: ends a session
+        - JOIN: the client joins playing a nation (content), answered by JOINED with the load response
+        - LEAVE: the client leaves
+        - TURN_ENDED: the client planned its turn (content), once all members did, TURN_PROCESSED with the turn result
+          for every member
+        - SAVE: saves the scenario to a file (content), answered by SAVED
+
+        A command that cannot be executed is answered by FAILED with the reason.
+        """
+        logger.debug('execute %s game_id:%s client_id:%s', command, game_id, client_id)
+        try:
+            if command == CREATE:
+                self._sessions[game_id] = GameSession(game_id, ServerScenario.from_file(content),
+                                                      lambda member, turn_result: self._event_handler(
+                                                          TURN_PROCESSED, game_id, member.client_id, turn_result),
+                                                      self._executor, self._call_soon_threadsafe,
+                                                      self._process_executor)
+            elif command == CLOSE:
+                self._sessions.pop(game_id).close()
+            elif command == JOIN:
+                self._event_handler(JOINED, game_id, client_id, self._sessions[game_id].join(client_id, content))
+            elif command == LEAVE:
+                self._sessions[game_id].leave(client_id)
+            elif command == TURN_ENDED:
+                self._sessions[game_id].client_turn_ended(client_id, content)
+            elif command == SAVE:
+                self._sessions[game_id].save(content)
+                self._event_handler(SAVED, game_id, client_id, content)
+            else:
+                raise RuntimeError('Unknown session command {}.'.format(command))
+        except Exception as error:
+            logger.exception('session command %s for game %s failed', command, game_id)
+            self._event_handler(FAILED, game_id, client_id, str(error))
+
+    def get_session(self, game_id) -> GameSession:
+        return self._sessions[game_id]
+
+    def close(self) -> None:
+        for session in self._sessions.values():
+            session.close()
+        self._sessions.clear()
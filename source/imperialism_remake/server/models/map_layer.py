@@ -0,0 +1,36 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+Map layers (terrain, resource) store one small non-negative number per tile in a flat array, index row * columns +
+column. One byte per tile instead of a reference to an int object in a list.
+"""
+from array import array
+
+#: array type code of a map layer, values 0..255
+LAYER_TYPE_CODE = 'B'
+
+
+def create_layer(number_tiles) -> array:
+    return array(LAYER_TYPE_CODE, bytes(number_tiles))
+
+
+def as_layer(values) -> array:
+    """
+    Returns the values as map layer, layers from scenarios saved as lists are converted.
+    """
+    if isinstance(values, array) and values.typecode == LAYER_TYPE_CODE:
+        return values
+    return array(LAYER_TYPE_CODE, values)
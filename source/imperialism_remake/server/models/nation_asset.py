@@ -20,6 +20,9 @@ from imperialism_remake.server.models.materials import Materials
 from imperialism_remake.server.models.raw_resource_type import RawResourceType
 from imperialism_remake.server.models.workforce import Workforce
 
+#: indices derived from the workforces
+_DERIVED_ATTRIBUTES = ('_positions', '_position_of', '_planned_positions', '_planned_position_of')
+
 
 class NationAsset:
     def __init__(self, nation_id: uuid):
@@ -38,23 +41,93 @@ class NationAsset:
         for good in Goods:
             self._goods[good] = 0
 
-        # This is coordinates for each of resources/workforces
-        self.asset_locations = {}
+        self._init_positions()
+
+    def __getstate__(self):
+        # the positions are derived from the workforces and not saved
+        state = self.__dict__.copy()
+        for name in _DERIVED_ATTRIBUTES:
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        # saved by older versions, the index of current positions was never cleaned up
+        state.pop('asset_locations', None)
+        self.__dict__.update(state)
+        self._init_positions()
+
+    def _init_positions(self):
+        # current position (row, column) -> {workforce id: workforce} of the workforces there, and the other way round
+        self._positions = {}
+        self._position_of = {}
+        # planned position (row, column) -> ids of the workforces planning to be there, and the other way round
+        self._planned_positions = {}
+        self._planned_position_of = {}
+        for workforce in self._workforces.values():
+            self._set_position(workforce)
+            self._set_planned_position(workforce)
 
     def get_nation_id(self) -> uuid:
         return self._nation_id
 
     def add_or_update_workforce(self, workforce: Workforce) -> None:
         self._workforces[workforce.get_id()] = workforce
-
-        row, column = workforce.get_current_position()
-        if row not in self.asset_locations:
-            self.asset_locations[row] = {}
-        self.asset_locations[row][column] = workforce
+        self._set_position(workforce)
+        self._set_planned_position(workforce)
 
     def delete_workforce(self, workforce: Workforce) -> None:
         if workforce.get_id() in self._workforces:
             del self._workforces[workforce.get_id()]
+            self._remove_position(workforce.get_id())
+            self._remove_planned_position(workforce.get_id())
+
+    def get_workforces_at(self, row, column) -> []:
+        """
+        The workforces currently at a position.
+        """
+        return list(self._positions.get((row, column), {}).values())
+
+    def update_planned_position(self, workforce: Workforce) -> None:
+        """
+        Must be called after the planned action (and with it the new position) of a workforce changed.
+        """
+        if workforce.get_id() in self._workforces:
+            self._set_planned_position(self._workforces[workforce.get_id()])
+
+    def is_planned_position_taken(self, row, column, workforce_id=None) -> bool:
+        """
+        Whether a workforce (other than the given one) plans to be at a position after this turn.
+        """
+        workforce_ids = self._planned_positions.get((row, column))
+        if not workforce_ids:
+            return False
+        return len(workforce_ids) > 1 or workforce_id not in workforce_ids
+
+    def _set_position(self, workforce):
+        self._remove_position(workforce.get_id())
+        position = workforce.get_current_position()
+        self._positions.setdefault(position, {})[workforce.get_id()] = workforce
+        self._position_of[workforce.get_id()] = position
+
+    def _remove_position(self, workforce_id):
+        position = self._position_of.pop(workforce_id, None)
+        if position is not None:
+            del self._positions[position][workforce_id]
+            if not self._positions[position]:
+                del self._positions[position]
+
+    def _set_planned_position(self, workforce):
+        self._remove_planned_position(workforce.get_id())
+        position = workforce.get_new_position()
+        self._planned_positions.setdefault(position, set()).add(workforce.get_id())
+        self._planned_position_of[workforce.get_id()] = position
+
+    def _remove_planned_position(self, workforce_id):
+        position = self._planned_position_of.pop(workforce_id, None)
+        if position is not None:
+            self._planned_positions[position].discard(workforce_id)
+            if not self._planned_positions[position]:
+                del self._planned_positions[position]
 
     def get_raw_resources(self) -> {}:
         return self._raw_resources
@@ -0,0 +1,141 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+from array import array
+
+#: marker for a neighbor outside of the map
+NO_NEIGHBOR = -1
+
+#: number of neighbors of a tile, in the order of constants.TileDirections
+DIRECTIONS = 6
+
+# (column offset on even rows, column offset on odd rows, row offset) for each direction in the order of
+# constants.TileDirections, odd rows are shifted half a tile to the right
+_OFFSETS = ((-1, -1, 0), (-1, 0, -1), (0, 1, -1), (1, 1, 0), (0, 1, 1), (-1, 0, 1))
+
+# (columns, rows) -> neighbor table, see NeighborTable.of_size()
+_neighbor_tables = {}
+
+
+class NeighborTable:
+    """
+    The six neighbors of every tile of the staggered map, built once for a map size.
+
+    Tiles are given by their index row * columns + column. The neighbors of a tile are stored next to each other in a
+    flat array in the order of constants.TileDirections, NO_NEIGHBOR where the neighbor would be outside of the map.
+    """
+
+    def __init__(self, columns=0, rows=0):
+        self._columns = columns
+        self._rows = rows
+        self._neighbors = array('i', [NO_NEIGHBOR]) * (columns * rows * DIRECTIONS)
+
+        for row in range(rows):
+            offset_index = row % 2
+            for column in range(columns):
+                base = (row * columns + column) * DIRECTIONS
+                for direction, offsets in enumerate(_OFFSETS):
+                    neighbor_column = column + offsets[offset_index]
+                    neighbor_row = row + offsets[2]
+                    if 0 <= neighbor_column < columns and 0 <= neighbor_row < rows:
+                        self._neighbors[base + direction] = neighbor_row * columns + neighbor_column
+
+    @classmethod
+    def of_size(cls, columns, rows):
+        """
+        The neighbor table of a map size, built once and shared by all scenarios of that size. A neighbor table never
+        changes.
+        """
+        neighbor_table = _neighbor_tables.get((columns, rows))
+        if neighbor_table is None:
+            neighbor_table = cls(columns, rows)
+            _neighbor_tables[(columns, rows)] = neighbor_table
+        return neighbor_table
+
+    def get_columns(self) -> int:
+        return self._columns
+
+    def get_rows(self) -> int:
+        return self._rows
+
+    def index(self, column, row):
+        """
+        Index of a tile or None if the position is outside of the map.
+        """
+        if 0 <= column < self._columns and 0 <= row < self._rows:
+            return row * self._columns + column
+        return None
+
+    def position(self, index) -> (int, int):
+        """
+        Position (column, row) of a tile index.
+        """
+        row, column = divmod(index, self._columns)
+        return column, row
+
+    def neighbor(self, index, direction) -> int:
+        """
+        Index of the neighbor in a direction (position in constants.TileDirections) or NO_NEIGHBOR.
+        """
+        return self._neighbors[index * DIRECTIONS + direction]
+
+    def position_beyond_edge(self, column, row, direction):
+        """
+        For a tile without a neighbor in a direction, the position of that neighbor if it is a diagonal one beyond the
+        west or east edge of the map (column -1 or column == columns, on a row of the map), otherwise None. The
+        scenario has always given these positions as neighbors, see ServerScenario.neighbor_position().
+        """
+        offsets = _OFFSETS[direction]
+        neighbor_row = row + offsets[2]
+        if offsets[2] == 0 or not 0 <= neighbor_row < self._rows:
+            return None
+        return column + offsets[row % 2], neighbor_row
+
+    def neighbors(self, index):
+        """
+        Iterates over the indices of the neighbors of a tile that are on the map, without building a list.
+        """
+        base = index * DIRECTIONS
+        for direction in range(DIRECTIONS):
+            neighbor = self._neighbors[base + direction]
+            if neighbor != NO_NEIGHBOR:
+                yield neighbor
+
+    def ring(self, index, radius) -> []:
+        """
+        Indices of the tiles at exactly the given distance (in steps to a neighbor on the map) from a tile.
+        """
+        return self._rings(index, radius)[radius]
+
+    def within_radius(self, index, radius) -> []:
+        """
+        Indices of the tiles on the map at most the given distance from a tile, including the tile itself, nearer
+        tiles first.
+        """
+        return [tile for ring in self._rings(index, radius) for tile in ring]
+
+    def _rings(self, index, radius) -> []:
+        # breadth first from the tile, one ring per distance
+        rings = [[index]]
+        seen = {index}
+        for _ in range(radius):
+            ring = []
+            for tile in rings[-1]:
+                for neighbor in self.neighbors(tile):
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        ring.append(neighbor)
+            rings.append(ring)
+        return rings
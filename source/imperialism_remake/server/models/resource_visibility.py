@@ -0,0 +1,51 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+from array import array
+
+from imperialism_remake.server.models import map_layer
+
+
+def invisible_resources(terrain_resources_settings) -> set:
+    """
+    The terrain resources marked invisible in the terrain resource settings, only prospectors find them.
+    """
+    return {resource for resource, description in terrain_resources_settings.items()
+            if description is not None and description.get('invisible', False)}
+
+
+class ResourceVisibility:
+    """
+    The terrain resource map as the nations see it.
+
+    Resources marked invisible in the terrain resource settings are removed once from the public layer, as a whole by
+    translating the bytes of the map layer. The resources a nation has revealed with its prospectors are not part of
+    it, the clients show them from the prospector states of the nation.
+    """
+
+    def __init__(self, resources, terrain_resources_settings, columns):
+        self._columns = columns
+        self._invisible = invisible_resources(terrain_resources_settings)
+        public_resources = bytes(0 if resource in self._invisible else resource for resource in range(256))
+        self._public = map_layer.as_layer(map_layer.as_layer(resources).tobytes().translate(public_resources))
+
+    def set_resource(self, column, row, resource) -> None:
+        self._public[row * self._columns + column] = 0 if resource in self._invisible else resource
+
+    def get_resource_layer(self) -> array:
+        """
+        The resource map as the nations see it, a new map layer.
+        """
+        return array(map_layer.LAYER_TYPE_CODE, self._public)
@@ -0,0 +1,262 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+from collections import deque
+
+#: marker for a value that did not exist when a snapshot was taken
+_MISSING = object()
+
+
+class RoadNetwork:
+    """
+    Undirected graph of road sections between map positions (row, column).
+
+    Connected components are maintained incrementally (union-find) while roads are added, so whether two positions
+    are connected by roads is answered in nearly constant time without walking the roads. Removing a road only walks
+    the component it was part of, to find out whether it fell apart. The version is increased with every change and
+    can be used to invalidate results derived from the network.
+
+    A snapshot() keeps answering for the state at the time it was taken while the network changes. It is copy on
+    write: the network only hands the old values of the entries it changes to the open snapshots.
+    """
+
+    def __init__(self, roads=()):
+        self._adjacency = {}
+        # the sections in the directions they were added in and per position the number of them starting, ending there
+        self._sections = set()
+        self._ends = {}
+        self._parent = {}
+        self._size = {}
+        self._version = 0
+
+        self._snapshots = []
+
+        for start, stop in roads:
+            # a scenario may contain a section in both directions
+            if not self.add_road(start, stop) and (tuple(start), tuple(stop)) not in self._sections:
+                self._add_section(tuple(start), tuple(stop), 1)
+
+    def get_version(self) -> int:
+        return self._version
+
+    def add_road(self, start, stop) -> bool:
+        """
+        Adds a road section. Returns False if the section was already part of the network.
+        """
+        start, stop = tuple(start), tuple(stop)
+        if self.has_road(start, stop):
+            return False
+
+        for position, other_position in ((start, stop), (stop, start)):
+            self._before_write(self._adjacency, '_adjacency', position)
+            self._adjacency[position] = self._adjacency.get(position, frozenset()) | {other_position}
+        self._add_section(start, stop, 1)
+        self._union(start, stop)
+        self._version += 1
+        return True
+
+    def remove_road(self, start, stop) -> bool:
+        """
+        Removes a road section. Returns False if the section was not part of the network.
+        """
+        start, stop = tuple(start), tuple(stop)
+        if not self.has_road(start, stop):
+            return False
+
+        for position, other_position in ((start, stop), (stop, start)):
+            self._before_write(self._adjacency, '_adjacency', position)
+            adjacency = self._adjacency[position] - {other_position}
+            if adjacency:
+                self._adjacency[position] = adjacency
+            else:
+                del self._adjacency[position]
+        for section in ((start, stop), (stop, start)):
+            if section in self._sections:
+                self._add_section(*section, -1)
+
+        start_component = self._walk(start)
+        if stop not in start_component:
+            self._set_component(start, start_component)
+            self._set_component(stop, self._walk(stop))
+        self._version += 1
+        return True
+
+    def has_road(self, start, stop) -> bool:
+        return tuple(stop) in self._adjacency.get(tuple(start), ())
+
+    def neighbors(self, position) -> frozenset:
+        """
+        Positions connected to the given position by a single road section.
+        """
+        return self._adjacency.get(tuple(position), frozenset())
+
+    def directions_at(self, position) -> int:
+        """
+        Whether road sections start at a position plus whether road sections end there, in the direction they were
+        added. 0 if no road touches the position, 2 if it is both the start of a section and the end of another.
+        """
+        starting, ending = self._ends.get(tuple(position), (0, 0))
+        return (starting > 0) + (ending > 0)
+
+    def component_of(self, position):
+        """
+        Representative position of the connected component of a position or None if no road touches it.
+        """
+        position = tuple(position)
+        if position not in self._parent:
+            return None
+        return self._find(position)
+
+    def is_connected(self, position, other_position) -> bool:
+        component = self.component_of(position)
+        return component is not None and component == self.component_of(other_position)
+
+    def snapshot(self):
+        """
+        Returns a read only view of the current state. Release it when done, otherwise every later change is recorded
+        for it.
+        """
+        snapshot = RoadNetworkSnapshot(self)
+        self._snapshots.append(snapshot)
+        return snapshot
+
+    def release_snapshot(self, snapshot):
+        self._snapshots.remove(snapshot)
+
+    def _before_write(self, container, name, key):
+        for snapshot in self._snapshots:
+            snapshot._save(name, key, container.get(key, _MISSING))
+
+    def _add_section(self, start, stop, amount):
+        if amount > 0:
+            self._sections.add((start, stop))
+        else:
+            self._sections.remove((start, stop))
+        for position, index in ((start, 0), (stop, 1)):
+            self._before_write(self._ends, '_ends', position)
+            ends = list(self._ends.get(position, (0, 0)))
+            ends[index] += amount
+            if ends == [0, 0]:
+                del self._ends[position]
+            else:
+                self._ends[position] = tuple(ends)
+
+    def _walk(self, position) -> set:
+        # all positions connected to a position, breadth first
+        component = {position}
+        queue = deque([position])
+        while queue:
+            for neighbor in self._adjacency.get(queue.popleft(), ()):
+                if neighbor not in component:
+                    component.add(neighbor)
+                    queue.append(neighbor)
+        return component
+
+    def _set_component(self, root, component):
+        # after a component fell apart, make root the root of one part, a position without roads has no component
+        for position in component:
+            self._before_write(self._parent, '_parent', position)
+            if position in self._adjacency:
+                self._parent[position] = root
+            else:
+                del self._parent[position]
+        self._before_write(self._size, '_size', root)
+        if root in self._adjacency:
+            self._size[root] = len(component)
+        else:
+            del self._size[root]
+
+    def _find(self, position):
+        root = position
+        while self._parent[root] != root:
+            root = self._parent[root]
+        # path compression, not while snapshots would need to record it
+        if not self._snapshots:
+            while self._parent[position] != root:
+                self._parent[position], position = root, self._parent[position]
+        return root
+
+    def _union(self, position, other_position):
+        for p in (position, other_position):
+            if p not in self._parent:
+                self._before_write(self._parent, '_parent', p)
+                self._before_write(self._size, '_size', p)
+                self._parent[p] = p
+                self._size[p] = 1
+
+        root, other_root = self._find(position), self._find(other_position)
+        if root == other_root:
+            return
+        if self._size[root] < self._size[other_root]:
+            root, other_root = other_root, root
+        self._before_write(self._parent, '_parent', other_root)
+        self._before_write(self._size, '_size', root)
+        self._parent[other_root] = root
+        self._size[root] += self._size[other_root]
+
+
+class RoadNetworkSnapshot:
+    """
+    Read only state of a RoadNetwork at the time the snapshot was taken. Created by RoadNetwork.snapshot().
+    """
+
+    def __init__(self, road_network):
+        self._road_network = road_network
+        self._version = road_network.get_version()
+        # old values of the entries the network changed since, by container name
+        self._saved = {'_adjacency': {}, '_ends': {}, '_parent': {}, '_size': {}}
+
+    def _save(self, name, key, value):
+        self._saved[name].setdefault(key, value)
+
+    def _get(self, name, key):
+        saved = self._saved[name]
+        if key in saved:
+            return saved[key]
+        return getattr(self._road_network, name).get(key, _MISSING)
+
+    def get_version(self) -> int:
+        return self._version
+
+    def has_road(self, start, stop) -> bool:
+        return tuple(stop) in self.neighbors(start)
+
+    def neighbors(self, position) -> frozenset:
+        adjacency = self._get('_adjacency', tuple(position))
+        return frozenset() if adjacency is _MISSING else adjacency
+
+    def directions_at(self, position) -> int:
+        ends = self._get('_ends', tuple(position))
+        return 0 if ends is _MISSING else (ends[0] > 0) + (ends[1] > 0)
+
+    def component_of(self, position):
+        position = tuple(position)
+        if self._get('_parent', position) is _MISSING:
+            return None
+        parent = self._get('_parent', position)
+        while parent != position:
+            position, parent = parent, self._get('_parent', parent)
+        return position
+
+    def is_connected(self, position, other_position) -> bool:
+        component = self.component_of(position)
+        return component is not None and component == self.component_of(other_position)
+
+    def release(self):
+        """
+        Stops recording changes of the network. The snapshot must not be used afterwards.
+        """
+        self._road_network.release_snapshot(self)
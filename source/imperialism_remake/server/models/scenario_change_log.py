@@ -0,0 +1,91 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+import uuid
+
+
+class ScenarioChangeLog:
+    """
+    Ordered record of the changes of a scenario that clients have to know about, so that a client which has seen the
+    scenario at some version only needs the changes since then instead of the whole scenario.
+
+    A version is an opaque token. Versions of another change log (e.g. of a scenario loaded before) or versions older
+    than the forgotten changes are unknown and changes_since() returns None for them, the client then needs the whole
+    scenario again.
+
+    Each change is (kind, arguments) where the arguments are the ones of the ServerScenario method that made the
+    change, see ServerScenario.apply_changes(). Changes only a single nation may see are recorded for that nation.
+    The change event handlers of a ServerScenario get the same changes.
+    """
+
+    TERRAIN = 'terrain'
+    TERRAIN_RESOURCE = 'terrain_resource'
+    ROAD = 'road'
+    REMOVED_ROAD = 'removed_road'
+    STRUCTURE = 'structure'
+    UPGRADED_STRUCTURE = 'upgraded_structure'
+    PROVINCE_TILE = 'province_tile'
+    REMOVED_PROVINCE_TILE = 'removed_province_tile'
+    REMOVED_PROVINCE = 'removed_province'
+    PROVINCE_NATION = 'province_nation'
+    PROSPECTOR_RESOURCE_STATE = 'prospector_resource_state'
+
+    def __init__(self):
+        self._log_id = uuid.uuid4()
+        self._first_number = 0
+        # (nation or None if everyone may see it, kind, arguments)
+        self._changes = []
+
+    def get_version(self):
+        return self._log_id, self._first_number + len(self._changes)
+
+    def record(self, kind, arguments, nation=None) -> None:
+        self._changes.append((nation, kind, arguments))
+
+    def is_known(self, version) -> bool:
+        """
+        True if changes_since() can tell the changes since this version.
+        """
+        return self._number(version) is not None
+
+    def changes_since(self, version, nation):
+        """
+        Returns the changes a nation may see since a version of this log or None if the version is unknown.
+        """
+        number = self._number(version)
+        if number is None:
+            return None
+        return [(kind, arguments) for change_nation, kind, arguments in self._changes[number - self._first_number:]
+                if change_nation is None or change_nation == nation]
+
+    def forget_before(self, versions) -> None:
+        """
+        Drops the changes before the oldest of the given versions, when no client will ask for older ones anymore.
+        Does nothing if one of the versions is unknown.
+        """
+        numbers = [self._number(version) for version in versions]
+        if not numbers or None in numbers:
+            return
+        number = min(numbers)
+        del self._changes[:number - self._first_number]
+        self._first_number = number
+
+    def _number(self, version):
+        if version is None:
+            return None
+        log_id, number = version
+        if log_id != self._log_id or not self._first_number <= number <= self._first_number + len(self._changes):
+            return None
+        return number
@@ -0,0 +1,55 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+class ScenarioSnapshot:
+    """
+    Read only view on the roads and structures of a scenario at the time the snapshot was taken, created by
+    ServerScenario.create_snapshot().
+
+    Nothing is copied up front. The road network records the old values of what it changes for its snapshots and the
+    scenario hands over the structure list of a tile before it changes it, so keeping a snapshot costs only as much as
+    has changed since it was taken. Release it when done.
+    """
+
+    def __init__(self, server_scenario):
+        self._server_scenario = server_scenario
+        self._road_network = server_scenario.get_road_network().snapshot()
+        self._structures_version = server_scenario.get_structures_version()
+        # (row, column) -> structures at that position before the first change or None if there were none
+        self._saved_structures = {}
+
+    def _save_structures_at(self, row, column, structures):
+        if (row, column) not in self._saved_structures:
+            self._saved_structures[(row, column)] = None if structures is None else list(structures)
+
+    def get_road_network(self):
+        return self._road_network
+
+    def get_structures_at(self, row, column):
+        if (row, column) in self._saved_structures:
+            return self._saved_structures[(row, column)]
+        return self._server_scenario.get_structures_at(row, column)
+
+    def get_structures_version(self) -> int:
+        return self._structures_version
+
+    def release(self):
+        """
+        Stops recording changes of the scenario. The snapshot must not be used afterwards.
+        """
+        self._road_network.release()
+        self._server_scenario.release_snapshot(self)
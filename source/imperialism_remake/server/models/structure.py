@@ -20,14 +20,14 @@ from imperialism_remake.server.models.structure_type import StructureType
 
 class Structure:
     def __init__(self, structure_id: uuid, row: int, column: int, structure_type: StructureType, raw_resource_type,
-                 max_level):
+                 max_level, level=1):
         self._structure_id = structure_id
         self._structure_type = structure_type
 
         self._row = row
         self._column = column
 
-        self._level = 1
+        self._level = level
         self._max_level = max_level
 
         self._raw_resource_type = raw_resource_type
@@ -47,6 +47,9 @@ class Structure:
     def get_level(self) -> int:
         return self._level
 
+    def get_max_level(self) -> int:
+        return self._max_level
+
     def get_raw_resource_type(self):
         return self._raw_resource_type
 
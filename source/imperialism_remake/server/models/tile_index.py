@@ -0,0 +1,87 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+from array import array
+
+from imperialism_remake.base import constants
+
+#: marker for a tile without province or nation
+NO_ID = -1
+
+
+class TileIndex:
+    """
+    Flat, array-backed index from a tile to the province and the nation owning it.
+
+    The index is derived data only, it is never saved and is rebuilt from the provinces when a scenario is loaded.
+    Province and nation ids are expected to be non-negative integers.
+    """
+
+    def __init__(self, columns=0, rows=0):
+        self._columns = columns
+        self._rows = rows
+        self._province = array('i', [NO_ID]) * (columns * rows)
+        self._nation = array('i', [NO_ID]) * (columns * rows)
+
+    @classmethod
+    def from_provinces(cls, columns, rows, provinces):
+        """
+        The index of the tiles of provinces (province id -> province properties, see constants.ProvinceProperty).
+        """
+        tile_index = cls(columns, rows)
+        for province, province_properties in provinces.items():
+            nation = province_properties.get(constants.ProvinceProperty.NATION)
+            for column, row in province_properties.get(constants.ProvinceProperty.TILES, []):
+                tile_index.set_tile(column, row, province, nation)
+        return tile_index
+
+    def _index(self, column, row):
+        if 0 <= column < self._columns and 0 <= row < self._rows:
+            return row * self._columns + column
+        return None
+
+    def province_at(self, column, row):
+        index = self._index(column, row)
+        if index is None or self._province[index] == NO_ID:
+            return None
+        return self._province[index]
+
+    def nation_at(self, column, row):
+        index = self._index(column, row)
+        if index is None or self._nation[index] == NO_ID:
+            return None
+        return self._nation[index]
+
+    def set_tile(self, column, row, province, nation):
+        index = self._index(column, row)
+        if index is not None:
+            self._province[index] = NO_ID if province is None else province
+            self._nation[index] = NO_ID if nation is None else nation
+
+    def clear_tile(self, column, row):
+        self.set_tile(column, row, None, None)
+
+    def set_nation_of_tiles(self, tiles, nation):
+        value = NO_ID if nation is None else nation
+        for column, row in tiles:
+            index = self._index(column, row)
+            if index is not None:
+                self._nation[index] = value
+
+    def get_province_layer(self) -> array:
+        return self._province
+
+    def get_nation_layer(self) -> array:
+        return self._nation
@@ -20,6 +20,8 @@ class TurnPlanned:
     def __init__(self, nation):
         self._workforces = {}
         self._nation = nation
+        # scenario version of the last applied turn result, see TurnResult.get_version()
+        self._acknowledged_version = None
 
     def add_workforce(self, workforce: Workforce) -> None:
         self._workforces[workforce.get_id()] = workforce
@@ -32,3 +34,9 @@ class TurnPlanned:
 
     def get_nation(self):
         return self._nation
+
+    def set_acknowledged_version(self, version) -> None:
+        self._acknowledged_version = version
+
+    def get_acknowledged_version(self):
+        return self._acknowledged_version
@@ -13,12 +13,36 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
-from imperialism_remake.server.models.workforce import Workforce
+from imperialism_remake.server.models.nation_asset import NationAsset
 
 
 class TurnResult:
-    def __init__(self, server_scenario_base):
+    """
+    Result of a turn for a single nation. Either the whole scenario base (after loading or if the client has to
+    resynchronize) or only the changes since the version the client acknowledged together with its nation asset.
+    On the server, the whole scenario base may already be encoded for sending (a lib.wire_codec.Encoded).
+    """
+
+    def __init__(self, version, server_scenario_base=None, changes=None, nation_asset=None):
+        self._version = version
         self._server_scenario_base = server_scenario_base
+        self._changes = changes
+        self._nation_asset = nation_asset
+
+    def get_version(self):
+        """
+        Version of the scenario after applying this result, to be acknowledged with the next planned turn.
+        """
+        return self._version
+
+    def is_full(self) -> bool:
+        return self._server_scenario_base is not None
 
     def get_server_scenario_base(self) -> {}:
         return self._server_scenario_base
+
+    def get_changes(self) -> []:
+        return self._changes
+
+    def get_nation_asset(self) -> NationAsset:
+        return self._nation_asset
@@ -0,0 +1,115 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+Reading of scenario files: the parts of a scenario file are read when first needed and rules are shared between all
+scenarios using them. Files in the legacy format (a zip archive of pickled values) are read too.
+"""
+
+import logging
+import os
+
+from imperialism_remake.base import constants
+from imperialism_remake.lib import utils
+from imperialism_remake.server import scenario_format
+
+logger = logging.getLogger(__name__)
+
+# rules file name -> (file state, rules)
+_rules = {}
+
+
+def read_rules(rules_name) -> dict:
+    """
+    The rules of a scenario (see constants.ScenarioProperty.RULES). They are read once and shared by all scenarios
+    with the same rules for as long as the rules file is not modified. Rules are never changed, do not change them.
+    """
+    rules_file = constants.extend(constants.SCENARIO_RULESET_FOLDER, rules_name)
+    stat = os.stat(rules_file)
+    state = stat.st_mtime_ns, stat.st_size
+    entry = _rules.get(rules_file)
+    if entry is None or entry[0] != state:
+        logger.debug('read_rules reads %s', rules_file)
+        entry = state, utils.read_from_file(rules_file)
+        _rules[rules_file] = entry
+    return entry[1]
+
+
+class ScenarioArchive:
+    """
+    A scenario file whose parts (constants.SCENARIO_FILE_PROPERTIES, constants.SCENARIO_FILE_MAPS, ...) are read and
+    decoded on first access only, so that for example the title does not need the maps to be decoded.
+
+    The file is either in the current format (see scenario_format) or in the legacy format, a zip archive with the
+    parts as pickled files. Nation assets of legacy files are migrated (see scenario_format.migrate_legacy_nations()).
+
+    The archive stays open until close() is called, use it in a with statement.
+    """
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.legacy = not scenario_format.is_scenario_file(file_name)
+        if self.legacy:
+            self._reader = utils.ZipArchiveReader(file_name)
+        else:
+            self._reader = scenario_format.ScenarioFile(file_name)
+        self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get(self, name):
+        """
+        The decoded content of a part of the scenario, read on the first call. Each call returns the same value.
+        """
+        if name not in self._files:
+            if self._reader is None:
+                raise RuntimeError('Scenario archive {} is closed.'.format(self.file_name))
+            if not self.legacy:
+                self._files[name] = self._reader.read(name)
+            elif name == constants.SCENARIO_FILE_NATIONS:
+                self._files[name] = scenario_format.migrate_legacy_nations(self._reader.read_from_file(name))
+            else:
+                self._files[name] = self._reader.read_from_file(name)
+        return self._files[name]
+
+    def properties(self) -> dict:
+        return self.get(constants.SCENARIO_FILE_PROPERTIES)
+
+    def maps(self) -> dict:
+        return self.get(constants.SCENARIO_FILE_MAPS)
+
+    def provinces(self) -> dict:
+        return self.get(constants.SCENARIO_FILE_PROVINCES)
+
+    def nations(self) -> dict:
+        return self.get(constants.SCENARIO_FILE_NATIONS)
+
+    def rules(self) -> dict:
+        """
+        The (shared) rules named by the scenario properties, see read_rules().
+        """
+        return read_rules(self.properties()[constants.ScenarioProperty.RULES])
+
+    def close(self) -> None:
+        """
+        Closes the file, parts not read so far cannot be read anymore.
+        """
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
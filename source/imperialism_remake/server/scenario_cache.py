@@ -0,0 +1,117 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+Cache of what the server reads from scenario files for the lobby: properties (titles) and previews.
+"""
+
+import logging
+import os
+
+from imperialism_remake.base import constants
+from imperialism_remake.server.models.tile_index import TileIndex
+from imperialism_remake.server.scenario_archive import ScenarioArchive
+
+logger = logging.getLogger(__name__)
+
+
+class ScenarioCache:
+    """
+    Keeps what was read from a scenario file for as long as the file is not modified (same modification time and
+    size), the entries are filled when first asked for.
+
+    Properties and previews are small and kept for every file. Both only read the parts of the scenario file they need
+    (see scenario_archive.ScenarioArchive), never the maps.
+    """
+
+    def __init__(self):
+        # file name -> (file state, value)
+        self._properties = {}
+        self._previews = {}
+
+    @staticmethod
+    def _file_state(file_name):
+        stat = os.stat(file_name)
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _cached(entries, file_name, state):
+        entry = entries.get(file_name)
+        if entry is not None and entry[0] == state:
+            return entry[1]
+        return None
+
+    def get_properties(self, file_name) -> dict:
+        """
+        The scenario properties (see constants.ScenarioProperty) of a scenario file. Do not change them.
+        """
+        state = self._file_state(file_name)
+        properties = self._cached(self._properties, file_name, state)
+        if properties is None:
+            logger.debug('get_properties reads %s', file_name)
+            with ScenarioArchive(file_name) as archive:
+                properties = archive.properties()
+            self._properties[file_name] = state, properties
+        return properties
+
+    def get_titles(self, folder) -> []:
+        """
+        Sorted (title, file name) of all scenario files in a folder.
+        """
+        scenario_files = [os.path.join(folder, x) for x in os.listdir(folder) if x.endswith('.scenario')]
+        return sorted((self.get_properties(scenario_file)[constants.ScenarioProperty.TITLE], scenario_file)
+                      for scenario_file in scenario_files)
+
+    def get_preview(self, file_name) -> dict:
+        """
+        Preview of a scenario file for the lobby: some scenario and nation properties and a map of the nations. Do not
+        change it.
+        """
+        state = self._file_state(file_name)
+        preview = self._cached(self._previews, file_name, state)
+        if preview is None:
+            logger.debug('get_preview reads %s', file_name)
+            with ScenarioArchive(file_name) as archive:
+                preview = self._create_preview(archive)
+            self._previews[file_name] = state, preview
+        return preview
+
+    @staticmethod
+    def _create_preview(archive) -> dict:
+        preview = {'scenario': archive.file_name}
+
+        # some scenario properties should be copied
+        properties = archive.properties()
+        scenario_copy_keys = [constants.ScenarioProperty.MAP_COLUMNS,
+                              constants.ScenarioProperty.MAP_ROWS,
+                              constants.ScenarioProperty.TITLE,
+                              constants.ScenarioProperty.DESCRIPTION]
+        for key in scenario_copy_keys:
+            preview[key] = properties[key]
+
+        # some nations properties should be copied
+        nations = {}
+        nation_copy_keys = [constants.NationProperty.COLOR,
+                            constants.NationProperty.NAME,
+                            constants.NationProperty.DESCRIPTION]
+        for nation, nation_properties in archive.nations().items():
+            nations[nation] = {key: nation_properties[key] for key in nation_copy_keys}
+        preview[constants.SCENARIO_FILE_NATIONS] = nations
+
+        # the nations map (-1 means no nation) is the nation layer of the tile index of the provinces
+        tile_index = TileIndex.from_provinces(properties[constants.ScenarioProperty.MAP_COLUMNS],
+                                              properties[constants.ScenarioProperty.MAP_ROWS], archive.provinces())
+        preview['map'] = tile_index.get_nation_layer().tolist()
+        return preview
@@ -0,0 +1,396 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+Binary format of scenario files (version FORMAT_VERSION). Replaces the legacy format, a zip archive of pickled values
+(see scenario_archive), which depends on the layout of the model classes and is slow to read.
+
+A file starts with a header (HEADER: MAGIC, format version, number of members) followed by a table of the members
+(ENTRY: name, offset, size). The members are stored uncompressed and aligned to 8 bytes, so each can be read directly
+or from a memory map of the file:
+
+- properties, nations: the scenario and nation properties in the compact encoding (see lib.wire_codec), without the
+  tiles of the rivers, without the assets of the nations and with empty prospector resource states
+- provinces: the province properties except the tiles as a table in the compact encoding, the province ids and for
+  each property the ids of the provinces that have it and their values
+- river_tiles, province_tiles: int32, for each river (province) in order its number of tiles and then column, row of
+  each tile
+- terrain, resource: the map layers, an unsigned byte per tile
+- roads: int32, row, column, row, column of each road section
+- structures: a STRUCTURE record per structure
+- assets: the raw resources, materials and goods of each nation with assets in the compact encoding
+- workforces: a WORKFORCE record per workforce of a nation asset
+- resource_states: int32, nation, row, column, terrain resource, state of each prospector resource state
+
+Numbers are little endian. Enum members are stored as their values.
+"""
+
+import mmap
+import struct
+import sys
+import uuid
+from array import array
+
+from imperialism_remake.base import constants
+from imperialism_remake.lib import wire_codec
+from imperialism_remake.server.models import map_layer
+from imperialism_remake.server.models.goods import Goods
+from imperialism_remake.server.models.materials import Materials
+from imperialism_remake.server.models.nation_asset import NationAsset
+from imperialism_remake.server.models.prospector_resource_state import ProspectorResourceState
+from imperialism_remake.server.models.raw_resource_type import RawResourceType
+from imperialism_remake.server.models.server_scenario_base import ServerScenarioBase
+from imperialism_remake.server.models.structure import Structure
+from imperialism_remake.server.models.structure_type import StructureType
+from imperialism_remake.server.models.workforce import Workforce
+from imperialism_remake.server.models.workforce_action import WorkforceAction
+from imperialism_remake.server.models.workforce_type import WorkforceType
+
+#: first bytes of a scenario file in this format
+MAGIC = b'IMPRSCN\x00'
+
+#: version of the format written, files of older versions are read too
+FORMAT_VERSION = 1
+
+#: magic, format version, number of members
+HEADER = struct.Struct('<8sII')
+#: name (at most 16 ASCII characters), offset, size of a member
+ENTRY = struct.Struct('<16sQQ')
+#: id, row, column, type, raw resource type (0 for none), max level, level
+STRUCTURE = struct.Struct('<16s6i')
+#: id, nation of the asset, row, column, nation, type, action, new row, new column
+WORKFORCE = struct.Struct('<16s8i')
+
+_ALIGNMENT = 8
+
+# member names
+PROPERTIES = 'properties'
+PROVINCES = 'provinces'
+NATIONS = 'nations'
+TERRAIN = 'terrain'
+RESOURCE = 'resource'
+RIVER_TILES = 'river_tiles'
+PROVINCE_TILES = 'province_tiles'
+ROADS = 'roads'
+STRUCTURES = 'structures'
+ASSETS = 'assets'
+WORKFORCES = 'workforces'
+PROSPECTOR_RESOURCE_STATES = 'resource_states'
+
+#: members needed for each part of a scenario base (see constants.SCENARIO_FILE_PROPERTIES, ...)
+PARTS = {constants.SCENARIO_FILE_PROPERTIES: (PROPERTIES, RIVER_TILES),
+         constants.SCENARIO_FILE_MAPS: (TERRAIN, RESOURCE, ROADS, STRUCTURES),
+         constants.SCENARIO_FILE_PROVINCES: (PROVINCES, PROVINCE_TILES),
+         constants.SCENARIO_FILE_NATIONS: (NATIONS, ASSETS, WORKFORCES, PROSPECTOR_RESOURCE_STATES)}
+
+
+def _create_codec() -> wire_codec.CompactCodec:
+    # the codes must never be reused for another type, otherwise files are misread
+    codec = wire_codec.CompactCodec()
+    codec.register_enum(constants.ScenarioProperty, 1)
+    codec.register_enum(constants.ProvinceProperty, 2)
+    codec.register_enum(constants.NationProperty, 3)
+    codec.register_enum(RawResourceType, 4)
+    codec.register_enum(Materials, 5)
+    codec.register_enum(Goods, 6)
+    return codec
+
+
+_codec = _create_codec()
+
+
+def _int_array(values=()) -> array:
+    return array('i', values)
+
+
+def _array_bytes(values: array) -> bytes:
+    if sys.byteorder == 'big' and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _read_array(typecode, data) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big' and values.itemsize > 1:
+        values.byteswap()
+    return values
+
+
+def _tile_lists_bytes(tile_lists) -> bytes:
+    values = _int_array()
+    for tiles in tile_lists:
+        values.append(len(tiles))
+        for column, row in tiles:
+            values.extend((column, row))
+    return _array_bytes(values)
+
+
+def _read_tile_lists(data) -> []:
+    values = _read_array('i', data).tolist()
+    tile_lists = []
+    index = 0
+    while index < len(values):
+        end = index + 1 + 2 * values[index]
+        tile_lists.append([[column, row] for column, row in zip(values[index + 1:end:2], values[index + 2:end:2])])
+        index = end
+    return tile_lists
+
+
+def is_scenario_file(file_name) -> bool:
+    """
+    Whether a file is in this format (and not in the legacy one).
+    """
+    with open(file_name, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def write(file_name, scenario_base: ServerScenarioBase) -> None:
+    """
+    Writes a scenario base in the current format. The rules are not written, the properties name them.
+    """
+    members = _encode(scenario_base)
+
+    offset = HEADER.size + ENTRY.size * len(members)
+    entries = []
+    for name, data in members:
+        offset += -offset % _ALIGNMENT
+        entries.append(ENTRY.pack(name.encode('ascii'), offset, len(data)))
+        offset += len(data)
+
+    with open(file_name, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(members)))
+        file.write(b''.join(entries))
+        for name, data in members:
+            file.write(bytes(-file.tell() % _ALIGNMENT))
+            file.write(data)
+
+
+def _encode(scenario_base) -> []:
+    maps = scenario_base.maps
+    properties = dict(scenario_base.properties)
+    rivers = properties.get(constants.ScenarioProperty.RIVERS, [])
+    properties[constants.ScenarioProperty.RIVERS] = [{key: value for key, value in river.items() if key != 'tiles'}
+                                                     for river in rivers]
+    members = [(PROPERTIES, _codec.encode(properties)),
+               (RIVER_TILES, _tile_lists_bytes(river.get('tiles', []) for river in rivers))]
+
+    for name, key in ((TERRAIN, ServerScenarioBase.TERRAIN), (RESOURCE, ServerScenarioBase.RESOURCE)):
+        members.append((name, map_layer.as_layer(maps.get(key, ())).tobytes()))
+
+    # a column per property, far faster to decode than a dict per province
+    columns = {}
+    for province, province_properties in scenario_base.provinces.items():
+        for key, value in province_properties.items():
+            if key != constants.ProvinceProperty.TILES:
+                column = columns.setdefault(key, ([], []))
+                column[0].append(province)
+                column[1].append(value)
+    members.append((PROVINCES, _codec.encode((list(scenario_base.provinces), columns))))
+    members.append((PROVINCE_TILES, _tile_lists_bytes(province_properties.get(constants.ProvinceProperty.TILES, [])
+                                                      for province_properties in scenario_base.provinces.values())))
+
+    roads = _int_array()
+    for start, stop in maps.get(ServerScenarioBase.ROAD, []):
+        roads.extend((start[0], start[1], stop[0], stop[1]))
+    members.append((ROADS, _array_bytes(roads)))
+
+    structures = bytearray()
+    for row_structures in maps.get(ServerScenarioBase.STRUCTURE, {}).values():
+        for tile_structures in row_structures.values():
+            for structure in tile_structures:
+                row, column = structure.get_position()
+                raw_resource_type = structure.get_raw_resource_type()
+                structures += STRUCTURE.pack(structure.get_id().bytes, row, column, structure.get_type().value,
+                                             0 if raw_resource_type is None else raw_resource_type.value,
+                                             structure.get_max_level(), structure.get_level())
+    members.append((STRUCTURES, bytes(structures)))
+
+    nations = {}
+    assets = {}
+    workforces = bytearray()
+    prospector_resource_states = _int_array()
+    for nation, nation_properties in scenario_base.nations.items():
+        nations[nation] = {key: value for key, value in nation_properties.items()
+                           if key != constants.NationProperty.ASSETS}
+
+        asset = nation_properties.get(constants.NationProperty.ASSETS)
+        if asset is not None:
+            assets[nation] = [asset.get_raw_resources(), asset.get_materials(), asset.get_goods()]
+            for workforce in asset.get_workforces().values():
+                row, column = workforce.get_current_position()
+                new_row, new_column = workforce.get_new_position()
+                workforces += WORKFORCE.pack(workforce.get_id().bytes, nation, row, column, workforce.get_nation(),
+                                             workforce.get_type().value, workforce.get_action().value, new_row,
+                                             new_column)
+
+        # the nation keeps an empty dict of states, the states are in their own member
+        states = nation_properties.get(constants.NationProperty.PROSPECTOR_RESOURCE_STATE)
+        if states is not None:
+            nations[nation][constants.NationProperty.PROSPECTOR_RESOURCE_STATE] = {}
+            for row, row_states in states.items():
+                for column, tile_states in row_states.items():
+                    for terrain_resource, state in tile_states.items():
+                        prospector_resource_states.extend((nation, row, column, terrain_resource, state.value))
+    members.append((NATIONS, _codec.encode(nations)))
+    members.append((ASSETS, _codec.encode(assets)))
+    members.append((WORKFORCES, bytes(workforces)))
+    members.append((PROSPECTOR_RESOURCE_STATES, _array_bytes(prospector_resource_states)))
+    return members
+
+
+class ScenarioFile:
+    """
+    A scenario file in this format, memory mapped. The members are read with member() and decoded with the read
+    functions (read_properties(), ...), the scenario archive (see scenario_archive.ScenarioArchive) does both on first
+    access.
+
+    The file stays open until close() is called.
+    """
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        with open(file_name, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, self.version, number = HEADER.unpack_from(self._map)
+            if magic != MAGIC:
+                raise RuntimeError('{} is not a scenario file.'.format(file_name))
+            if self.version > FORMAT_VERSION:
+                raise RuntimeError('{} has format version {}, only up to {} can be read.'.format(
+                    file_name, self.version, FORMAT_VERSION))
+            self._members = {}
+            for index in range(number):
+                name, offset, size = ENTRY.unpack_from(self._map, HEADER.size + index * ENTRY.size)
+                if offset + size > len(self._map):
+                    raise RuntimeError('{} is truncated.'.format(file_name))
+                self._members[name.rstrip(b'\x00').decode('ascii')] = offset, size
+        except (struct.error, RuntimeError):
+            self.close()
+            raise
+
+    def member(self, name) -> bytes:
+        """
+        The bytes of a member, empty if the file has no such member.
+        """
+        offset, size = self._members.get(name, (0, 0))
+        return self._map[offset:offset + size]
+
+    def read(self, part):
+        """
+        Decodes a part of the scenario base (see PARTS).
+        """
+        return _READERS[part](*(self.member(name) for name in PARTS[part]))
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+def _read_properties(properties, river_tiles):
+    properties = _codec.decode(properties)
+    for river, tiles in zip(properties.get(constants.ScenarioProperty.RIVERS, []), _read_tile_lists(river_tiles)):
+        river['tiles'] = tiles
+    return properties
+
+
+def _read_maps(terrain, resource, roads, structures):
+    maps = {ServerScenarioBase.TERRAIN: _read_array(map_layer.LAYER_TYPE_CODE, terrain),
+            ServerScenarioBase.RESOURCE: _read_array(map_layer.LAYER_TYPE_CODE, resource)}
+
+    values = _read_array('i', roads)
+    maps[ServerScenarioBase.ROAD] = [((values[index], values[index + 1]), (values[index + 2], values[index + 3]))
+                                     for index in range(0, len(values), 4)]
+
+    structure_map = {}
+    for structure_id, row, column, structure_type, raw_resource_type, max_level, level in \
+            STRUCTURE.iter_unpack(structures):
+        structure = Structure(uuid.UUID(bytes=structure_id), row, column, StructureType(structure_type),
+                              RawResourceType(raw_resource_type) if raw_resource_type else None, max_level, level)
+        structure_map.setdefault(row, {}).setdefault(column, []).append(structure)
+    maps[ServerScenarioBase.STRUCTURE] = structure_map
+    return maps
+
+
+def _read_provinces(provinces, province_tiles):
+    province_ids, columns = _codec.decode(provinces)
+    provinces = {province: {} for province in province_ids}
+    for key, (column_provinces, values) in columns.items():
+        for province, value in zip(column_provinces, values):
+            provinces[province][key] = value
+    for province_properties, tiles in zip(provinces.values(), _read_tile_lists(province_tiles)):
+        province_properties[constants.ProvinceProperty.TILES] = tiles
+    return provinces
+
+
+def _read_nations(nations, assets, workforces, prospector_resource_states):
+    nations = _codec.decode(nations)
+
+    for nation, (raw_resources, materials, goods) in _codec.decode(assets).items():
+        asset = NationAsset(nation)
+        asset.get_raw_resources().update(raw_resources)
+        asset.get_materials().update(materials)
+        asset.get_goods().update(goods)
+        nations[nation][constants.NationProperty.ASSETS] = asset
+
+    for workforce_id, nation, row, column, workforce_nation, workforce_type, action, new_row, new_column in \
+            WORKFORCE.iter_unpack(workforces):
+        workforce = Workforce(uuid.UUID(bytes=workforce_id), row, column, workforce_nation,
+                              WorkforceType(workforce_type))
+        workforce.plan_action(new_row, new_column, WorkforceAction(action))
+        nations[nation][constants.NationProperty.ASSETS].add_or_update_workforce(workforce)
+
+    values = _read_array('i', prospector_resource_states)
+    for index in range(0, len(values), 5):
+        nation, row, column, terrain_resource, state = values[index:index + 5]
+        states = nations[nation].setdefault(constants.NationProperty.PROSPECTOR_RESOURCE_STATE, {})
+        states.setdefault(row, {})[column] = {terrain_resource: ProspectorResourceState(state)}
+    return nations
+
+
+_READERS = {constants.SCENARIO_FILE_PROPERTIES: _read_properties,
+            constants.SCENARIO_FILE_MAPS: _read_maps,
+            constants.SCENARIO_FILE_PROVINCES: _read_provinces,
+            constants.SCENARIO_FILE_NATIONS: _read_nations}
+
+
+def migrate_legacy_nations(nations) -> dict:
+    """
+    Nations read from a legacy scenario file have nation assets pickled with the class layout of the time they were
+    saved. Replaces them by new ones with the same content: workforces without a nation belong to the nation of the
+    asset, workforces without a planned position stay where they are, missing materials and goods are 0.
+    """
+    for nation, nation_properties in nations.items():
+        legacy_asset = nation_properties.get(constants.NationProperty.ASSETS)
+        if legacy_asset is None:
+            continue
+        state = vars(legacy_asset)
+        asset = NationAsset(nation)
+        for key, values in (('_raw_resources', asset.get_raw_resources()), ('_materials', asset.get_materials()),
+                            ('_goods', asset.get_goods())):
+            values.update(state.get(key, {}))
+        for legacy_workforce in state.get('_workforces', {}).values():
+            workforce_state = vars(legacy_workforce)
+            row, column = workforce_state['_row'], workforce_state['_column']
+            workforce = Workforce(workforce_state['_workforce_id'], row, column,
+                                  workforce_state.get('_nation', nation), workforce_state['_workforce_type'])
+            new_row, new_column = workforce_state.get('_new_row'), workforce_state.get('_new_column')
+            if new_row is not None and new_column is not None:
+                workforce.plan_action(new_row, new_column, workforce_state['_workforce_action'])
+            asset.add_or_update_workforce(workforce)
+        nation_properties[constants.NationProperty.ASSETS] = asset
+    return nations
@@ -0,0 +1,422 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+The services of the server (lobby, chat, game, system) for its clients, independent of the network transport. The Qt
+server (server_manager) and the asyncio server (async_server) only accept connections and add them as clients.
+"""
+
+import concurrent.futures
+import ipaddress
+import logging
+import multiprocessing
+import uuid
+from datetime import datetime
+
+from imperialism_remake.base import constants
+from imperialism_remake.server import game_session
+from imperialism_remake.server.scenario_cache import ScenarioCache
+from imperialism_remake.server.session_pool import SessionProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+def is_loopback(address) -> bool:
+    """
+    Whether a peer address (the host of ServerNetworkClient.peer_address(), a QHostAddress, or of
+    AsyncServerNetworkClient.peer_address(), a string) is on this machine.
+    """
+    if hasattr(address, 'isLoopback'):
+        return address.isLoopback()
+    try:
+        address = ipaddress.ip_address(str(address).split('%')[0])
+    except ValueError:
+        return False
+    if address.version == 6 and address.ipv4_mapped is not None:
+        address = address.ipv4_mapped
+    return address.is_loopback
+
+
+class ServerHandlers:
+    """
+    Handles the messages of the server clients. A server client is a network client on the server (either a
+    ServerNetworkClient or an AsyncServerNetworkClient) with the additional properties subscribed_to_chat, name and
+    game_id (of the game session it plays in).
+
+    The games are hosted as sessions (see game_session), either in the server process or, with session workers, in a
+    pool of worker processes (see session_pool). Either way their turns are processed by a pool of threads, not on
+    the event loop. In the server process the turn results with the whole scenario are created by a pool of processes.
+    """
+
+    def __init__(self, session_workers=0, turn_workers=None, turn_processes=None):
+        """
+        We start with an empty list of server clients and no game sessions.
+
+        :param session_workers: Number of worker processes for the game sessions, 0 runs them in the server process.
+        :param turn_workers: Number of threads processing the turns (per worker process), None for the default of
+            concurrent.futures.ThreadPoolExecutor.
+        :param turn_processes: Number of processes creating the turn results with the whole scenario if the game
+            sessions run in the server process, None for the default of concurrent.futures.ProcessPoolExecutor, 0
+            creates them in the threads. The worker processes of the game sessions cannot have processes of their own.
+        """
+        self.server_clients = []
+        self.chat_log = []
+
+        #: game id -> {'scenario': scenario file, 'clients': ids of the clients playing}
+        self.game_sessions = {}
+        self._clients_by_id = {}
+        self._session_workers = session_workers
+        self._turn_workers = turn_workers
+        self._turn_processes = turn_processes
+        self._session_host = None
+        self._turn_executor = None
+        self._turn_process_executor = None
+        self._scenario_cache = ScenarioCache()
+
+    def _get_session_host(self):
+        # created with the first game, then the event loop of the server runs
+        if self._session_host is None:
+            if self._session_workers > 0:
+                self._session_host = SessionProcessPool(self._session_workers, self._session_event, self._watch,
+                                                        self._unwatch, self._turn_workers)
+            else:
+                self._turn_executor = concurrent.futures.ThreadPoolExecutor(self._turn_workers)
+                if self._turn_processes != 0:
+                    # spawn, the server process has threads and an event loop which should not be forked
+                    self._turn_process_executor = concurrent.futures.ProcessPoolExecutor(
+                        self._turn_processes, mp_context=multiprocessing.get_context('spawn'))
+                self._session_host = game_session.SessionHost(self._session_event, self._turn_executor,
+                                                              self._call_soon_threadsafe, self._turn_process_executor)
+        return self._session_host
+
+    def _session_event(self, event, game_id, client_id, content):
+        """
+        A game session has an answer for a client. Not intended for outside use.
+        """
+        logger.debug('_session_event %s game_id:%s client_id:%s', event, game_id, client_id)
+        client = self._clients_by_id.get(client_id)
+        if event == game_session.FAILED:
+            logger.error('game %s failed for client %s: %s', game_id, client_id, content)
+            if client_id is None:
+                # the session is lost (it could not be created or its worker process ended)
+                self._end_game(game_id, content)
+        elif client is None or not client.is_connected() or client.game_id != game_id:
+            logger.info('client %s left game %s, drops %s', client_id, game_id, event)
+        elif event == game_session.JOINED:
+            self.game_sessions[game_id]['clients'].add(client_id)
+            client.send(constants.C.GAME, constants.M.GAME_LOAD_RESPONSE, content)
+        elif event == game_session.TURN_PROCESSED:
+            client.send(constants.C.GAME, constants.M.GAME_TURN_PROCESS_RESPONSE, content)
+        elif event == game_session.SAVED:
+            client.send(constants.C.SYSTEM, constants.M.GAME_SAVE_RESPONSE)
+
+    def _shut_down(self):
+        """
+        A local client asked the server to shut down, stop listening and end the event loop.
+        """
+        raise NotImplementedError()
+
+    def _watch(self, file_descriptor, callback):
+        """
+        Calls the callback whenever the file descriptor (of a session worker connection) is readable.
+        """
+        raise NotImplementedError()
+
+    def _unwatch(self, file_descriptor):
+        raise NotImplementedError()
+
+    def _call_soon_threadsafe(self, callback):
+        """
+        Calls the callback on the event loop, may be called from any thread.
+        """
+        raise NotImplementedError()
+
+    def _add_client(self, client):
+        """
+        Gives a new server client an id, adds some general receivers and adds it to the internal client list. Not
+        intended for outside use.
+
+        :param client: The new server client
+        """
+        # give it a new id
+        while True:
+            new_id = uuid.uuid4()
+            if not any([new_id == client.client_id for client in self.server_clients]):
+                # not any == none
+                break
+        # noinspection PyUnboundLocalVariable
+        client.client_id = new_id
+        client.game_id = None
+        logger.info('new client with id {}'.format(new_id))
+
+        # add some general channels and receivers
+        # TODO the receivers should be in another module eventually
+        client.connect_to_channel(constants.C.LOBBY, self._lobby_messages)
+        client.connect_to_channel(constants.C.GENERAL, self._general_messages)
+
+        # the system channel (shut down, save and load games with file names) only for clients on this machine
+        peer_address = client.peer_address()
+        if peer_address and is_loopback(peer_address[0]):
+            client.connect_to_channel(constants.C.SYSTEM, self._system_messages)
+        else:
+            logger.info('client %s from %s has no system channel', new_id, peer_address)
+
+        # chat message system, handled by a single central routine
+        client.connect_to_channel(constants.C.CHAT, self._chat_system)
+
+        client.connect_to_channel(constants.C.GAME, self._game_message_received)
+
+        # finally add to list of clients
+        self.server_clients.append(client)
+        self._clients_by_id[new_id] = client
+
+        logger.info('server server_clients len: %d', len(self.server_clients))
+
+    def _remove_client(self, client):
+        """
+        A server client disconnected. Not intended for outside use.
+        """
+        self.server_clients.remove(client)
+        del self._clients_by_id[client.client_id]
+        self._leave_game(client)
+
+        logger.info('server server_clients len: %d', len(self.server_clients))
+
+    def _game_message_received(self, client, channel: constants.C, action: constants.M, content):
+        logger.debug('_chat_system action: %s, content:%s', action, content)
+        if action == constants.M.GAME_TURN_PROCESS_REQUEST:
+            if client.game_id is None:
+                logger.warning('client %s ended a turn without playing a game', client.client_id)
+                return
+            self._get_session_host().execute(game_session.TURN_ENDED, client.game_id, client.client_id, content)
+
+    def _create_game(self, client, scenario_file, nation):
+        """
+        Starts a new game of a scenario file with the client as first player, answered on the game channel once the
+        client joined. Not intended for outside use.
+        """
+        game_id = uuid.uuid4()
+        self.game_sessions[game_id] = {'scenario': scenario_file, 'clients': set()}
+        self._get_session_host().execute(game_session.CREATE, game_id, content=scenario_file)
+        if game_id not in self.game_sessions:
+            # failed right away
+            return
+        logger.info('game %s started with %s', game_id, scenario_file)
+
+        self._join_game(client, game_id, nation)
+
+    def _join_game(self, client, game_id, nation):
+        """
+        The client leaves its game and joins another one. Not intended for outside use.
+        """
+        self._leave_game(client)
+        client.game_id = game_id
+        self._get_session_host().execute(game_session.JOIN, game_id, client.client_id, nation)
+
+    def _leave_game(self, client):
+        """
+        The client leaves its game (if any), a game without clients ends. Not intended for outside use.
+        """
+        game_id = client.game_id
+        if game_id is None:
+            return
+        client.game_id = None
+
+        session_host = self._get_session_host()
+        session_host.execute(game_session.LEAVE, game_id, client.client_id)
+        clients = self.game_sessions[game_id]['clients']
+        clients.discard(client.client_id)
+        if not clients and not any(c.game_id == game_id for c in self.server_clients):
+            logger.info('game %s ended', game_id)
+            session_host.execute(game_session.CLOSE, game_id)
+            del self.game_sessions[game_id]
+
+    def _end_game(self, game_id, reason):
+        """
+        A game session is lost, its clients are told and do not play it anymore. Not intended for outside use.
+        """
+        if self.game_sessions.pop(game_id, None) is None:
+            return
+        logger.info('game %s ended: %s', game_id, reason)
+        for client in self.server_clients:
+            if client.game_id == game_id:
+                client.game_id = None
+                if client.is_connected():
+                    client.send(constants.C.GAME, constants.M.GAME_FAILED, reason)
+
+    def _chat_system(self, client, channel: constants.C, action: constants.M, content):
+        """
+
+        :param client:
+        :param channel:
+        :param action:
+        :param content:
+        """
+
+        logger.debug('_chat_system action: %s', action)
+        if action == constants.M.CHAT_SUBSCRIBE:
+            # add this client to list of clients to be notified of new chat messages
+            client.subscribed_to_chat = True
+
+        elif action == constants.M.CHAT_UNSUBSCRIBE:
+            # remove this client from list of clients to be notified of new chat messages
+            client.subscribed_to_chat = False
+
+        elif action == constants.M.CHAT_LOG:
+            # send history/log of last chat messages
+            pass
+
+        elif action == constants.M.CHAT_MESSAGE:
+            # new chat message from this client, log and distribute
+
+            # format message
+            now = datetime.now().strftime('%H:%M:%S')
+            chat_message = '{}: {} - {}'.format(now, client.name, content)
+
+            # append to chat log
+            self.chat_log.append(chat_message)
+
+            # distribute chat message
+            for client in self.server_clients:
+                if client.subscribed_to_chat:
+                    client.send(constants.C.CHAT, constants.M.CHAT_MESSAGE, chat_message)
+
+    def _system_messages(self, client, channel: constants.C, action: constants.M, content):
+        """
+        Handles system messages of a local client to its local server. Not intended for outside use.
+
+        :param client:
+        :param channel:
+        :param action:
+        :param content:
+        """
+        logger.debug('_system_messages action: %s', action)
+
+        if action == constants.M.SYSTEM_SHUTDOWN:
+            # shuts down
+
+            logger.info('server manager shuts down')
+            # TODO disconnect all server clients, clean up, ...
+            for server_client in self.server_clients:
+                if server_client.is_connected():
+                    server_client.flush()
+            # the games end with the server
+            for server_client in self.server_clients:
+                server_client.game_id = None
+            self.game_sessions.clear()
+            # closing the sessions cancels their pending turn work, the executors do not wait for the running one
+            if self._session_host is not None:
+                self._session_host.close()
+            if self._turn_executor is not None:
+                self._turn_executor.shutdown(wait=False)
+            if self._turn_process_executor is not None:
+                self._turn_process_executor.shutdown(wait=False)
+            self._shut_down()
+
+        elif action == constants.M.SYSTEM_MONITOR_UPDATE:
+
+            # assemble monitor update
+            update = {
+                'number_connected_clients': len(self.server_clients)
+            }
+            client.send(constants.C.SYSTEM, constants.M.SYSTEM_MONITOR_UPDATE, update)
+
+        elif action == constants.M.GAME_SAVE_REQUEST:
+            # answered once the session saved
+            filename = content
+            if client.game_id is None:
+                logger.warning('client %s wants to save without playing a game', client.client_id)
+                return
+            self._get_session_host().execute(game_session.SAVE, client.game_id, client.client_id, filename)
+
+        elif action == constants.M.GAME_LOAD_REQUEST:
+            # a new game from a file on this machine (a saved game) with the client as first player
+            self._create_game(client, content['filename'], content['nation'])
+
+    def _lobby_messages(self, client, channel: constants.C, action: constants.M, content):
+        """
+
+        :param client:
+        :param channel:
+        :param action:
+        :param content:
+        """
+        logger.debug('_lobby_messages action: %s', action)
+
+        if action == constants.M.LOBBY_SCENARIO_CORE_LIST:
+            # get list of scenarios and send it back
+            scenarios = self._scenario_core_titles()
+            client.send(channel, action, scenarios)
+
+        elif action == constants.M.LOBBY_SCENARIO_PREVIEW:
+            # get preview and send it back
+            preview = self.scenario_preview(content)
+            client.send(channel, action, preview)
+
+        elif action == constants.M.LOBBY_CONNECTED_CLIENTS:
+            # get list of connected clients and send it back
+            connected_clients = [c.name for c in self.server_clients]
+            client.send(channel, action, connected_clients)
+
+        elif action == constants.M.LOBBY_GAME_LIST:
+            # get list of running games and their players and send it back
+            games = [{'game_id': game_id, 'scenario': game['scenario'],
+                      'players': [self._clients_by_id[client_id].name for client_id in game['clients']]}
+                     for game_id, game in self.game_sessions.items()]
+            client.send(channel, action, games)
+
+        elif action == constants.M.GAME_CREATE_REQUEST:
+            # a new game of a core scenario with the client as first player
+            scenario_file = content['scenario']
+            if scenario_file not in (file_name for _, file_name in self._scenario_core_titles()):
+                logger.warning('client %s wants to create a game of unknown scenario %s', client.client_id,
+                               scenario_file)
+                return
+            self._create_game(client, scenario_file, content['nation'])
+
+        elif action == constants.M.GAME_JOIN_REQUEST:
+            # join a running game, answered like a create request
+            game_id = content['game_id']
+            if game_id not in self.game_sessions:
+                logger.warning('client %s wants to join unknown game %s', client.client_id, game_id)
+                return
+            self._join_game(client, game_id, content['nation'])
+
+    def _general_messages(self, client, channel: constants.C, action: constants.M, content):
+        """
+
+        :param client:
+        :param channel:
+        :param action:
+        :param content:
+        """
+        logger.debug('_general_messages action: %s', action)
+        if action == constants.M.GENERAL_NAME:
+            client.name = content
+
+    def _scenario_core_titles(self):
+        """
+        A server client received a message on the constants.C.SCENARIO_CORE_TITLES channel. Return all available core
+        scenario titles and file names.
+        """
+        return self._scenario_cache.get_titles(constants.CORE_SCENARIO_FOLDER)
+
+    def scenario_preview(self, scenario_file_name):
+        """
+        A client got a message on the constants.C.SCENARIO_PREVIEW channel. In the message should be a scenario file
+        name (key = 'scenario'). Assemble a preview and send it back.
+        """
+        # TODO existing? can be loaded?
+        return self._scenario_cache.get_preview(scenario_file_name)
@@ -1,4 +1,5 @@
 from imperialism_remake.base import network as base_network
+from imperialism_remake.server import wire_encoders
 
 
 class ServerNetworkClient(base_network.NetworkClient):
@@ -6,8 +7,8 @@ class ServerNetworkClient(base_network.NetworkClient):
     Server network client.
     """
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    def __init__(self, socket):
+        super().__init__(socket, wire_encoders.create_codecs())
 
         # important properties
         self.subscribed_to_chat = False
@@ -19,22 +19,79 @@ Defines a scenario, can be loaded and saved. Should only be known to the server,
 thin client).
 """
 import copy
+import io
 import logging
 import math
+import pickle
+from array import array
 
 from imperialism_remake.base import constants
 from imperialism_remake.base.constants import NationProperty
-from imperialism_remake.lib import utils
+from imperialism_remake.server import scenario_format
+from imperialism_remake.server.models import map_layer
 from imperialism_remake.server.models.nation_asset import NationAsset
+from imperialism_remake.server.models.neighbor_table import NeighborTable, NO_NEIGHBOR
 from imperialism_remake.server.models.prospector_resource_state import ProspectorResourceState
 from imperialism_remake.server.models.raw_resource_type import RawResourceType
+from imperialism_remake.server.models.resource_visibility import ResourceVisibility, invisible_resources
+from imperialism_remake.server.models.road_network import RoadNetwork
+from imperialism_remake.server.models.scenario_change_log import ScenarioChangeLog
+from imperialism_remake.server.models.scenario_snapshot import ScenarioSnapshot
 from imperialism_remake.server.models.server_scenario_base import ServerScenarioBase
 from imperialism_remake.server.models.structure import Structure
 from imperialism_remake.server.models.technology_type import TechnologyType
+from imperialism_remake.server.models.tile_index import TileIndex
+from imperialism_remake.server.scenario_archive import ScenarioArchive
 
 logger = logging.getLogger(__name__)
 
 
+#: position of each direction in the neighbor table
+_DIRECTION_NUMBERS = {direction: number for number, direction in enumerate(constants.TileDirections)}
+
+
+class _ScenarioBasePickler(pickle.Pickler):
+    """
+    Pickles a scenario base without its resource map, see ServerScenario.freeze_scenario_base().
+    """
+
+    def __init__(self, file, resource_map):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._resource_map = resource_map
+
+    def persistent_id(self, obj):
+        return ServerScenarioBase.RESOURCE if obj is self._resource_map else None
+
+
+class _ScenarioBaseUnpickler(pickle.Unpickler):
+    """
+    Unpickles a scenario base with the resource layer of a nation as resource map.
+    """
+
+    def __init__(self, file, resource_layer):
+        super().__init__(file)
+        self._resource_layer = resource_layer
+
+    def persistent_load(self, pid):
+        return self._resource_layer
+
+
+def scenario_base_for_nation(frozen_scenario_base, nation_id, resource_layer):
+    """
+    A copy of a frozen scenario base (see ServerScenario.freeze_scenario_base()) as a nation may see it: without the
+    assets of the other nations and with a resource layer (see ServerScenario.get_resource_layer()) as resource map.
+    Does not need the scenario, so it can run in another process.
+    """
+    # the resource map is replaced by the layer of the nation instead of being copied
+    scenario_base = _ScenarioBaseUnpickler(io.BytesIO(frozen_scenario_base), resource_layer).load()
+
+    for key, nation in scenario_base.nations.items():
+        if key != nation_id:
+            if NationProperty.ASSETS in nation:
+                del nation[NationProperty.ASSETS]
+    return scenario_base
+
+
 # TODO rivers are implemented inefficiently
 
 class ServerScenario:
@@ -45,8 +102,12 @@ class ServerScenario:
     * _provinces is a dictionary with
     * _nations is a
     * _maps is a dictionary of different maps (terrain, resource)
-      each map is a linear list, the map size is a scenario property
+      each map is a linear array (see map_layer), the map size is a scenario property
     * _rules is a dictionary of rules properties
+    * _tile_index is derived from the provinces and maps each tile to its province and nation
+    * _neighbor_table is derived from the map size and knows the neighbors of each tile
+    * _road_network is derived from the road map and knows which positions are connected by roads
+    * _resource_visibility is derived from the resource map, built on first use
 
     Notes:
     * See also constants.ScenarioProperties, constants.NationProperties, constants.ProvinceProperties
@@ -57,6 +118,19 @@ class ServerScenario:
     def __init__(self, scenario_base):
         logger.debug("__init__")
         self._scenario_base = scenario_base
+        self._tile_index = TileIndex()
+        self._neighbor_table = NeighborTable()
+        self._road_network = RoadNetwork()
+        self._resource_visibility = None
+
+        self._structure_added_event_handlers = []
+        self._change_event_handlers = []
+
+        self._structures_version = 0
+        self._snapshots = []
+        self._change_log = None
+
+        self._rebuild_indices()
 
     def get_scenario_base(self):
         return self._scenario_base
@@ -64,6 +138,117 @@ class ServerScenario:
     def update_scenario_base(self, scenario_base):
         self._scenario_base = scenario_base
 
+        self._rebuild_indices()
+
+    def _rebuild_indices(self):
+        """
+            Internal function. Rebuilds all lookup structures derived from the scenario base. Must be called whenever
+            the scenario base or the map size is replaced as a whole.
+        """
+        columns = self._scenario_base.properties.get(constants.ScenarioProperty.MAP_COLUMNS, 0)
+        rows = self._scenario_base.properties.get(constants.ScenarioProperty.MAP_ROWS, 0)
+
+        for key in (ServerScenarioBase.TERRAIN, ServerScenarioBase.RESOURCE):
+            if key in self._scenario_base.maps:
+                self._scenario_base.maps[key] = map_layer.as_layer(self._scenario_base.maps[key])
+
+        if (self._neighbor_table.get_columns(), self._neighbor_table.get_rows()) != (columns, rows):
+            self._neighbor_table = NeighborTable.of_size(columns, rows)
+
+        self._tile_index = TileIndex.from_provinces(columns, rows, self._scenario_base.provinces)
+
+        self._road_network = RoadNetwork(self._scenario_base.maps.get(ServerScenarioBase.ROAD, []))
+        self._structures_version += 1
+        self._resource_visibility = None
+
+        # changes recorded so far do not apply to the new scenario base
+        if self._change_log is not None:
+            self._change_log = ScenarioChangeLog()
+
+    def add_structure_added_event_handler(self, structure_added_event_handler):
+        """
+            Registers a callable (row, column, structure) that is called whenever a structure is added.
+        """
+        self._structure_added_event_handlers.append(structure_added_event_handler)
+
+    def remove_structure_added_event_handler(self, structure_added_event_handler):
+        self._structure_added_event_handlers.remove(structure_added_event_handler)
+
+    def add_change_event_handler(self, change_event_handler):
+        """
+            Registers a callable (kind, arguments) that is called after every change of the map, the roads, the
+            structures, the provinces or the prospector resource states. Kind and arguments are those recorded in a
+            change log (see ScenarioChangeLog).
+        """
+        self._change_event_handlers.append(change_event_handler)
+
+    def remove_change_event_handler(self, change_event_handler):
+        self._change_event_handlers.remove(change_event_handler)
+
+    def _changed(self, kind, arguments, nation=None):
+        """
+            Internal function. Records a change in the change log (if started) and tells the change event handlers.
+        """
+        if self._change_log is not None:
+            self._change_log.record(kind, arguments, nation)
+        for change_event_handler in self._change_event_handlers:
+            change_event_handler(kind, arguments)
+
+    def create_snapshot(self) -> ScenarioSnapshot:
+        """
+            Returns a read only view of the current roads and structures. It is copy on write, the scenario keeps
+            working on its own data and only hands the old values of what it changes to the open snapshots.
+            The scenario base must not be replaced as a whole while snapshots are open.
+        """
+        snapshot = ScenarioSnapshot(self)
+        self._snapshots.append(snapshot)
+        return snapshot
+
+    def release_snapshot(self, snapshot):
+        self._snapshots.remove(snapshot)
+
+    def start_change_log(self) -> ScenarioChangeLog:
+        """
+            From now on records the changes to roads, structures and prospector states, so that clients can be sent
+            only what changed. Only needed on the server.
+        """
+        if self._change_log is None:
+            self._change_log = ScenarioChangeLog()
+        return self._change_log
+
+    def get_change_log(self) -> ScenarioChangeLog:
+        return self._change_log
+
+    def apply_changes(self, changes) -> None:
+        """
+            Applies changes from a ScenarioChangeLog of another scenario (e.g. the one on the server).
+        """
+        for kind, arguments in changes:
+            if kind == ScenarioChangeLog.TERRAIN:
+                self.set_terrain_at(*arguments)
+            elif kind == ScenarioChangeLog.TERRAIN_RESOURCE:
+                self.set_terrain_resource_at(*arguments)
+            elif kind == ScenarioChangeLog.ROAD:
+                self.add_road(*arguments)
+            elif kind == ScenarioChangeLog.REMOVED_ROAD:
+                self.remove_road(*arguments)
+            elif kind == ScenarioChangeLog.STRUCTURE:
+                self.add_structure(*arguments)
+            elif kind == ScenarioChangeLog.UPGRADED_STRUCTURE:
+                self.upgrade_structure(*arguments)
+            elif kind == ScenarioChangeLog.PROVINCE_TILE:
+                self.change_province_map_tile(*arguments)
+            elif kind == ScenarioChangeLog.REMOVED_PROVINCE_TILE:
+                self.remove_province_map_tile(*arguments)
+            elif kind == ScenarioChangeLog.REMOVED_PROVINCE:
+                self.remove_province(*arguments)
+            elif kind == ScenarioChangeLog.PROVINCE_NATION:
+                self.transfer_province_to_nation(*arguments)
+            elif kind == ScenarioChangeLog.PROSPECTOR_RESOURCE_STATE:
+                self.set_nation_prospector_resource_state(*arguments)
+            else:
+                raise RuntimeError('Unknown change "{}".'.format(kind))
+
     def is_technology_available(self, tech_type: TechnologyType) -> bool:
         return tech_type in self._scenario_base.available_technologies
 
@@ -79,37 +264,30 @@ class ServerScenario:
     @staticmethod
     def from_file(file_path):
         """
-        Load/deserialize all internal variables from a zipped archive
+        Load all internal variables from a scenario file (see scenario_archive.ScenarioArchive). The rules are shared
+        with all other scenarios using the same rules (see scenario_archive.read_rules()).
         """
         # TODO what if not a valid scenario file, we should raise an error then
 
         logger.debug('from_file file: %s', file_path)
 
-        server_scenario = ServerScenario(ServerScenarioBase())
-
-        reader = utils.ZipArchiveReader(file_path)
-
-        server_scenario.get_scenario_base().properties = reader.read_from_file(constants.SCENARIO_FILE_PROPERTIES)
-        server_scenario.get_scenario_base().maps = reader.read_from_file(constants.SCENARIO_FILE_MAPS)
-        server_scenario.get_scenario_base().provinces = reader.read_from_file(constants.SCENARIO_FILE_PROVINCES)
-        # TODO check all ids are smaller then len()
+        scenario_base = ServerScenarioBase()
+        with ScenarioArchive(file_path) as archive:
+            scenario_base.properties = archive.properties()
+            scenario_base.maps = archive.maps()
+            scenario_base.provinces = archive.provinces()
+            # TODO check all ids are smaller then len()
 
-        server_scenario.get_scenario_base().nations = reader.read_from_file(constants.SCENARIO_FILE_NATIONS)
-        # TODO check all ids are smaller then len()
+            scenario_base.nations = archive.nations()
+            # TODO check all ids are smaller then len()
 
-        # read rule file
-        # TODO how to specify which rules file apply
-        rule_file = constants.extend(constants.SCENARIO_RULESET_FOLDER,
-                                     server_scenario[constants.ScenarioProperty.RULES])
-        server_scenario.get_scenario_base().rules = utils.read_from_file(rule_file)
+            # TODO how to specify which rules file apply
+            scenario_base.rules = archive.rules()
 
-        if ServerScenarioBase.ROAD not in server_scenario._scenario_base.maps:
-            server_scenario._scenario_base.maps[ServerScenarioBase.ROAD] = []
+        scenario_base.maps.setdefault(ServerScenarioBase.ROAD, [])
+        scenario_base.maps.setdefault(ServerScenarioBase.STRUCTURE, {})
 
-        if ServerScenarioBase.STRUCTURE not in server_scenario._scenario_base.maps:
-            server_scenario._scenario_base.maps[ServerScenarioBase.STRUCTURE] = {}
-
-        return server_scenario
+        return ServerScenario(scenario_base)
 
     def create_empty_map(self, columns, rows):
         """
@@ -124,12 +302,14 @@ class ServerScenario:
         self._scenario_base.properties[constants.ScenarioProperty.MAP_COLUMNS] = columns
         self._scenario_base.properties[constants.ScenarioProperty.MAP_ROWS] = rows
         number_tiles = columns * rows
-        self._scenario_base.maps[ServerScenarioBase.TERRAIN] = [0] * number_tiles
-        self._scenario_base.maps[ServerScenarioBase.RESOURCE] = [0] * number_tiles
+        self._scenario_base.maps[ServerScenarioBase.TERRAIN] = map_layer.create_layer(number_tiles)
+        self._scenario_base.maps[ServerScenarioBase.RESOURCE] = map_layer.create_layer(number_tiles)
 
         self._scenario_base.maps[ServerScenarioBase.ROAD] = []
         self._scenario_base.maps[ServerScenarioBase.STRUCTURE] = {}
 
+        self._rebuild_indices()
+
     def add_river(self, name, tiles):
         """
             Adds a river with a list of tiles and a name.
@@ -147,26 +327,88 @@ class ServerScenario:
         """
             Adds road
         """
-        if (start, stop) not in self._scenario_base.maps[ServerScenarioBase.ROAD] and (stop, start) not in self._scenario_base.maps[ServerScenarioBase.ROAD]:
+        if self._road_network.add_road(start, stop):
             logger.debug('add_road section start:%s, stop:%s', start, stop)
             self._scenario_base.maps[ServerScenarioBase.ROAD].append((start, stop))
+            self._changed(ScenarioChangeLog.ROAD, (start, stop))
         else:
             logger.debug('add_road section start:%s, stop:%s already in roads. Skip.', start, stop)
 
+    def remove_road(self, start: (), stop: ()) -> bool:
+        """
+            Removes the road section between two positions (row, column) in whatever direction it was added. Returns
+            False if there is no such road section.
+        """
+        if not self._road_network.remove_road(start, stop):
+            logger.debug('remove_road section start:%s, stop:%s not in roads. Skip.', start, stop)
+            return False
+
+        logger.debug('remove_road section start:%s, stop:%s', start, stop)
+        section = {tuple(start), tuple(stop)}
+        roads = self._scenario_base.maps[ServerScenarioBase.ROAD]
+        roads[:] = [road for road in roads if {tuple(road[0]), tuple(road[1])} != section]
+        self._changed(ScenarioChangeLog.REMOVED_ROAD, (start, stop))
+        return True
+
+    def roads_at(self, row, column) -> []:
+        """
+            The road sections (position, other position) starting at a position, positions are (row, column).
+        """
+        position = (row, column)
+        return [(position, other_position) for other_position in self._road_network.neighbors(position)]
+
     def get_roads(self) -> []:
+        """
+            All road sections, read only. Use add_road and remove_road for changes, roads_at and get_road_network for
+            queries.
+        """
         return self._scenario_base.maps[ServerScenarioBase.ROAD]
 
+    def get_road_network(self) -> RoadNetwork:
+        return self._road_network
+
     def add_structure(self, row: int, col: int, structure: Structure) -> None:
         """
             Adds structure
         """
         logger.debug('add_structure r:%s, c:%s', row, col)
+        for snapshot in self._snapshots:
+            snapshot._save_structures_at(row, col, self.get_structures_at(row, col))
+
         if row not in self._scenario_base.maps[ServerScenarioBase.STRUCTURE]:
             self._scenario_base.maps[ServerScenarioBase.STRUCTURE][row] = {}
         if col not in self._scenario_base.maps[ServerScenarioBase.STRUCTURE][row]:
             self._scenario_base.maps[ServerScenarioBase.STRUCTURE][row][col] = []
 
         self._scenario_base.maps[ServerScenarioBase.STRUCTURE][row][col].append(structure)
+        self._structures_version += 1
+        self._changed(ScenarioChangeLog.STRUCTURE, (row, col, structure))
+
+        for structure_added_event_handler in self._structure_added_event_handlers:
+            structure_added_event_handler(row, col, structure)
+
+    def upgrade_structure(self, row: int, col: int, structure_id) -> bool:
+        """
+            Upgrades the structure with an id at a position by one level. Returns False if there is no such structure
+            or it cannot be upgraded.
+        """
+        structures = self.get_structures_at(row, col) or []
+        index = next((index for index, structure in enumerate(structures) if structure.get_id() == structure_id), None)
+        if index is None or not structures[index].can_upgrade():
+            logger.debug('upgrade_structure r:%s, c:%s, id:%s not possible. Skip.', row, col, structure_id)
+            return False
+
+        logger.debug('upgrade_structure r:%s, c:%s, id:%s', row, col, structure_id)
+        for snapshot in self._snapshots:
+            snapshot._save_structures_at(row, col, structures)
+
+        # snapshots keep the structure as it was
+        structure = copy.copy(structures[index])
+        structure.upgrade()
+        structures[index] = structure
+        self._structures_version += 1
+        self._changed(ScenarioChangeLog.UPGRADED_STRUCTURE, (row, col, structure_id))
+        return True
 
     def get_structures_at(self, row, col):
         if row not in self._scenario_base.maps[ServerScenarioBase.STRUCTURE]:
@@ -179,6 +421,24 @@ class ServerScenario:
     def get_structures(self) -> []:
         return self._scenario_base.maps[ServerScenarioBase.STRUCTURE]
 
+    def get_workforces_at(self, row, col) -> []:
+        """
+            The workforces of all nations at a position. Together with get_structures_at this is what is at a tile.
+            Each nation asset indexes its workforces by position, so this does not depend on the number of workforces.
+        """
+        workforces = []
+        for nation in self._scenario_base.nations.values():
+            nation_asset = nation.get(constants.NationProperty.ASSETS)
+            if nation_asset is not None:
+                workforces.extend(nation_asset.get_workforces_at(row, col))
+        return workforces
+
+    def get_structures_version(self) -> int:
+        """
+            Increased with every added structure, results derived from the structures can be checked against it.
+        """
+        return self._structures_version
+
     def get_nation_asset(self, nation) -> NationAsset:
         return self.nation_property(nation, constants.NationProperty.ASSETS)
 
@@ -196,6 +456,7 @@ class ServerScenario:
         logger.debug('set_terrain_at column:%s, row:%s, terrain:%s', column, row, terrain)
 
         self._scenario_base.maps[ServerScenarioBase.TERRAIN][self._map_index(column, row)] = terrain
+        self._changed(ScenarioChangeLog.TERRAIN, (column, row, terrain))
 
     def terrain_at(self, column, row):
         """
@@ -207,6 +468,30 @@ class ServerScenario:
         """
         return self._scenario_base.maps[ServerScenarioBase.TERRAIN][self._map_index(column, row)]
 
+    def get_terrain_layer(self) -> array:
+        """
+        The whole terrain map, index row * columns + column. Read only, use set_terrain_at for changes.
+        """
+        return self._scenario_base.maps[ServerScenarioBase.TERRAIN]
+
+    def get_terrain_resource_layer(self) -> array:
+        """
+        The whole resource map, index row * columns + column. Read only, use set_terrain_resource_at for changes.
+        """
+        return self._scenario_base.maps[ServerScenarioBase.RESOURCE]
+
+    def get_province_layer(self) -> array:
+        """
+        Province of each tile, index row * columns + column, tile_index.NO_ID for tiles without province.
+        """
+        return self._tile_index.get_province_layer()
+
+    def get_nation_layer(self) -> array:
+        """
+        Nation of each tile, index row * columns + column, tile_index.NO_ID for tiles without nation.
+        """
+        return self._tile_index.get_nation_layer()
+
     def terrain_name(self, terrain):
         """
         Get a special property from the rules.
@@ -231,6 +516,12 @@ class ServerScenario:
         """
         logger.debug('set_resource_at column:%s, row:%s, resource:%s', column, row, resource)
         self._scenario_base.maps[ServerScenarioBase.RESOURCE][self._map_index(column, row)] = resource
+        if self._resource_visibility is not None:
+            self._resource_visibility.set_resource(column, row, resource)
+        # clients only get to know the resources they can see, like in get_scenario_base_for_nation()
+        if resource in invisible_resources(self._scenario_base.rules.get('terrain_resources_settings', {})):
+            resource = 0
+        self._changed(ScenarioChangeLog.TERRAIN_RESOURCE, (column, row, resource))
 
     def terrain_resource_at(self, column, row):
         """
@@ -281,6 +572,8 @@ class ServerScenario:
             nation[constants.NationProperty.PROSPECTOR_RESOURCE_STATE][row] = {}
 
         nation[constants.NationProperty.PROSPECTOR_RESOURCE_STATE][row][column] = {terrain_resource: state}
+        self._changed(ScenarioChangeLog.PROSPECTOR_RESOURCE_STATE, (nation_key, row, column, terrain_resource, state),
+                      nation_key)
 
     def get_nation_prospector_resource_state(self, nation_key, row, column):
         nation = self._scenario_base.nations[nation_key]
@@ -331,78 +624,39 @@ class ServerScenario:
         index = row * self._scenario_base.properties[constants.ScenarioProperty.MAP_COLUMNS] + column
         return index
 
+    def get_neighbor_table(self) -> NeighborTable:
+        return self._neighbor_table
+
     def neighbor_position(self, column, row, direction):
         """
             Given a position (column, row) and a direction (see constants.TileDirections) return the position of the
             next neighbour tile in that direction given our staggered tile layout where the second and all other odd
-            rows are shifted half a tile to the right (positive). Returns None if we would be outside of the map area.
+            rows are shifted half a tile to the right (positive). Returns None if we would be outside of the map area,
+            except for the diagonal directions beyond the west and east edges, which give the position off the map
+            (column -1 or column == columns).
         """
-        if direction is constants.TileDirections.WEST:
-            # west
-            if column > 0:
-                return [column - 1, row]
-            else:
-                return None
-        elif direction is constants.TileDirections.NORTH_WEST:
-            # north-west
-            if row > 0:
-                if row % 2 == 0:
-                    # even rows (0, 2, 4, ..)
-                    return [column - 1, row - 1]
-                else:
-                    # odd rows (1, 3, 5, ..)
-                    return [column, row - 1]
-            else:
-                return None
-        elif direction is constants.TileDirections.NORTH_EAST:
-            # north-east
-            if row > 0:
-                if row % 2 == 0:
-                    # even rows (0, 2, 4, ..)
-                    return [column, row - 1]
-                else:
-                    # odd rows (1, 3, 5, ..)
-                    return [column + 1, row - 1]
-            else:
-                return None
-        elif direction is constants.TileDirections.EAST:
-            # east
-            if column < self._scenario_base.properties[constants.ScenarioProperty.MAP_COLUMNS] - 1:
-                return [column + 1, row]
-            else:
-                return None
-        elif direction is constants.TileDirections.SOUTH_EAST:
-            # south-east
-            if row < self._scenario_base.properties[constants.ScenarioProperty.MAP_ROWS] - 1:
-                if row % 2 == 0:
-                    # even rows (0, 2, 4, ..)
-                    return [column, row + 1]
-                else:
-                    # odd rows (1, 3, 5, ..)
-                    return [column + 1, row + 1]
-            else:
-                return None
-        elif direction is constants.TileDirections.SOUTH_WEST:
-            # south-west
-            if row < self._scenario_base.properties[constants.ScenarioProperty.MAP_ROWS] - 1:
-                if row % 2 == 0:
-                    # even rows (0, 2, 4, ..)
-                    return [column - 1, row + 1]
-                else:
-                    # odd rows (1, 3, 5, ..)
-                    return [column, row + 1]
-            else:
-                return None
+        index = self._neighbor_table.index(column, row)
+        if index is None:
+            return None
+        return self._neighbor_position(index, column, row, _DIRECTION_NUMBERS[direction])
 
     def neighbored_tiles(self, column, row):
         """
-            For all directions, get all neighbored tiles. Just executes neighbor_position() for all possible
-            TileDirections
+            For all directions, get all neighbored tiles (see neighbor_position()) in the order of TileDirections.
+            Prefer get_neighbor_table().neighbors() where no list of positions is needed and the positions off the
+            map do not matter.
         """
-        tiles = []
-        for direction in constants.TileDirections:
-            tiles.append(self.neighbor_position(column, row, direction))
-        return tiles
+        index = self._neighbor_table.index(column, row)
+        if index is None:
+            return [None] * len(_DIRECTION_NUMBERS)
+        return [self._neighbor_position(index, column, row, direction) for direction in range(len(_DIRECTION_NUMBERS))]
+
+    def _neighbor_position(self, index, column, row, direction):
+        neighbor = self._neighbor_table.neighbor(index, direction)
+        if neighbor == NO_NEIGHBOR:
+            position = self._neighbor_table.position_beyond_edge(column, row, direction)
+            return None if position is None else list(position)
+        return list(self._neighbor_table.position(neighbor))
 
     def __setitem__(self, key, value):
         """
@@ -457,8 +711,13 @@ class ServerScenario:
         nation = self._scenario_base.provinces[province][constants.ProvinceProperty.NATION]
         self._scenario_base.nations[nation][constants.NationProperty.PROVINCES].remove(province)
 
+        # the province loses all its tiles first, so the listeners and clients know which tiles changed
+        for position in list(self._scenario_base.provinces[province][constants.ProvinceProperty.TILES]):
+            self.remove_province_map_tile(province, position)
+
         # delete province
         del self._scenario_base.provinces[province]
+        self._changed(ScenarioChangeLog.REMOVED_PROVINCE, (province,))
 
     def set_province_property(self, province, key, value):
         """
@@ -470,6 +729,17 @@ class ServerScenario:
             raise RuntimeError('Unknown province {}.'.format(province))
         if key not in constants.ProvinceProperty.__members__.values():
             raise RuntimeError('Not a valid ProvinceProperty: {}.'.format(key))
+
+        if key == constants.ProvinceProperty.TILES:
+            for column, row in self._scenario_base.provinces[province].get(key, []):
+                self._tile_index.clear_tile(column, row)
+            nation = self._scenario_base.provinces[province].get(constants.ProvinceProperty.NATION)
+            for column, row in value:
+                self._tile_index.set_tile(column, row, province, nation)
+        elif key == constants.ProvinceProperty.NATION:
+            self._tile_index.set_nation_of_tiles(
+                self._scenario_base.provinces[province].get(constants.ProvinceProperty.TILES, []), value)
+
         self._scenario_base.provinces[province][key] = value
 
     def province_property(self, province, key):
@@ -495,10 +765,13 @@ class ServerScenario:
         logger.debug('add_province_map_tile province:%s, position:%s', province, position)
 
         if province in self._scenario_base.provinces:
-            #todo remove from proper province
             self.remove_province_map_tile(self.province_at(position[0], position[1]), position)
             self._scenario_base.provinces[province][constants.ProvinceProperty.TILES].append(position)
 
+            nation = self._scenario_base.provinces[province].get(constants.ProvinceProperty.NATION)
+            self._tile_index.set_tile(position[0], position[1], province, nation)
+            self._changed(ScenarioChangeLog.PROVINCE_TILE, (province, position))
+
     def remove_province_map_tile(self, province, position):
         """
         Adds a position to a province.
@@ -512,6 +785,10 @@ class ServerScenario:
         if province in self._scenario_base.provinces and position in self._scenario_base.provinces[province][constants.ProvinceProperty.TILES]:
             self._scenario_base.provinces[province][constants.ProvinceProperty.TILES].remove(position)
 
+            if self._tile_index.province_at(position[0], position[1]) == province:
+                self._tile_index.clear_tile(position[0], position[1])
+            self._changed(ScenarioChangeLog.REMOVED_PROVINCE_TILE, (province, position))
+
     def provinces(self):
         """
         Return a list of ids for all provinces. A province is just an id for us.
@@ -540,12 +817,7 @@ class ServerScenario:
         """
         # logger.debug('province_at column:%s, row:%s', column, row)
 
-        #  TODO speed up by having a reference in the map. (see also programmers.SE question)
-        position = [column, row]
-        for province in self._scenario_base.provinces:
-            if position in self._scenario_base.provinces[province][constants.ProvinceProperty.TILES]:
-                return province
-        return None
+        return self._tile_index.province_at(column, row)
 
     def transfer_province_to_nation(self, province, nation):
         """
@@ -558,13 +830,19 @@ class ServerScenario:
         self._scenario_base.nations[nation][constants.NationProperty.PROVINCES].append(province)
         self._scenario_base.provinces[province][constants.ProvinceProperty.NATION] = nation
 
+        self._tile_index.set_nation_of_tiles(
+            self._scenario_base.provinces[province][constants.ProvinceProperty.TILES], nation)
+        self._changed(ScenarioChangeLog.PROVINCE_NATION, (province, nation))
+
     def nation_at(self, row, col):
-        for nation in self.nations():
-            provinces = self.provinces_of_nation(nation)
-            for province in provinces:
-                if [col, row] in self.province_property(province, constants.ProvinceProperty.TILES):
-                    return nation
-        return None
+        """
+        Given a position (row, column) returns the nation.
+
+        :param row: Map row
+        :param col: Map column
+        :return: Nation
+        """
+        return self._tile_index.nation_at(col, row)
 
     def nations(self):
         """
@@ -656,17 +934,12 @@ class ServerScenario:
 
     def save(self, file_name):
         """
-            Saves/serializes all internal variables into a zipped archive.
+            Saves all internal variables in the scenario file format (see scenario_format).
         """
         logger.debug('save file_name:%s', file_name)
 
-        writer = utils.ZipArchiveWriter(file_name)
-        writer.write_to_file(constants.SCENARIO_FILE_PROPERTIES, self._scenario_base.properties)
-        writer.write_to_file(constants.SCENARIO_FILE_MAPS, self._scenario_base.maps)
-        writer.write_to_file(constants.SCENARIO_FILE_PROVINCES, self._scenario_base.provinces)
-        writer.write_to_file(constants.SCENARIO_FILE_NATIONS, self._scenario_base.nations)
-
         # rules are never updated by this mechanism
+        scenario_format.write(file_name, self._scenario_base)
 
     def get_terrain_settings(self):
         return self._scenario_base.rules['terrain_settings']
@@ -686,18 +959,40 @@ class ServerScenario:
     def get_structure_settings(self):
         return self._scenario_base.rules['structure_settings']
 
-    def get_scenario_base_for_nation(self, nation_id):
-        scenario_base_for_nation = copy.deepcopy(self.get_scenario_base())
-        for key, nation in scenario_base_for_nation.nations.items():
-            if key != nation_id:
-                if NationProperty.ASSETS in nation:
-                    del nation[NationProperty.ASSETS]
-
-        # Make prospector resources invisible on map for a client
-        for i, terrain_resource_on_map in enumerate(scenario_base_for_nation.maps[ServerScenarioBase.RESOURCE]):
-            if terrain_resource_on_map != 0:
-                terrain_resource_description = self.get_terrain_resources_settings()[terrain_resource_on_map]
-                if terrain_resource_description is not None and 'invisible' in terrain_resource_description:
-                    if terrain_resource_description['invisible']:
-                        scenario_base_for_nation.maps[ServerScenarioBase.RESOURCE][i] = 0
-        return scenario_base_for_nation
+    def _get_resource_visibility(self) -> ResourceVisibility:
+        if self._resource_visibility is None:
+            self._resource_visibility = ResourceVisibility(self._scenario_base.maps[ServerScenarioBase.RESOURCE],
+                                                           self.get_terrain_resources_settings(),
+                                                           self[constants.ScenarioProperty.MAP_COLUMNS])
+        return self._resource_visibility
+
+    def freeze_scenario_base(self) -> bytes:
+        """
+        The scenario base pickled once for creating the copies of several nations, see get_scenario_base_for_nation().
+        Unpickling it is several times faster than a deep copy. Only valid until the scenario changes.
+        """
+        file = io.BytesIO()
+        _ScenarioBasePickler(file, self._scenario_base.maps[ServerScenarioBase.RESOURCE]).dump(self._scenario_base)
+        return file.getvalue()
+
+    def get_resource_layer(self) -> array:
+        """
+        The resource map as the nations see it (without the invisible resources), a new map layer. The resource
+        visibility is built on first use, so call this on the event loop and not from other threads.
+        """
+        return self._get_resource_visibility().get_resource_layer()
+
+    def get_scenario_base_for_nation(self, nation_id, frozen_scenario_base=None, resource_layer=None):
+        """
+        A copy of the scenario base as a nation may see it: without the assets of the other nations and without the
+        invisible resources. Only reads the scenario if the frozen scenario base and the resource layer are
+        given, then it can be called from other threads.
+
+        :param frozen_scenario_base: The result of freeze_scenario_base() if copies for several nations are needed.
+        :param resource_layer: The result of get_resource_layer(), not shared with other copies.
+        """
+        if frozen_scenario_base is None:
+            frozen_scenario_base = self.freeze_scenario_base()
+        if resource_layer is None:
+            resource_layer = self.get_resource_layer()
+        return scenario_base_for_nation(frozen_scenario_base, nation_id, resource_layer)
@@ -0,0 +1,193 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+Runs game sessions in a pool of worker processes, so that the turns of many games are processed at the same time and
+a long turn of one game does not delay the others or the server.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import logging.config
+import multiprocessing
+
+from imperialism_remake.server import server_config_log
+from imperialism_remake.server.game_session import SessionHost, CREATE, CLOSE, FAILED
+
+logger = logging.getLogger(__name__)
+
+
+def _run_worker(connection, log_level, turn_workers):
+    """
+    Main of a worker process: executes the commands received on the connection with a session host and sends the
+    events back, until it receives None.
+    """
+    logging.config.dictConfig(server_config_log.LOG_CONFIG)
+    logging.getLogger().setLevel(log_level)
+    asyncio.run(_serve(connection, turn_workers))
+    connection.close()
+
+
+async def _serve(connection, turn_workers):
+    # an event loop, so that turns are processed in the background like in the server process
+    loop = asyncio.get_running_loop()
+    stopped = loop.create_future()
+
+    with concurrent.futures.ThreadPoolExecutor(turn_workers) as executor:
+        host = SessionHost(lambda *event: connection.send(event), executor, loop.call_soon_threadsafe)
+
+        def receive():
+            try:
+                while connection.poll():
+                    command = connection.recv()
+                    if command is None:
+                        break
+                    host.execute(*command)
+                else:
+                    return
+            except EOFError:
+                logger.error('session worker lost the server')
+            loop.remove_reader(connection.fileno())
+            stopped.set_result(None)
+
+        loop.add_reader(connection.fileno(), receive)
+        await stopped
+        host.close()
+
+
+class SessionProcessPool:
+    """
+    A session host (see game_session.SessionHost) which runs each session in one of a fixed number of worker
+    processes, a new session goes to the worker with the fewest sessions. The commands of a session are executed in
+    the order they are given.
+
+    The events arrive on connections to the workers, the server watches them with its event loop (watch is called with
+    the file descriptor and a callable to call when it is readable, unwatch with the file descriptor once the worker
+    ended).
+
+    If a worker process ends, its sessions are lost and each is answered by FAILED without a client. New sessions go
+    to the remaining workers, commands for the lost sessions are ignored.
+    """
+
+    def __init__(self, workers, event_handler, watch, unwatch, turn_workers=None):
+        """
+        :param workers: Number of worker processes.
+        :param event_handler: Called with (event, game_id, client_id, content) for every event of the sessions.
+        :param watch: Called with a file descriptor and a callable to call whenever it is readable.
+        :param unwatch: Called with a file descriptor which should not be watched anymore.
+        :param turn_workers: Number of threads processing the turns in each worker, None for the default of
+            concurrent.futures.ThreadPoolExecutor.
+        """
+        if workers < 1:
+            raise RuntimeError('A session process pool needs at least one worker.')
+        self._event_handler = event_handler
+        self._unwatch = unwatch
+
+        # spawn, the server process may have threads and an event loop which should not be forked
+        context = multiprocessing.get_context('spawn')
+        self._connections = []
+        self._processes = []
+        for worker in range(workers):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=_run_worker,
+                                      args=(worker_connection, logging.getLogger().level, turn_workers), daemon=True)
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+            watch(connection.fileno(), lambda worker=worker: self._receive(worker))
+
+        # index of the worker of each session and number of sessions of each worker
+        self._workers = {}
+        self._sessions_per_worker = [0] * workers
+
+    def execute(self, command, game_id, client_id=None, content=None) -> None:
+        """
+        Executes a command (see game_session.SessionHost.execute) in the worker of the session.
+        """
+        if command == CREATE:
+            workers = [worker for worker, connection in enumerate(self._connections) if not connection.closed]
+            if not workers:
+                self._event_handler(FAILED, game_id, client_id, 'No session worker process left.')
+                return
+            worker = min(workers, key=self._sessions_per_worker.__getitem__)
+            self._workers[game_id] = worker
+            self._sessions_per_worker[worker] += 1
+        elif game_id in self._workers:
+            worker = self._workers[game_id]
+        else:
+            logger.debug('execute %s for lost game %s', command, game_id)
+            return
+        if command == CLOSE:
+            del self._workers[game_id]
+            self._sessions_per_worker[worker] -= 1
+
+        try:
+            self._connections[worker].send((command, game_id, client_id, content))
+        except OSError:
+            logger.error('session worker process %d cannot be reached', worker)
+            self._worker_ended(worker)
+
+    def get_worker(self, game_id) -> int:
+        """
+        The index of the worker process running a session.
+        """
+        return self._workers[game_id]
+
+    def close(self) -> None:
+        """
+        Stops the worker processes, their sessions are lost.
+        """
+        for connection in self._connections:
+            if not connection.closed:
+                try:
+                    connection.send(None)
+                except OSError:
+                    # the worker already ended
+                    pass
+        for process in self._processes:
+            process.join(5)
+        for connection in self._connections:
+            if not connection.closed:
+                self._unwatch(connection.fileno())
+                connection.close()
+
+    def _receive(self, worker):
+        # all events that arrived so far
+        connection = self._connections[worker]
+        try:
+            while connection.poll():
+                self._event_handler(*connection.recv())
+        except (EOFError, OSError):
+            logger.error('session worker process %d ended', worker)
+            self._worker_ended(worker)
+
+    def _worker_ended(self, worker):
+        """
+        A worker process ended, its sessions are lost.
+        """
+        connection = self._connections[worker]
+        if connection.closed:
+            return
+        self._unwatch(connection.fileno())
+        connection.close()
+
+        lost = [game_id for game_id, game_worker in self._workers.items() if game_worker == worker]
+        for game_id in lost:
+            del self._workers[game_id]
+        self._sessions_per_worker[worker] = 0
+        for game_id in lost:
+            self._event_handler(FAILED, game_id, None, 'The session worker process ended.')
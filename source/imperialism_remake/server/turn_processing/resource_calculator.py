@@ -13,133 +13,129 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
+import logging
+import threading
+
 from imperialism_remake.server.models.structure_type import StructureType
 from imperialism_remake.server.models.terrain_resource_type import TerrainResourceType
 
+logger = logging.getLogger(__name__)
+
 
 class ResourceCalculator:
-    def __init__(self, server_scenario, nation_id, old_roads, old_structures):
+    """
+    Calculates the raw resources each nation produces per turn.
+
+    Lives as long as the scenario. A warehouse is reachable for a nation if it is in the same road network component
+    as the capital, the tiles collected by a warehouse are cached and the production of a nation is only calculated
+    again if roads or structures changed since the last calculation. The calculation can run on a snapshot of the
+    scenario, see ServerScenario.create_snapshot(). Several nations can be calculated at the same time in threads, the
+    warehouses are only changed by the event loop and the calculated production is guarded by a lock.
+
+    The capital collects from its neighbors, a reachable warehouse from its own tile and its neighbors. A tile with a
+    structure other than a warehouse produces the level of its first structure, once. Collectable terrain produces 1
+    for every time it is collected: once by the capital and per reachable warehouse once for each structure on the
+    warehouse tile and each direction (starting, ending) road sections touch the warehouse tile in.
+    """
+
+    def __init__(self, server_scenario):
         self._server_scenario = server_scenario
-        self._nation_id = nation_id
-        self._old_roads = old_roads
-        self._old_structures = old_structures
-        self._capital_col, self._capital_row = self._server_scenario.get_capital_position(self._nation_id)
 
+        # warehouse position (row, column) -> the positions it collects from, replaced as a whole on changes
+        self._warehouses = {}
+
+        # nation id -> (state the production was calculated for, produced raw resources)
         self._produced_raw_resources = {}
+        self._lock = threading.Lock()
 
         self._collectable_raw_resources = [TerrainResourceType.BUFFALO.value, TerrainResourceType.HORSE.value,
                                            TerrainResourceType.SHEEP.value, TerrainResourceType.SCRUBFOREST.value,
                                            TerrainResourceType.GRAIN.value, TerrainResourceType.ORCHARD.value,
                                            TerrainResourceType.FOREST.value, TerrainResourceType.COTTON.value]
 
-    def calculate(self):
-        self._calculate_produced_raw_resources()
-
-    def _calculate_produced_raw_resources(self):
-        forward_road_hash_map = {}
-        backward_road_hash_map = {}
-        for start, stop in self._old_roads:
-            if start not in forward_road_hash_map:
-                forward_road_hash_map[start] = [stop]
-            else:
-                forward_road_hash_map[start].append(stop)
-
-            if stop not in backward_road_hash_map:
-                backward_road_hash_map[stop] = [start]
-            else:
-                backward_road_hash_map[stop].append(start)
-
-        def __get_wh_structure(structures, position):
-            if position[0] in structures and position[1] in structures[position[0]]:
-                for structure in structures[position[0]][position[1]]:
-                    if structure.get_type() == StructureType.WAREHOUSE:
-                        return structures[position[0]][position[1]]
-            else:
-                return None
-
-        def __get_not_wh_structure(structures, position):
-            if position[0] in structures and position[1] in structures[position[0]]:
-                for structure in structures[position[0]][position[1]]:
-                    if structure.get_type() != StructureType.WAREHOUSE:
-                        return structures[position[0]][position[1]]
-            else:
-                return None
-
-        def __add_neighbor_not_wh_structures(capital_reachable_structures, row, col):
-            for neighbour_tile_col, neighbour_tile_row in self._server_scenario.neighbored_tiles(col, row):
-                __add_not_wh_structure(capital_reachable_structures, neighbour_tile_row, neighbour_tile_col)
-
-        def __add_not_wh_structure(capital_reachable_structures, row, col):
-            not_wh = __get_not_wh_structure(self._old_structures, (row, col))
-            if not_wh is not None and not_wh[0] not in capital_reachable_structures:
-                capital_reachable_structures.add(not_wh[0])
-
-        capital_reachable_warehouses = []
-        queue = [(self._capital_row, self._capital_col)]
-        visited = set()
-        visited.add((self._capital_row, self._capital_col))
-        while len(queue) > 0:
-            road_part = queue.pop()
-            if road_part in forward_road_hash_map:
-                structure = __get_wh_structure(self._old_structures, road_part)
-                if structure is not None:
-                    capital_reachable_warehouses.append(structure)
-                for road_other_part in forward_road_hash_map[road_part]:
-                    if road_other_part not in visited:
-                        queue.insert(0, road_other_part)
-                        visited.add(road_other_part)
-            if road_part in backward_road_hash_map:
-                structure = __get_wh_structure(self._old_structures, road_part)
-                if structure is not None:
-                    capital_reachable_warehouses.append(structure)
-                for road_other_part in backward_road_hash_map[road_part]:
-                    if road_other_part not in visited:
-                        queue.insert(0, road_other_part)
-                        visited.add(road_other_part)
-
-        # Collect reources using structures
-        capital_reachable_structures = set()
-        for wh in capital_reachable_warehouses:
-            for wh_part in wh:
-                row, col = wh_part.get_position()
-                __add_not_wh_structure(capital_reachable_structures, row, col)
-                __add_neighbor_not_wh_structures(capital_reachable_structures, row, col)
-
-        __add_neighbor_not_wh_structures(capital_reachable_structures,
-                                         self._capital_row, self._capital_col)
-
-        for structure in capital_reachable_structures:
-            raw_resource_type = structure.get_raw_resource_type()
-            if raw_resource_type not in self._produced_raw_resources:
-                self._produced_raw_resources[raw_resource_type] = 0
-            self._produced_raw_resources[raw_resource_type] += structure.get_level()
-
-        # Collect resources with no structures
-        reachable_terrain_resources = []
-        for wh in capital_reachable_warehouses:
-            for wh_part in wh:
-                row, col = wh_part.get_position()
-                terrain_resource = self._server_scenario.terrain_resource_at(col, row)
-                if terrain_resource in self._collectable_raw_resources:
-                    reachable_terrain_resources.append((row, col))
-                for neighbour_tile_col, neighbour_tile_row in self._server_scenario.neighbored_tiles(col, row):
-                    terrain_resource = self._server_scenario.terrain_resource_at(neighbour_tile_col, neighbour_tile_row)
-                    if terrain_resource in self._collectable_raw_resources:
-                        reachable_terrain_resources.append((neighbour_tile_row, neighbour_tile_col))
-
-        for neighbour_tile_col, neighbour_tile_row in self._server_scenario.neighbored_tiles(self._capital_col,
-                                                                                             self._capital_row):
-            terrain_resource = self._server_scenario.terrain_resource_at(neighbour_tile_col, neighbour_tile_row)
-            if terrain_resource in self._collectable_raw_resources:
-                reachable_terrain_resources.append((neighbour_tile_row, neighbour_tile_col))
-
-        for position in reachable_terrain_resources:
-            raw_resource_type = self._server_scenario.get_raw_resource_type(position[0], position[1])
-            if raw_resource_type is not None:
-                if raw_resource_type not in self._produced_raw_resources:
-                    self._produced_raw_resources[raw_resource_type] = 0
-                self._produced_raw_resources[raw_resource_type] += 1
-
-    def update_raw_resources(self, raw_resources):
-        for name, raw_resource in self._produced_raw_resources.items():
-            raw_resources[name] += raw_resource
+        for row, structures_in_row in self._server_scenario.get_structures().items():
+            for column, structures in structures_in_row.items():
+                for structure in structures:
+                    self._structure_added(row, column, structure)
+
+        self._server_scenario.add_structure_added_event_handler(self._structure_added)
+
+    def detach(self):
+        """
+        Stops listening to the scenario, call before dropping the calculator while the scenario lives on.
+        """
+        self._server_scenario.remove_structure_added_event_handler(self._structure_added)
+
+    def _structure_added(self, row, column, structure):
+        if structure.get_type() == StructureType.WAREHOUSE and (row, column) not in self._warehouses:
+            collected_positions = tuple([(row, column)] + self._neighbored_positions(row, column))
+            self._warehouses = {**self._warehouses, (row, column): collected_positions}
+
+    def calculate(self, nation_id, scenario_view=None, capital_position=None) -> {}:
+        """
+        Returns the raw resources (type -> amount) produced by a nation for the roads and structures of the scenario
+        view, by default the current ones of the scenario.
+
+        :param capital_position: The capital position (column, row) of the nation, by default the current one.
+        """
+        if scenario_view is None:
+            scenario_view = self._server_scenario
+        if capital_position is None:
+            capital_position = self._server_scenario.get_capital_position(nation_id)
+        capital_column, capital_row = capital_position
+        road_network = scenario_view.get_road_network()
+
+        state = (road_network.get_version(), scenario_view.get_structures_version(), capital_row, capital_column)
+        with self._lock:
+            if nation_id in self._produced_raw_resources and self._produced_raw_resources[nation_id][0] == state:
+                return dict(self._produced_raw_resources[nation_id][1])
+
+        logger.debug('calculate nation_id:%s', nation_id)
+
+        capital_neighbors = self._neighbored_positions(capital_row, capital_column)
+        structure_positions = set(capital_neighbors)
+        terrain_positions = list(capital_neighbors)
+        capital_component = road_network.component_of((capital_row, capital_column))
+        if capital_component is not None:
+            for warehouse, collected_positions in self._warehouses.items():
+                if road_network.component_of(warehouse) == capital_component and \
+                        self._is_warehouse_at(scenario_view, warehouse):
+                    structure_positions.update(collected_positions)
+                    times = len(scenario_view.get_structures_at(*warehouse)) * road_network.directions_at(warehouse)
+                    terrain_positions.extend(collected_positions * times)
+
+        produced_raw_resources = {}
+        for row, column in structure_positions:
+            structures = scenario_view.get_structures_at(row, column)
+            if structures is not None and any(s.get_type() != StructureType.WAREHOUSE for s in structures):
+                self._add_produced(produced_raw_resources, structures[0].get_raw_resource_type(),
+                                   structures[0].get_level())
+
+        for row, column in terrain_positions:
+            if self._server_scenario.terrain_resource_at(column, row) in self._collectable_raw_resources:
+                self._add_produced(produced_raw_resources, self._server_scenario.get_raw_resource_type(row, column), 1)
+
+        with self._lock:
+            self._produced_raw_resources[nation_id] = (state, produced_raw_resources)
+        return dict(produced_raw_resources)
+
+    @staticmethod
+    def _is_warehouse_at(scenario_view, position) -> bool:
+        # a warehouse built after a snapshot was taken is not part of it
+        structures = scenario_view.get_structures_at(*position)
+        return structures is not None and any(s.get_type() == StructureType.WAREHOUSE for s in structures)
+
+    def _neighbored_positions(self, row, column) -> []:
+        # the diagonal neighbors beyond the west and east edges collect the terrain at their map index (of a tile in
+        # another row) like they always did, a neighbor whose index is beyond the end of the map collects nothing
+        neighbor_table = self._server_scenario.get_neighbor_table()
+        columns = neighbor_table.get_columns()
+        size = columns * neighbor_table.get_rows()
+        return [(tile[1], tile[0]) for tile in self._server_scenario.neighbored_tiles(column, row)
+                if tile is not None and 0 <= tile[1] * columns + tile[0] < size]
+
+    @staticmethod
+    def _add_produced(produced_raw_resources, raw_resource_type, amount):
+        if raw_resource_type is None:
+            return
+        produced_raw_resources[raw_resource_type] = produced_raw_resources.get(raw_resource_type, 0) + amount
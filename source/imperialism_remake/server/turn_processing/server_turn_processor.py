@@ -13,10 +13,12 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
-import copy
 import logging
+import threading
 import uuid
 
+from imperialism_remake.lib import wire_codec
+from imperialism_remake.server import wire_encoders
 from imperialism_remake.server.models.materials import Materials
 from imperialism_remake.server.models.prospector_resource_state import ProspectorResourceState
 from imperialism_remake.server.models.raw_resource_type import RawResourceType
@@ -26,30 +28,98 @@ from imperialism_remake.server.models.turn_result import TurnResult
 from imperialism_remake.server.models.workforce import Workforce
 from imperialism_remake.server.models.workforce_action import WorkforceAction
 from imperialism_remake.server.models.workforce_type import WorkforceType
+from imperialism_remake.server.server_scenario import scenario_base_for_nation
 from imperialism_remake.server.turn_processing.resource_calculator import ResourceCalculator
 from imperialism_remake.server.workforce.workforce_price import WorkforcePrice
 
 logger = logging.getLogger(__name__)
 
+#: encodes the scenario bases of the turn results like the codecs of the connections, per process
+_scenario_base_codec = None
+
+
+def create_full_turn_result(version, frozen_scenario_base, nation_id, resource_layer) -> TurnResult:
+    """
+    The turn result with the whole scenario as a nation sees it (see scenario_base_for_nation()), its scenario base
+    already encoded for sending. Only needs picklable arguments, so it can run in another process.
+    """
+    global _scenario_base_codec
+    if _scenario_base_codec is None:
+        _scenario_base_codec = wire_codec.CompactCodec()
+        wire_encoders.register_encoders(_scenario_base_codec)
+
+    logger.debug('create_full_turn_result nation_id:%s', nation_id)
+    scenario_base = scenario_base_for_nation(frozen_scenario_base, nation_id, resource_layer)
+    return TurnResult(version, wire_codec.Encoded(_scenario_base_codec.encode(scenario_base)))
+
 
 class ServerTurnProcessor:
+    """
+    Processes a turn once all clients planned it.
+
+    Without an executor, the turn is processed right away. With an executor (see set_executor()), the parts that only
+    read the scenario (production of each nation on a snapshot from before the turn, the turn result of each nation
+    that gets the whole scenario) run in the executor, one task per nation, and only the changes to the scenario are
+    applied on the event loop, so that the server keeps answering other messages while a turn is processed. The
+    executor decides how many nations are processed at the same time, the results are always merged in the order of
+    the clients, so a turn has the same outcome either way.
+
+    The turn results with the whole scenario only need the frozen scenario base and the resource layer
+    (see create_full_turn_result()), they can be created in a process pool, in parallel on several cores.
+    """
+
     def __init__(self):
         self._clients = []
         self._clients_turn_planned = {}
         self._turn_processing_finished_event_handler = None
         self._server_scenario = None
+        self._resource_calculator = None
+        self._executor = None
+        self._process_executor = None
+        self._call_soon_threadsafe = None
+        self._processing = False
+        # of the step of the turn running in the executor
+        self._futures = []
 
     def set_scenario(self, server_scenario):
+        if self._resource_calculator is not None:
+            self._resource_calculator.detach()
+
         self._server_scenario = server_scenario
+        self._server_scenario.start_change_log()
+        self._resource_calculator = ResourceCalculator(server_scenario)
 
     def get_scenario(self):
         return self._server_scenario
 
+    def set_executor(self, executor, call_soon_threadsafe, process_executor=None):
+        """
+        :param executor: A concurrent.futures.Executor for the per nation parts of a turn, None processes turns right
+            away.
+        :param call_soon_threadsafe: Called from any thread with a callable to call on the event loop.
+        :param process_executor: A concurrent.futures.ProcessPoolExecutor for the turn results with the whole scenario,
+            None creates them in the executor.
+        """
+        self._executor = executor
+        self._process_executor = process_executor
+        self._call_soon_threadsafe = call_soon_threadsafe
+
+    def is_processing(self) -> bool:
+        return self._processing
+
+    def cancel(self) -> None:
+        """
+        Cancels the parts of a turn that still wait in the executor, the turn is not finished anymore. For sessions
+        that end, the executor may then shut down without waiting for them.
+        """
+        for future in self._futures:
+            future.cancel()
+
     def client_turn_ended(self, client, turn_planned):
         logger.debug('client_turn_ended: %s', client)
         self._clients_turn_planned[client.client_id] = turn_planned
 
-        if len(self._clients_turn_planned) == len(self._clients):
+        if self._all_turns_planned():
             self._process_turn()
 
     def set_turn_processing_finished_event_handler(self, turn_processing_finished_event_handler):
@@ -59,31 +129,128 @@ class ServerTurnProcessor:
         logger.debug('add_client: %s', client)
         self._clients.append(client)
 
-    def _process_turn(self):
-        logger.debug('_process_turn for %s clients', len(self._clients))
+    def remove_client(self, client):
+        logger.debug('remove_client: %s', client)
+        self._clients.remove(client)
+        self._clients_turn_planned.pop(client.client_id, None)
 
-        old_roads = copy.deepcopy(self._server_scenario.get_roads())
-        old_structures = copy.deepcopy(self._server_scenario.get_structures())
-
-        self._process_common_turn_result()
-        for client in self._clients:
-            nation_id = self._clients_turn_planned[client.client_id].get_nation()
+        # the turn may only have waited for this client
+        if self._all_turns_planned():
+            self._process_turn()
 
-            self._calculate_nation_asset(nation_id, old_roads, old_structures)
+    def _all_turns_planned(self) -> bool:
+        # turns planned while a turn is processed wait for it
+        return bool(self._clients) and not self._processing and len(self._clients_turn_planned) == len(self._clients)
 
-            self._process_personal_turn_result(client)
+    def _process_turn(self):
+        logger.debug('_process_turn for %s clients', len(self._clients))
+        self._processing = True
 
-            scenario_base_for_nation = self._server_scenario.get_scenario_base_for_nation(nation_id)
-            self._turn_processing_finished_event_handler(client, TurnResult(scenario_base_for_nation))
+        # the clients and turns of this turn, the next turn waits for all clients again
+        clients = list(self._clients)
+        turns_planned = [self._clients_turn_planned[client.client_id] for client in clients]
+        self._clients_turn_planned = {}
+        nations = [turn_planned.get_nation() for turn_planned in turns_planned]
+
+        # production depends on the roads and structures from before this turn, the snapshot keeps them without
+        # copying, the capitals are looked up here because nation_property() completes the properties of a nation on
+        # first use
+        snapshot = self._server_scenario.create_snapshot()
+        self._map(lambda nation_id, capital_position: self._resource_calculator.calculate(nation_id, snapshot,
+                                                                                          capital_position),
+                  [(nation_id, self._server_scenario.get_capital_position(nation_id)) for nation_id in nations],
+                  lambda produced: self._apply_turn(clients, turns_planned, produced, snapshot), self._executor)
+
+    def _apply_turn(self, clients, turns_planned, produced, snapshot):
+        try:
+            produced = produced()
+            self._process_common_turn_result(turns_planned)
+            for turn_planned, produced_raw_resources in zip(turns_planned, produced):
+                self._add_produced_raw_resources(turn_planned.get_nation(), produced_raw_resources)
+                self._process_personal_turn_result(turn_planned)
+        except Exception:
+            self._processing = False
+            raise
+        finally:
+            snapshot.release()
+
+        # clients that know a recent version get the changes since, the others the whole scenario, pickled once for
+        # all of them, with the resources they see, the resource layers are created here and not in the executor
+        change_log = self._server_scenario.get_change_log()
+        turn_results = []
+        # of the nations that get the whole scenario: index in the turn results, arguments of create_full_turn_result()
+        full_indices = []
+        full_arguments = []
+        frozen_scenario_base = None
+        for turn_planned in turns_planned:
+            nation_id = turn_planned.get_nation()
+            changes = change_log.changes_since(turn_planned.get_acknowledged_version(), nation_id)
+            if changes is None:
+                logger.debug('_apply_turn nation_id:%s unknown version, send the whole scenario', nation_id)
+                if frozen_scenario_base is None:
+                    frozen_scenario_base = self._server_scenario.freeze_scenario_base()
+                full_indices.append(len(turn_results))
+                full_arguments.append((change_log.get_version(), frozen_scenario_base, nation_id,
+                                       self._server_scenario.get_resource_layer()))
+                turn_results.append(None)
+            else:
+                logger.debug('_apply_turn nation_id:%s changes:%s', nation_id, len(changes))
+                turn_results.append(TurnResult(change_log.get_version(), changes=changes,
+                                               nation_asset=self._server_scenario.get_nation_asset(nation_id)))
+
+        self._map(create_full_turn_result, full_arguments,
+                  lambda full_turn_results: self._finish_turn(clients, turns_planned, turn_results, full_indices,
+                                                              full_turn_results),
+                  self._process_executor or self._executor)
+
+    def _finish_turn(self, clients, turns_planned, turn_results, full_indices, full_turn_results):
+        try:
+            for index, turn_result in zip(full_indices, full_turn_results()):
+                turn_results[index] = turn_result
+            for client, turn_result in zip(clients, turn_results):
+                self._turn_processing_finished_event_handler(client, turn_result)
+
+            # every client has acknowledged at least the oldest of these versions
+            self._server_scenario.get_change_log().forget_before(
+                [turn_planned.get_acknowledged_version() for turn_planned in turns_planned])
+        finally:
+            self._processing = False
+
+        if self._all_turns_planned():
+            self._process_turn()
 
-    def _process_personal_turn_result(self, client):
+    def _map(self, function, arguments, done, executor):
+        """
+        Calls the function with each tuple of arguments, in the executor if there is one. Then calls done on the event
+        loop with a callable returning the results in the order of the arguments (or raising the first error).
+        """
+        if executor is None or not arguments:
+            done(lambda: [function(*argument) for argument in arguments])
+            return
+
+        futures = [executor.submit(function, *argument) for argument in arguments]
+        self._futures = futures
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def finished(_):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last and not any(future.cancelled() for future in futures):
+                self._call_soon_threadsafe(lambda: done(lambda: [future.result() for future in futures]))
+
+        for future in futures:
+            future.add_done_callback(finished)
+
+    def _process_personal_turn_result(self, turn_planned):
         def __add_to_nation_asset(asset, asset_type, price):
             for name, value in price[asset_type].items():
                 asset[name] += value
 
-        nation_id = self._clients_turn_planned[client.client_id].get_nation()
+        nation_id = turn_planned.get_nation()
 
-        old_workforces = self._clients_turn_planned[client.client_id].get_workforces()
+        old_workforces = turn_planned.get_workforces()
         for k, w in old_workforces.items():
             r, c = w.get_new_position()
 
@@ -107,9 +274,9 @@ class ServerTurnProcessor:
                 new_workforce.plan_action(r, c, WorkforceAction.SLEEP)
             self._server_scenario.get_nation_asset(nation_id).add_or_update_workforce(new_workforce)
 
-    def _process_common_turn_result(self):
-        for client in self._clients:
-            old_workforces = self._clients_turn_planned[client.client_id].get_workforces()
+    def _process_common_turn_result(self, turns_planned):
+        for turn_planned in turns_planned:
+            old_workforces = turn_planned.get_workforces()
 
             for k, w in old_workforces.items():
                 r, c = w.get_new_position()
@@ -126,12 +293,12 @@ class ServerTurnProcessor:
                     elif w.get_type() == WorkforceType.RANCHER:
                         self._process_rancher(c, r)
 
-    def _calculate_nation_asset(self, nation_id, old_roads, old_structures):
-        logger.debug('_calculate_nation_asset nation_id:%s', nation_id)
+    def _add_produced_raw_resources(self, nation_id, produced_raw_resources):
+        logger.debug('_add_produced_raw_resources nation_id:%s', nation_id)
 
-        resource_calculator = ResourceCalculator(self._server_scenario, nation_id, old_roads, old_structures)
-        resource_calculator.calculate()
-        resource_calculator.update_raw_resources(self._server_scenario.get_nation_asset(nation_id).get_raw_resources())
+        raw_resources = self._server_scenario.get_nation_asset(nation_id).get_raw_resources()
+        for name, raw_resource in produced_raw_resources.items():
+            raw_resources[name] += raw_resource
 
     def _process_engineer(self, c, r, w):
         logger.debug('_process_engineer c:%s, r:%s', c, r)
@@ -0,0 +1,167 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Encoders of the server models that are sent to the clients for the letter codec (see base.letters.LetterCodec).
+The codes must never be reused for another type, otherwise clients and servers of different versions misunderstand
+each other.
+"""
+
+import sys
+from array import array
+
+from imperialism_remake.base import constants, letters
+from imperialism_remake.server.models.goods import Goods
+from imperialism_remake.server.models.materials import Materials
+from imperialism_remake.server.models.nation_asset import NationAsset
+from imperialism_remake.server.models.prospector_resource_state import ProspectorResourceState
+from imperialism_remake.server.models.raw_resource_type import RawResourceType
+from imperialism_remake.server.models.server_scenario_base import ServerScenarioBase
+from imperialism_remake.server.models.structure import Structure
+from imperialism_remake.server.models.structure_type import StructureType
+from imperialism_remake.server.models.technology_type import TechnologyType
+from imperialism_remake.server.models.turn_planned import TurnPlanned
+from imperialism_remake.server.models.turn_result import TurnResult
+from imperialism_remake.server.models.workforce import Workforce
+from imperialism_remake.server.models.workforce_action import WorkforceAction
+from imperialism_remake.server.models.workforce_type import WorkforceType
+
+
+def _encode_array(values: array):
+    # little endian on the wire
+    if sys.byteorder == 'big' and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.typecode, values.tobytes()
+
+
+def _decode_array(value) -> array:
+    typecode, data = value
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big' and values.itemsize > 1:
+        values.byteswap()
+    return values
+
+
+def _encode_workforce(workforce: Workforce):
+    row, column = workforce.get_current_position()
+    new_row, new_column = workforce.get_new_position()
+    return (workforce.get_id(), row, column, workforce.get_nation(), workforce.get_type(), workforce.get_action(),
+            new_row, new_column)
+
+
+def _decode_workforce(value) -> Workforce:
+    workforce_id, row, column, nation, workforce_type, workforce_action, new_row, new_column = value
+    workforce = Workforce(workforce_id, row, column, nation, workforce_type)
+    workforce.plan_action(new_row, new_column, workforce_action)
+    return workforce
+
+
+def _encode_structure(structure: Structure):
+    row, column = structure.get_position()
+    return (structure.get_id(), row, column, structure.get_type(), structure.get_raw_resource_type(),
+            structure.get_max_level(), structure.get_level())
+
+
+def _decode_structure(value) -> Structure:
+    return Structure(*value)
+
+
+def _encode_nation_asset(nation_asset: NationAsset):
+    return nation_asset.get_nation_id(), nation_asset.get_raw_resources(), nation_asset.get_materials(), \
+           nation_asset.get_goods(), list(nation_asset.get_workforces().values())
+
+
+def _decode_nation_asset(value) -> NationAsset:
+    nation_id, raw_resources, materials, goods, workforces = value
+    nation_asset = NationAsset(nation_id)
+    nation_asset.get_raw_resources().update(raw_resources)
+    nation_asset.get_materials().update(materials)
+    nation_asset.get_goods().update(goods)
+    for workforce in workforces:
+        nation_asset.add_or_update_workforce(workforce)
+    return nation_asset
+
+
+def _encode_scenario_base(scenario_base: ServerScenarioBase):
+    return scenario_base.properties, scenario_base.maps, scenario_base.provinces, scenario_base.nations, \
+           scenario_base.rules, scenario_base.available_technologies
+
+
+def _decode_scenario_base(value) -> ServerScenarioBase:
+    scenario_base = ServerScenarioBase()
+    scenario_base.properties, scenario_base.maps, scenario_base.provinces, scenario_base.nations, \
+        scenario_base.rules, available_technologies = value
+    scenario_base.available_technologies.clear()
+    scenario_base.available_technologies.update(available_technologies)
+    return scenario_base
+
+
+def _encode_turn_planned(turn_planned: TurnPlanned):
+    return turn_planned.get_nation(), list(turn_planned.get_workforces().values()), \
+           turn_planned.get_acknowledged_version()
+
+
+def _decode_turn_planned(value) -> TurnPlanned:
+    nation, workforces, acknowledged_version = value
+    turn_planned = TurnPlanned(nation)
+    for workforce in workforces:
+        turn_planned.add_workforce(workforce)
+    turn_planned.set_acknowledged_version(acknowledged_version)
+    return turn_planned
+
+
+def _encode_turn_result(turn_result: TurnResult):
+    return turn_result.get_version(), turn_result.get_server_scenario_base(), turn_result.get_changes(), \
+           turn_result.get_nation_asset()
+
+
+def _decode_turn_result(value) -> TurnResult:
+    return TurnResult(*value)
+
+
+def register_encoders(codec) -> None:
+    """
+    Registers the encoders of the models at a compact codec.
+    """
+    codec.register_enum(WorkforceType, 1)
+    codec.register_enum(WorkforceAction, 2)
+    codec.register_enum(StructureType, 3)
+    codec.register_enum(RawResourceType, 4)
+    codec.register_enum(ProspectorResourceState, 5)
+    codec.register(Workforce, 10, _encode_workforce, _decode_workforce)
+    codec.register(Structure, 11, _encode_structure, _decode_structure)
+    codec.register(TurnPlanned, 12, _encode_turn_planned, _decode_turn_planned)
+    codec.register(TurnResult, 13, _encode_turn_result, _decode_turn_result)
+    codec.register_enum(constants.ScenarioProperty, 14)
+    codec.register_enum(constants.ProvinceProperty, 15)
+    codec.register_enum(constants.NationProperty, 16)
+    codec.register_enum(TechnologyType, 17)
+    codec.register_enum(Materials, 18)
+    codec.register_enum(Goods, 19)
+    codec.register(array, 20, _encode_array, _decode_array)
+    codec.register(NationAsset, 21, _encode_nation_asset, _decode_nation_asset)
+    codec.register(ServerScenarioBase, 22, _encode_scenario_base, _decode_scenario_base)
+
+
+def create_codecs() -> []:
+    """
+    The codecs of a network client of the game, preferred first.
+    """
+    letter_codec = letters.LetterCodec()
+    register_encoders(letter_codec)
+    return letters.create_codecs(letter_codec)
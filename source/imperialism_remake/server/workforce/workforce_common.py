@@ -15,6 +15,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 import uuid
 
+from imperialism_remake.server.models.nation_asset import NationAsset
 from imperialism_remake.server.models.technology_type import TechnologyType
 from imperialism_remake.server.models.terrain_type import TerrainType
 from imperialism_remake.server.models.turn_planned import TurnPlanned
@@ -39,11 +40,8 @@ class WorkforceCommon:
         if terrain_type == TerrainType.SEA.value:
             return False
 
-        for w_id, workforce in self._server_scenario.get_nation_asset(self._turn_planned.get_nation()).get_workforces().items():
-            if w_id != self.get_id():
-                w_row, w_col = workforce.get_new_position()
-                if new_row == w_row and new_column == w_col:
-                    return False
+        if self._get_nation_asset().is_planned_position_taken(new_row, new_column, self.get_id()):
+            return False
 
         return True
 
@@ -53,20 +51,26 @@ class WorkforceCommon:
     def plan_action(self, new_row: int, new_column: int, workforce_action: WorkforceAction) -> None:
         if self.is_action_allowed(new_row, new_column, workforce_action):
             self._workforce.plan_action(new_row, new_column, workforce_action)
+            self._get_nation_asset().update_planned_position(self._workforce)
 
             self._turn_planned.add_workforce(self._workforce)
         else:
             if workforce_action == WorkforceAction.DUTY_ACTION:
                 if self.is_action_allowed(new_row, new_column, WorkforceAction.MOVE):
                     self._workforce.plan_action(new_row, new_column, WorkforceAction.MOVE)
+                    self._get_nation_asset().update_planned_position(self._workforce)
 
                     self._turn_planned.add_workforce(self._workforce)
 
     def cancel_action(self) -> None:
         self._workforce.cancel_action()
+        self._get_nation_asset().update_planned_position(self._workforce)
 
         self._turn_planned.remove_workforce(self._workforce)
 
+    def _get_nation_asset(self) -> NationAsset:
+        return self._server_scenario.get_nation_asset(self._turn_planned.get_nation())
+
     def _is_tech_allowed_on_map(self, technology_type: TechnologyType) -> bool:
         return self._server_scenario.is_technology_available(technology_type)
 
@@ -55,8 +55,8 @@ def main():
     # guidelines at https://docs.python.org/3.6/library/multiprocessing.html#programming-guidelines
     multiprocessing.set_start_method('spawn')
 
-    # test for minimal supported python version (3.5)
-    required_version = (3, 5)
+    # test for minimal supported python version (3.7, asyncio.run() for the server processes)
+    required_version = (3, 7)
     if sys.version_info < required_version:
         raise RuntimeError('Python version must be {}.{} at least.'.format(*required_version))
 
@@ -0,0 +1,177 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Tests server/async_server
+"""
+
+import asyncio
+import unittest
+
+from imperialism_remake.base import constants
+from imperialism_remake.base.async_network import AsyncNetworkClient
+from imperialism_remake.server import game_session, wire_encoders
+from imperialism_remake.server.async_server import AsyncServerManager
+from imperialism_remake.server.server_handlers import is_loopback
+
+
+class FakeClient:
+    """
+    Records the channels a server connects a client to.
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self.channels = {}
+        self.sent = []
+
+    def peer_address(self):
+        return self.host, 4000
+
+    def connect_to_channel(self, channel, callback):
+        self.channels[channel] = callback
+
+    def receive(self, channel, action, content=None):
+        self.channels[channel](self, channel, action, content)
+
+    def send(self, channel, action, content=None):
+        self.sent.append((channel, action, content))
+
+    def is_connected(self):
+        return True
+
+
+class FakeSessionHost:
+    """
+    Records the commands for the game sessions.
+    """
+
+    def __init__(self):
+        self.commands = []
+
+    def execute(self, command, game_id, client_id=None, content=None):
+        self.commands.append((command, game_id, client_id, content))
+
+
+class TestAsyncServer(unittest.TestCase):
+
+    def test_connected_clients(self):
+        async def run():
+            server = AsyncServerManager()
+            await server.start(0)
+
+            clients = []
+            answers = []
+            for name in ('a', 'b', 'c'):
+                client = await AsyncNetworkClient.open_connection(server.get_port(),
+                                                                  codecs=wire_encoders.create_codecs())
+                client.connect_to_channel(constants.C.LOBBY,
+                                          lambda c, channel, action, content: answers.append(content))
+                asyncio.ensure_future(client.run())
+                client.send(constants.C.GENERAL, constants.M.GENERAL_NAME, name)
+                clients.append(client)
+
+            clients[-1].send(constants.C.LOBBY, constants.M.LOBBY_CONNECTED_CLIENTS)
+            for _ in range(100):
+                if answers:
+                    break
+                await asyncio.sleep(0.01)
+
+            clients[0].disconnect_from_host()
+            for _ in range(100):
+                if len(server.server_clients) == 2:
+                    break
+                await asyncio.sleep(0.01)
+            remaining = len(server.server_clients)
+
+            clients[1].send(constants.C.SYSTEM, constants.M.SYSTEM_SHUTDOWN)
+            for _ in range(100):
+                if not server.server_clients:
+                    break
+                await asyncio.sleep(0.01)
+            return answers, remaining
+
+        answers, remaining = asyncio.run(run())
+        self.assertEqual(answers, [['a', 'b', 'c']])
+        self.assertEqual(remaining, 2)
+
+    def test_system_channel_only_for_local_clients(self):
+        server = AsyncServerManager()
+        local_client = FakeClient('127.0.0.1')
+        remote_client = FakeClient('192.0.2.7')
+        server._add_client(local_client)
+        server._add_client(remote_client)
+        self.assertIn(constants.C.SYSTEM, local_client.channels)
+        self.assertNotIn(constants.C.SYSTEM, remote_client.channels)
+        self.assertIn(constants.C.LOBBY, remote_client.channels)
+
+    def test_remote_clients_create_and_join_games(self):
+        server = AsyncServerManager()
+        server._session_host = FakeSessionHost()
+        first_client = FakeClient('192.0.2.7')
+        second_client = FakeClient('192.0.2.8')
+        server._add_client(first_client)
+        server._add_client(second_client)
+        scenario_file = server._scenario_core_titles()[0][1]
+
+        first_client.receive(constants.C.LOBBY, constants.M.GAME_CREATE_REQUEST,
+                             {'scenario': scenario_file, 'nation': 1})
+        game_id = first_client.game_id
+        self.assertEqual(server.game_sessions[game_id]['scenario'], scenario_file)
+        second_client.receive(constants.C.LOBBY, constants.M.GAME_JOIN_REQUEST, {'game_id': game_id, 'nation': 2})
+        self.assertEqual(second_client.game_id, game_id)
+        self.assertEqual(server._session_host.commands,
+                         [(game_session.CREATE, game_id, None, scenario_file),
+                          (game_session.JOIN, game_id, first_client.client_id, 1),
+                          (game_session.JOIN, game_id, second_client.client_id, 2)])
+
+        server._session_event(game_session.JOINED, game_id, second_client.client_id, {'nation': 2})
+        self.assertEqual(second_client.sent, [(constants.C.GAME, constants.M.GAME_LOAD_RESPONSE, {'nation': 2})])
+
+    def test_lost_game_ends(self):
+        server = AsyncServerManager()
+        server._session_host = FakeSessionHost()
+        client = FakeClient('192.0.2.7')
+        server._add_client(client)
+        client.receive(constants.C.LOBBY, constants.M.GAME_CREATE_REQUEST,
+                       {'scenario': server._scenario_core_titles()[0][1], 'nation': 1})
+        game_id = client.game_id
+
+        server._session_event(game_session.FAILED, game_id, None, 'The session worker process ended.')
+        self.assertIsNone(client.game_id)
+        self.assertEqual(server.game_sessions, {})
+        self.assertEqual(client.sent, [(constants.C.GAME, constants.M.GAME_FAILED,
+                                        'The session worker process ended.')])
+
+    def test_create_games_only_of_core_scenarios(self):
+        server = AsyncServerManager()
+        server._session_host = FakeSessionHost()
+        client = FakeClient('192.0.2.7')
+        server._add_client(client)
+        client.receive(constants.C.LOBBY, constants.M.GAME_CREATE_REQUEST, {'scenario': '/etc/passwd', 'nation': 1})
+        self.assertIsNone(client.game_id)
+        self.assertEqual(server.game_sessions, {})
+        self.assertEqual(server._session_host.commands, [])
+
+    def test_is_loopback(self):
+        for address in ('127.0.0.1', '127.1.2.3', '::1', '::ffff:127.0.0.1'):
+            self.assertTrue(is_loopback(address), address)
+        for address in ('0.0.0.0', '10.0.0.1', '192.0.2.7', '2001:db8::1', 'localhost', ''):
+            self.assertFalse(is_loopback(address), address)
+
+
+if __name__ == '__main__':
+    unittest.main()
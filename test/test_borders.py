@@ -0,0 +1,85 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+Tests client/utils/borders
+"""
+
+import unittest
+from array import array
+
+from imperialism_remake.client.utils.borders import Outlines
+from imperialism_remake.server.models.neighbor_table import NeighborTable
+from imperialism_remake.server.models.tile_index import NO_ID
+
+COLUMNS = 4
+ROWS = 3
+
+
+def area(polygon):
+    # shoelace formula, positive for clockwise polygons (y points down)
+    return sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(polygon, polygon[1:] + polygon[:1])) / 2
+
+
+class TestOutlines(unittest.TestCase):
+
+    def setUp(self):
+        self.layer = array('i', [NO_ID] * (COLUMNS * ROWS))
+        self.outlines = Outlines(NeighborTable.of_size(COLUMNS, ROWS), self.layer)
+
+    def set_owner(self, column, row, owner):
+        self.layer[row * COLUMNS + column] = owner
+        return row * COLUMNS + column
+
+    def test_single_tile(self):
+        index = self.set_owner(1, 1, 0)
+        self.assertEqual(self.outlines.update([index]), {0})
+        outline = self.outlines.outline(0)
+        self.assertEqual(len(outline), 1)
+        # odd rows are shifted right by half a tile
+        self.assertEqual(sorted(outline[0]), [(1.5, 1), (1.5, 2), (2.5, 1), (2.5, 2)])
+
+    def test_neighbors_have_one_outline(self):
+        # two tiles next to each other in a row and one in the shifted row below
+        indices = [self.set_owner(0, 0, 0), self.set_owner(1, 0, 0), self.set_owner(0, 1, 0)]
+        self.outlines.update(indices)
+        outline = self.outlines.outline(0)
+        self.assertEqual(len(outline), 1)
+        self.assertEqual(len(outline[0]), 8)
+        self.assertEqual(area(outline[0]), 3)
+
+    def test_separate_areas_and_map_border(self):
+        # the whole map with a hole in the middle has an outer and an inner outline
+        self.layer[:] = array('i', [0] * (COLUMNS * ROWS))
+        self.layer[1 * COLUMNS + 1] = NO_ID
+        outlines = Outlines(NeighborTable.of_size(COLUMNS, ROWS), self.layer)
+        areas = sorted(area(polygon) for polygon in outlines.outline(0))
+        self.assertEqual(areas, [-1, 12])
+
+    def test_update_changes_only_old_and_new_owner(self):
+        indices = [self.set_owner(0, 0, 0), self.set_owner(3, 2, 1), self.set_owner(0, 2, 2)]
+        self.outlines.update(indices)
+        outline_of_2 = self.outlines.outline(2)
+        self.assertEqual(self.outlines.update([self.set_owner(3, 2, 0)]), {0, 1})
+        self.assertEqual(set(self.outlines.owners()), {0, 2})
+        self.assertEqual(self.outlines.outline(1), [])
+        self.assertEqual(len(self.outlines.outline(0)), 2)
+        self.assertIs(self.outlines.outline(2), outline_of_2)
+        # unchanged tiles do not change any owner
+        self.assertEqual(self.outlines.update(indices), set())
+
+
+if __name__ == '__main__':
+    unittest.main()
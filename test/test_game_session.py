@@ -0,0 +1,160 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Tests server/game_session and server/session_pool
+"""
+
+import concurrent.futures
+import os
+import queue
+import selectors
+import unittest
+import uuid
+
+from imperialism_remake.base import constants
+from imperialism_remake.server import game_session
+from imperialism_remake.server.models.turn_planned import TurnPlanned
+from imperialism_remake.server.session_pool import SessionProcessPool
+
+SCENARIO_FILE = os.path.join(constants.SCENARIO_FOLDER, 'test01.scenario')
+
+
+class TestSessionHost(unittest.TestCase):
+
+    def setUp(self):
+        self.events = []
+        self.host = game_session.SessionHost(lambda *event: self.events.append(event))
+
+    def test_sessions_are_independent(self):
+        games = [uuid.uuid4(), uuid.uuid4()]
+        clients = [uuid.uuid4(), uuid.uuid4(), uuid.uuid4()]
+        for game_id in games:
+            self.host.execute(game_session.CREATE, game_id, content=SCENARIO_FILE)
+        self.host.execute(game_session.JOIN, games[0], clients[0], 1)
+        self.host.execute(game_session.JOIN, games[0], clients[1], 2)
+        self.host.execute(game_session.JOIN, games[1], clients[2], 1)
+        self.assertEqual([event[0] for event in self.events], [game_session.JOINED] * 3)
+        self.assertEqual(self.events[0][3]['game_id'], games[0])
+        self.events.clear()
+
+        # the single player of the second game does not wait for the first game
+        self.host.execute(game_session.TURN_ENDED, games[1], clients[2], TurnPlanned(1))
+        self.assertEqual([event[:3] for event in self.events], [(game_session.TURN_PROCESSED, games[1], clients[2])])
+        self.events.clear()
+
+        # the first game waits for both players
+        self.host.execute(game_session.TURN_ENDED, games[0], clients[0], TurnPlanned(1))
+        self.assertEqual(self.events, [])
+        self.host.execute(game_session.TURN_ENDED, games[0], clients[1], TurnPlanned(2))
+        self.assertEqual(sorted(event[2] for event in self.events), sorted(clients[:2]))
+        self.events.clear()
+
+        # and only for the remaining player once the other one left
+        self.host.execute(game_session.LEAVE, games[0], clients[1])
+        self.host.execute(game_session.TURN_ENDED, games[0], clients[0], TurnPlanned(1))
+        self.assertEqual([event[2] for event in self.events], [clients[0]])
+
+    def test_failed_command(self):
+        with self.assertLogs(game_session.__name__, 'ERROR'):
+            self.host.execute(game_session.JOIN, uuid.uuid4(), uuid.uuid4(), 1)
+        self.assertEqual(self.events[0][0], game_session.FAILED)
+
+
+class TestSessionHostWithExecutor(unittest.TestCase):
+
+    def test_turn_processed_in_executor(self):
+        events = []
+        calls = queue.SimpleQueue()
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            host = game_session.SessionHost(lambda *event: events.append(event), executor, calls.put)
+            game_id = uuid.uuid4()
+            clients = [uuid.uuid4(), uuid.uuid4()]
+            host.execute(game_session.CREATE, game_id, content=SCENARIO_FILE)
+            host.execute(game_session.JOIN, game_id, clients[0], 1)
+            host.execute(game_session.JOIN, game_id, clients[1], 2)
+            events.clear()
+
+            host.execute(game_session.TURN_ENDED, game_id, clients[0], TurnPlanned(1))
+            host.execute(game_session.TURN_ENDED, game_id, clients[1], TurnPlanned(2))
+            # the results are only sent on the event loop (here this thread)
+            self.assertEqual(events, [])
+            while len(events) < 2:
+                calls.get(timeout=30)()
+
+        self.assertEqual([event[2] for event in events], clients)
+        self.assertEqual(events[0][3].get_version(), events[1][3].get_version())
+
+
+class TestSessionProcessPool(unittest.TestCase):
+
+    def test_sessions_in_workers(self):
+        selector = selectors.DefaultSelector()
+        events = []
+        pool = SessionProcessPool(2, lambda *event: events.append(event),
+                                  lambda file_descriptor, callback: selector.register(file_descriptor,
+                                                                                      selectors.EVENT_READ, callback),
+                                  selector.unregister)
+        try:
+            games = [uuid.uuid4(), uuid.uuid4()]
+            clients = [uuid.uuid4(), uuid.uuid4()]
+            for game_id, client_id in zip(games, clients):
+                pool.execute(game_session.CREATE, game_id, content=SCENARIO_FILE)
+                pool.execute(game_session.JOIN, game_id, client_id, 1)
+                pool.execute(game_session.TURN_ENDED, game_id, client_id, TurnPlanned(1))
+            self.assertNotEqual(pool.get_worker(games[0]), pool.get_worker(games[1]))
+
+            while len(events) < 4:
+                for key, _ in selector.select(timeout=30):
+                    key.data()
+            self.assertEqual(sorted((event[0], event[2]) for event in events),
+                             sorted([(game_session.JOINED, client_id) for client_id in clients] +
+                                    [(game_session.TURN_PROCESSED, client_id) for client_id in clients]))
+        finally:
+            pool.close()
+            selector.close()
+
+    def test_worker_ended(self):
+        selector = selectors.DefaultSelector()
+        events = []
+        pool = SessionProcessPool(2, lambda *event: events.append(event),
+                                  lambda file_descriptor, callback: selector.register(file_descriptor,
+                                                                                      selectors.EVENT_READ, callback),
+                                  selector.unregister)
+        try:
+            games = [uuid.uuid4(), uuid.uuid4()]
+            for game_id in games:
+                pool.execute(game_session.CREATE, game_id, content=SCENARIO_FILE)
+            lost_worker = pool.get_worker(games[0])
+            pool._processes[lost_worker].terminate()
+
+            while not events:
+                for key, _ in selector.select(timeout=30):
+                    key.data()
+            self.assertEqual([event[:3] for event in events], [(game_session.FAILED, games[0], None)])
+
+            # commands for the lost session are ignored, new sessions go to the remaining worker
+            pool.execute(game_session.TURN_ENDED, games[0], uuid.uuid4(), TurnPlanned(1))
+            new_game = uuid.uuid4()
+            pool.execute(game_session.CREATE, new_game, content=SCENARIO_FILE)
+            self.assertEqual(pool.get_worker(new_game), pool.get_worker(games[1]))
+        finally:
+            pool.close()
+            selector.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+Tests client/utils/layer_image
+"""
+
+import os
+import unittest
+from array import array
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from imperialism_remake.client.utils.layer_image import layer_image, layer_path
+
+app = None
+
+RED = QtGui.QColor(QtCore.Qt.red)
+BLUE = QtGui.QColor(QtCore.Qt.blue)
+GRAY = QtGui.QColor(QtCore.Qt.gray)
+
+
+def setUpModule():  # noqa: N802
+    global app
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+class TestLayerImage(unittest.TestCase):
+
+    def test_pixel_per_tile(self):
+        # 3 columns, 2 rows, -1 and values without color are the background
+        layer = array('i', [0, 1, -1, 1, 7, 300])
+        image = layer_image(layer, 3, 2, {0: RED, 1: BLUE, 300: RED}, GRAY)
+        self.assertEqual(image.size(), QtCore.QSize(3, 2))
+        self.assertEqual([image.pixelColor(column, 0) for column in range(3)], [RED, BLUE, GRAY])
+        self.assertEqual([image.pixelColor(column, 1) for column in range(3)], [BLUE, GRAY, RED])
+
+    def test_staggered_blocks(self):
+        # a byte layer, odd rows are shifted by half a block
+        layer = array('B', [1, 0, 0, 1])
+        image = layer_image(layer, 2, 2, {1: BLUE}, GRAY, block_size=4, staggered=True)
+        self.assertEqual(image.size(), QtCore.QSize(10, 8))
+        self.assertEqual([image.pixelColor(x, 0) for x in (0, 3, 4, 9)], [BLUE, BLUE, GRAY, GRAY])
+        self.assertEqual([image.pixelColor(x, 7) for x in (0, 5, 6, 9)], [GRAY, GRAY, BLUE, BLUE])
+
+    def test_layer_path(self):
+        layer = [2, 2, -1, -1, 2, -1]
+        path = layer_path(layer, 3, 2, 2)
+        self.assertEqual(path.boundingRect(), QtCore.QRectF(0, 0, 2, 2))
+        self.assertTrue(path.contains(QtCore.QPointF(1.5, 1.5)))
+        self.assertFalse(path.contains(QtCore.QPointF(0.5, 1.5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+Tests client/common/map_overlay
+"""
+
+import os
+import unittest
+
+from PyQt5 import QtWidgets
+
+from imperialism_remake.client.common.map_overlay import MapOverlay, GridOverlay
+
+app = None
+
+
+def setUpModule():  # noqa: N802
+    global app
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def create_items(scene):
+    return [scene.addSimpleText('')]
+
+
+def show_items(items, key, column, row):
+    items[0].setText(str(key))
+    items[0].setPos(column, row)
+
+
+def shown_texts(scene):
+    return sorted(item.text() for item in scene.items() if item.isVisible())
+
+
+class TestMapOverlay(unittest.TestCase):
+
+    def setUp(self):
+        self.scene = QtWidgets.QGraphicsScene()
+        self.overlay = MapOverlay(self.scene, create_items, show_items)
+        self.overlay.set_region(range(0, 10), range(0, 10))
+
+    def test_only_entries_in_region_have_items(self):
+        self.overlay.set_entry('a', 1, 1)
+        self.overlay.set_entry('b', 20, 1)
+        self.assertEqual(shown_texts(self.scene), ['a'])
+        self.assertEqual(self.overlay.get_items_count(), 1)
+
+        self.overlay.set_region(range(15, 25), range(0, 10))
+        self.assertEqual(shown_texts(self.scene), ['b'])
+        # the item of a is used for b
+        self.assertEqual(self.overlay.get_items_count(), 1)
+
+    def test_moved_and_removed_entries(self):
+        self.overlay.set_entry('a', 1, 1)
+        self.overlay.set_entry('b', 2, 2)
+        self.overlay.set_entry('a', 30, 30)
+        self.assertEqual(shown_texts(self.scene), ['b'])
+
+        self.overlay.remove_entry('b')
+        self.assertEqual(shown_texts(self.scene), [])
+        self.assertEqual(list(self.overlay.get_keys()), ['a'])
+
+    def test_invisible(self):
+        self.overlay.set_entry('a', 1, 1)
+        self.overlay.set_visible(False)
+        self.assertEqual(shown_texts(self.scene), [])
+        self.overlay.set_visible(True)
+        self.assertEqual(shown_texts(self.scene), ['a'])
+
+
+class TestGridOverlay(unittest.TestCase):
+
+    def test_items_for_tiles_in_region(self):
+        scene = QtWidgets.QGraphicsScene()
+        overlay = GridOverlay(scene, create_items, show_items)
+        overlay.set_region(range(0, 3), range(0, 2))
+        self.assertEqual(len(shown_texts(scene)), 6)
+
+        overlay.set_region(range(100, 102), range(50, 52))
+        self.assertEqual(shown_texts(scene), ['(100, 50)', '(100, 51)', '(101, 50)', '(101, 51)'])
+        self.assertEqual(overlay.get_items_count(), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
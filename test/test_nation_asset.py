@@ -0,0 +1,88 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Tests server/models/nation_asset
+"""
+
+import pickle
+import unittest
+import uuid
+
+from imperialism_remake.server.models.nation_asset import NationAsset
+from imperialism_remake.server.models.workforce import Workforce
+from imperialism_remake.server.models.workforce_action import WorkforceAction
+from imperialism_remake.server.models.workforce_type import WorkforceType
+
+
+class TestPlannedPositions(unittest.TestCase):
+
+    def setUp(self):
+        self.nation_asset = NationAsset(0)
+        self.workforce = Workforce(uuid.uuid4(), 2, 3, 0, WorkforceType.ENGINEER)
+        self.nation_asset.add_or_update_workforce(self.workforce)
+
+    def test_plan_and_cancel(self):
+        self.assertTrue(self.nation_asset.is_planned_position_taken(2, 3))
+        self.assertFalse(self.nation_asset.is_planned_position_taken(2, 3, self.workforce.get_id()))
+
+        self.workforce.plan_action(2, 4, WorkforceAction.MOVE)
+        self.nation_asset.update_planned_position(self.workforce)
+        self.assertFalse(self.nation_asset.is_planned_position_taken(2, 3))
+        self.assertTrue(self.nation_asset.is_planned_position_taken(2, 4))
+
+        self.workforce.cancel_action()
+        self.nation_asset.update_planned_position(self.workforce)
+        self.assertTrue(self.nation_asset.is_planned_position_taken(2, 3))
+
+    def test_delete_workforce(self):
+        self.nation_asset.delete_workforce(self.workforce)
+        self.assertFalse(self.nation_asset.is_planned_position_taken(2, 3))
+
+    def test_rebuilt_after_unpickling(self):
+        nation_asset = pickle.loads(pickle.dumps(self.nation_asset))
+        self.assertTrue(nation_asset.is_planned_position_taken(2, 3))
+
+
+class TestWorkforcePositions(unittest.TestCase):
+
+    def setUp(self):
+        self.nation_asset = NationAsset(0)
+        self.workforce = Workforce(uuid.uuid4(), 2, 3, 0, WorkforceType.ENGINEER)
+        self.nation_asset.add_or_update_workforce(self.workforce)
+
+    def test_moved_and_deleted(self):
+        self.assertEqual(self.nation_asset.get_workforces_at(2, 3), [self.workforce])
+
+        moved_workforce = Workforce(self.workforce.get_id(), 2, 4, 0, WorkforceType.ENGINEER)
+        self.nation_asset.add_or_update_workforce(moved_workforce)
+        self.assertEqual(self.nation_asset.get_workforces_at(2, 3), [])
+        self.assertEqual(self.nation_asset.get_workforces_at(2, 4), [moved_workforce])
+
+        self.nation_asset.delete_workforce(moved_workforce)
+        self.assertEqual(self.nation_asset.get_workforces_at(2, 4), [])
+
+    def test_legacy_asset_locations_dropped(self):
+        state = self.nation_asset.__getstate__()
+        state['asset_locations'] = {}
+        nation_asset = NationAsset.__new__(NationAsset)
+        nation_asset.__setstate__(state)
+        self.assertFalse(hasattr(nation_asset, 'asset_locations'))
+        self.assertEqual(len(nation_asset.get_workforces_at(2, 3)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,250 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Tests server/turn_processing/resource_calculator
+"""
+
+import os
+import unittest
+import uuid
+
+from imperialism_remake.base import constants
+from imperialism_remake.server.models.raw_resource_type import RawResourceType
+from imperialism_remake.server.models.structure import Structure
+from imperialism_remake.server.models.structure_type import StructureType
+from imperialism_remake.server.models.terrain_resource_type import TerrainResourceType
+from imperialism_remake.server.server_scenario import ServerScenario
+from imperialism_remake.server.turn_processing.resource_calculator import ResourceCalculator
+
+SCENARIO_FILE = os.path.join(constants.SCENARIO_FOLDER, 'test01.scenario')
+
+COLLECTABLE_TERRAIN_RESOURCES = [TerrainResourceType.BUFFALO.value, TerrainResourceType.HORSE.value,
+                                 TerrainResourceType.SHEEP.value, TerrainResourceType.SCRUBFOREST.value,
+                                 TerrainResourceType.GRAIN.value, TerrainResourceType.ORCHARD.value,
+                                 TerrainResourceType.FOREST.value, TerrainResourceType.COTTON.value]
+
+
+def neighbored_positions(scenario, row, column):
+    # only the ones on the map
+    columns = scenario[constants.ScenarioProperty.MAP_COLUMNS]
+    return [(tile[1], tile[0]) for tile in scenario.neighbored_tiles(column, row)
+            if tile is not None and 0 <= tile[0] < columns]
+
+
+def baseline_neighbored_positions(scenario, row, column):
+    """
+    The neighbors (row, column) as ServerScenario.neighbor_position() gave them before the NeighborTable, without the
+    ones it gave as None. The diagonal neighbors beyond the west and east edges are positions off the map.
+    """
+    columns = scenario[constants.ScenarioProperty.MAP_COLUMNS]
+    rows = scenario[constants.ScenarioProperty.MAP_ROWS]
+    # odd rows are shifted half a tile to the right
+    odd = row % 2
+    positions = []
+    if column > 0:
+        positions.append((row, column - 1))
+    if row > 0:
+        positions.extend([(row - 1, column - 1 + odd), (row - 1, column + odd)])
+    if column < columns - 1:
+        positions.append((row, column + 1))
+    if row < rows - 1:
+        positions.extend([(row + 1, column + odd), (row + 1, column - 1 + odd)])
+    return positions
+
+
+def baseline_production(scenario, nation_id, capital_position=None):
+    """
+    The raw resources produced by a nation as the road search over all road sections calculated them before the
+    ResourceCalculator.
+    """
+    if capital_position is None:
+        capital_position = scenario.get_capital_position(nation_id)
+    capital_column, capital_row = capital_position
+    structures = scenario.get_structures()
+
+    def structures_at(position):
+        return structures.get(position[0], {}).get(position[1])
+
+    forward, backward = {}, {}
+    for start, stop in scenario.get_roads():
+        forward.setdefault(tuple(start), []).append(tuple(stop))
+        backward.setdefault(tuple(stop), []).append(tuple(start))
+
+    # a warehouse tile is reached once for each direction road sections touch it in
+    reachable_warehouses = []
+    queue = [(capital_row, capital_column)]
+    visited = {(capital_row, capital_column)}
+    while queue:
+        position = queue.pop()
+        for road_map in (forward, backward):
+            if position in road_map:
+                tile_structures = structures_at(position)
+                if tile_structures and any(s.get_type() == StructureType.WAREHOUSE for s in tile_structures):
+                    reachable_warehouses.append(tile_structures)
+                for other_position in road_map[position]:
+                    if other_position not in visited:
+                        queue.insert(0, other_position)
+                        visited.add(other_position)
+
+    # every structure on a warehouse tile collects, a tile produces with its first structure
+    structure_positions = set(baseline_neighbored_positions(scenario, capital_row, capital_column))
+    terrain_positions = baseline_neighbored_positions(scenario, capital_row, capital_column)
+    for tile_structures in reachable_warehouses:
+        for structure in tile_structures:
+            row, column = structure.get_position()
+            collected_positions = [(row, column)] + baseline_neighbored_positions(scenario, row, column)
+            structure_positions.update(collected_positions)
+            terrain_positions.extend(collected_positions)
+
+    produced = {}
+    producing_structures = set()
+    for position in structure_positions:
+        tile_structures = structures_at(position)
+        if tile_structures and any(s.get_type() != StructureType.WAREHOUSE for s in tile_structures):
+            producing_structures.add(tile_structures[0])
+    for structure in producing_structures:
+        # the turn processing failed for producers without a raw resource type, like a warehouse built first
+        raw_resource_type = structure.get_raw_resource_type()
+        if raw_resource_type is not None:
+            produced[raw_resource_type] = produced.get(raw_resource_type, 0) + structure.get_level()
+    for row, column in terrain_positions:
+        if scenario.terrain_resource_at(column, row) in COLLECTABLE_TERRAIN_RESOURCES:
+            raw_resource_type = scenario.get_raw_resource_type(row, column)
+            if raw_resource_type is not None:
+                produced[raw_resource_type] = produced.get(raw_resource_type, 0) + 1
+    return produced
+
+
+class TestResourceCalculator(unittest.TestCase):
+
+    def setUp(self):
+        self.scenario = ServerScenario.from_file(SCENARIO_FILE)
+        self.calculator = ResourceCalculator(self.scenario)
+        # the capital of this nation is connected to the warehouses of the scenario
+        self.nation = 6
+        capital_column, capital_row = self.scenario.get_capital_position(self.nation)
+        self.capital = (capital_row, capital_column)
+
+    def tearDown(self):
+        self.calculator.detach()
+
+    def assert_baseline(self, nation_id):
+        produced = self.calculator.calculate(nation_id)
+        self.assertEqual(produced, baseline_production(self.scenario, nation_id))
+        return produced
+
+    def free_position(self, row, column, excluded=()):
+        # a position next to a position without structures or roads
+        for position in neighbored_positions(self.scenario, row, column):
+            if self.scenario.get_structures_at(*position) is None and \
+                    not self.scenario.get_road_network().neighbors(position) and position not in excluded:
+                return position
+        raise RuntimeError('No free position next to {}.'.format((row, column)))
+
+    def test_scenario(self):
+        for nation_id in self.scenario.nations():
+            self.assert_baseline(nation_id)
+        # the structures of the scenario produce
+        self.assertGreater(self.assert_baseline(self.nation).get(RawResourceType.WOOD, 0), 0)
+
+    def test_add_road(self):
+        other_nation = 0
+        capital_column, capital_row = self.scenario.get_capital_position(other_nation)
+        road_position = self.free_position(capital_row, capital_column)
+        warehouse_position = self.free_position(*road_position, excluded=[(capital_row, capital_column)])
+        self.scenario.add_structure(*warehouse_position, Structure(uuid.uuid4(), *warehouse_position,
+                                                                   StructureType.WAREHOUSE, None, 1))
+        logging_position = self.free_position(*warehouse_position, excluded=[road_position])
+        self.scenario.add_structure(*logging_position, Structure(uuid.uuid4(), *logging_position,
+                                                                 StructureType.LOGGING, RawResourceType.WOOD, 2, 2))
+        before = self.assert_baseline(other_nation)
+
+        snapshot = self.scenario.create_snapshot()
+        self.scenario.add_road((capital_row, capital_column), road_position)
+        self.assertEqual(self.assert_baseline(other_nation), before)
+        self.scenario.add_road(road_position, warehouse_position)
+        after = self.assert_baseline(other_nation)
+        self.assertGreaterEqual(after.get(RawResourceType.WOOD, 0), before.get(RawResourceType.WOOD, 0) + 2)
+        self.assertEqual(self.calculator.calculate(other_nation, snapshot), before)
+        snapshot.release()
+
+        self.scenario.remove_road(road_position, warehouse_position)
+        self.assertEqual(self.assert_baseline(other_nation), before)
+
+    def test_add_road_to_warehouse_in_both_directions(self):
+        # the scenario contains the road section (13, 29) - (13, 30) in both directions
+        warehouse_position = (13, 30)
+        before = self.assert_baseline(self.nation)
+        road_position = self.free_position(*warehouse_position)
+        self.scenario.add_road(road_position, warehouse_position)
+        self.assert_baseline(self.nation)
+
+        self.scenario.remove_road(warehouse_position, (13, 29))
+        self.scenario.remove_road(road_position, warehouse_position)
+        self.assertNotEqual(self.assert_baseline(self.nation), before)
+
+    def test_add_structure(self):
+        before = self.assert_baseline(self.nation)
+        position = self.free_position(*self.capital)
+        self.scenario.add_structure(*position, Structure(uuid.uuid4(), *position, StructureType.MINE,
+                                                         RawResourceType.COAL, 3, 3))
+        after = self.assert_baseline(self.nation)
+        self.assertEqual(after.get(RawResourceType.COAL, 0), before.get(RawResourceType.COAL, 0) + 3)
+
+        # only the first structure of a tile produces
+        self.scenario.add_structure(*position, Structure(uuid.uuid4(), *position, StructureType.MINE,
+                                                         RawResourceType.ORE, 1))
+        self.assertEqual(self.assert_baseline(self.nation), after)
+
+    def test_add_structure_to_warehouse(self):
+        warehouse_position = (13, 29)
+        self.scenario.add_structure(*warehouse_position, Structure(uuid.uuid4(), *warehouse_position,
+                                                                   StructureType.LOGGING, RawResourceType.WOOD, 1))
+        self.assert_baseline(self.nation)
+
+        warehouse_position = self.free_position(*self.capital)
+        self.scenario.add_structure(*warehouse_position, Structure(uuid.uuid4(), *warehouse_position,
+                                                                   StructureType.WAREHOUSE, None, 1))
+        self.scenario.add_road(self.capital, warehouse_position)
+        self.assert_baseline(self.nation)
+
+    def test_edge_columns(self):
+        # the diagonal neighbors beyond the west and east edges collect the terrain of a tile in another row
+        columns = self.scenario[constants.ScenarioProperty.MAP_COLUMNS]
+        rows = self.scenario[constants.ScenarioProperty.MAP_ROWS]
+        for row in range(rows):
+            for column in (0, 1, columns - 2, columns - 1):
+                self.scenario.set_terrain_resource_at(column, row, TerrainResourceType.FOREST.value)
+
+        for column in (0, columns - 1):
+            for row in (4, 5):
+                self.assertEqual(self.calculator.calculate(self.nation, capital_position=(column, row)),
+                                 baseline_production(self.scenario, self.nation, (column, row)))
+
+        # a warehouse on the west edge connected to the capital
+        for row in (4, 5):
+            capital = (row, 1)
+            warehouse_position = (row, 0)
+            self.scenario.add_road(capital, warehouse_position)
+            self.scenario.add_structure(*warehouse_position, Structure(uuid.uuid4(), *warehouse_position,
+                                                                       StructureType.WAREHOUSE, None, 1))
+            self.assertEqual(self.calculator.calculate(self.nation, capital_position=(1, row)),
+                             baseline_production(self.scenario, self.nation, (1, row)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Tests server/scenario_cache and server/scenario_archive
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from imperialism_remake.base import constants
+from imperialism_remake.server.scenario_archive import ScenarioArchive
+from imperialism_remake.server.scenario_cache import ScenarioCache
+from imperialism_remake.server.server_scenario import ServerScenario
+
+SCENARIO_FILE = os.path.join(constants.SCENARIO_FOLDER, 'test01.scenario')
+
+
+class TestScenarioCache(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.files = []
+        for name in ('a.scenario', 'b.scenario'):
+            self.files.append(os.path.join(self.folder, name))
+            shutil.copy(SCENARIO_FILE, self.files[-1])
+        self.cache = ScenarioCache()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_titles_and_previews_are_cached(self):
+        titles = self.cache.get_titles(self.folder)
+        self.assertEqual([file_name for _, file_name in titles], sorted(self.files))
+        self.assertIs(self.cache.get_properties(self.files[0]), self.cache.get_properties(self.files[0]))
+
+        preview = self.cache.get_preview(self.files[0])
+        self.assertIs(self.cache.get_preview(self.files[0]), preview)
+        self.assertEqual(len(preview['map']), preview[constants.ScenarioProperty.MAP_COLUMNS] *
+                         preview[constants.ScenarioProperty.MAP_ROWS])
+
+    def test_modified_file_is_read_again(self):
+        properties = self.cache.get_properties(self.files[0])
+        preview = self.cache.get_preview(self.files[0])
+        state = os.stat(self.files[0])
+        os.utime(self.files[0], ns=(state.st_atime_ns, state.st_mtime_ns + 1000000000))
+        self.assertIsNot(self.cache.get_properties(self.files[0]), properties)
+        self.assertIsNot(self.cache.get_preview(self.files[0]), preview)
+
+    def test_preview_equals_preview_of_loaded_scenario(self):
+        preview = self.cache.get_preview(self.files[0])
+        scenario = ServerScenario.from_file(self.files[0])
+        self.assertEqual(preview['map'], scenario.get_nation_layer().tolist())
+        self.assertEqual(set(preview[constants.SCENARIO_FILE_NATIONS]), set(scenario.nations()))
+
+
+class TestScenarioArchive(unittest.TestCase):
+
+    def test_files_are_read_on_first_access(self):
+        with ScenarioArchive(SCENARIO_FILE) as archive:
+            properties = archive.properties()
+            self.assertIs(archive.properties(), properties)
+            self.assertNotIn(constants.SCENARIO_FILE_MAPS, archive._files)
+        with self.assertRaises(RuntimeError):
+            archive.maps()
+
+    def test_rules_are_shared(self):
+        first = ServerScenario.from_file(SCENARIO_FILE)
+        second = ServerScenario.from_file(SCENARIO_FILE)
+        self.assertIs(first.get_scenario_base().rules, second.get_scenario_base().rules)
+        self.assertIsNot(first.get_scenario_base().maps, second.get_scenario_base().maps)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Tests server/scenario_format
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from imperialism_remake.base import constants
+from imperialism_remake.server import scenario_format
+from imperialism_remake.server.models.prospector_resource_state import ProspectorResourceState
+from imperialism_remake.server.scenario_archive import ScenarioArchive
+from imperialism_remake.server.server_scenario import ServerScenario
+
+LEGACY_SCENARIO_FILE = os.path.join(constants.SCENARIO_FOLDER, 'test01.scenario')
+
+
+def describe_structures(scenario):
+    return [(row, column, [vars(structure) for structure in structures])
+            for row, row_structures in scenario.get_structures().items()
+            for column, structures in row_structures.items()]
+
+
+def describe_nations(scenario):
+    nations = {}
+    for nation in scenario.nations():
+        nation_properties = dict(scenario.get_scenario_base().nations[nation])
+        asset = nation_properties.pop(constants.NationProperty.ASSETS, None)
+        if asset is not None:
+            nation_properties['asset'] = (asset.get_raw_resources(), asset.get_materials(), asset.get_goods(),
+                                          {workforce_id: vars(workforce)
+                                           for workforce_id, workforce in asset.get_workforces().items()})
+        nations[nation] = nation_properties
+    return nations
+
+
+class TestScenarioFormat(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.folder, 'saved.scenario')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_saved_scenario_is_loaded_unchanged(self):
+        scenario = ServerScenario.from_file(LEGACY_SCENARIO_FILE)
+        scenario.set_nation_prospector_resource_state(6, 15, 29, 2, ProspectorResourceState.REVEALED)
+        scenario.save(self.file_name)
+        self.assertTrue(scenario_format.is_scenario_file(self.file_name))
+
+        loaded = ServerScenario.from_file(self.file_name)
+        base, loaded_base = scenario.get_scenario_base(), loaded.get_scenario_base()
+        self.assertEqual(loaded_base.properties, base.properties)
+        self.assertEqual(loaded_base.provinces, base.provinces)
+        for key in ('terrain', 'resource', 'road'):
+            self.assertEqual(loaded_base.maps[key], base.maps[key])
+        self.assertEqual(describe_structures(loaded), describe_structures(scenario))
+        self.assertEqual(describe_nations(loaded), describe_nations(scenario))
+
+    def test_legacy_nation_assets_are_migrated(self):
+        scenario = ServerScenario.from_file(LEGACY_SCENARIO_FILE)
+        workforces = scenario.get_nation_asset(6).get_workforces().values()
+        self.assertEqual(len(workforces), 4)
+        for workforce in workforces:
+            self.assertEqual(workforce.get_nation(), 6)
+            self.assertEqual(workforce.get_new_position(), workforce.get_current_position())
+
+    def test_newer_version_is_refused(self):
+        ServerScenario.from_file(LEGACY_SCENARIO_FILE).save(self.file_name)
+        with open(self.file_name, 'r+b') as file:
+            file.write(scenario_format.HEADER.pack(scenario_format.MAGIC, scenario_format.FORMAT_VERSION + 1, 0))
+        with self.assertRaises(RuntimeError):
+            ScenarioArchive(self.file_name)
+
+    def test_members_are_aligned(self):
+        ServerScenario.from_file(LEGACY_SCENARIO_FILE).save(self.file_name)
+        with open(self.file_name, 'rb') as file:
+            data = file.read()
+        _, _, number = scenario_format.HEADER.unpack_from(data)
+        for index in range(number):
+            _, offset, size = scenario_format.ENTRY.unpack_from(
+                data, scenario_format.HEADER.size + index * scenario_format.ENTRY.size)
+            self.assertEqual(offset % 8, 0)
+            self.assertLessEqual(offset + size, len(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Tests server/server_manager
+"""
+
+import unittest
+
+from PyQt5 import QtNetwork
+
+from imperialism_remake.base import constants
+from imperialism_remake.server import game_session
+from imperialism_remake.server.server_manager import ServerManager
+
+
+class FakeSessionHost:
+    """
+    Records the commands for the game sessions.
+    """
+
+    def __init__(self):
+        self.commands = []
+
+    def execute(self, command, game_id, client_id=None, content=None):
+        self.commands.append((command, game_id, client_id, content))
+
+
+class TestServerManager(unittest.TestCase):
+
+    def test_disconnected_client_leaves_its_game(self):
+        server = ServerManager()
+        server._session_host = FakeSessionHost()
+        socket = QtNetwork.QTcpSocket()
+        server._new_client(socket)
+        client = server.server_clients[0]
+        scenario_file = server._scenario_core_titles()[0][1]
+        client.channels[constants.C.LOBBY].received.emit(client, constants.C.LOBBY, constants.M.GAME_CREATE_REQUEST,
+                                                         {'scenario': scenario_file, 'nation': 1})
+        game_id = client.game_id
+
+        socket.disconnected.emit()
+        self.assertEqual(server.server_clients, [])
+        self.assertEqual(server.game_sessions, {})
+        self.assertEqual(server._session_host.commands[-2:], [(game_session.LEAVE, game_id, client.client_id, None),
+                                                              (game_session.CLOSE, game_id, None, None)])
+
+        # a second signal is ignored
+        socket.disconnected.emit()
+        self.assertEqual(server.server_clients, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
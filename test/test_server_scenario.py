@@ -0,0 +1,399 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Tests server/server_scenario
+"""
+
+import unittest
+
+from imperialism_remake.base import constants
+from imperialism_remake.server.models.nation_asset import NationAsset
+from imperialism_remake.server.models.neighbor_table import NeighborTable, NO_NEIGHBOR
+from imperialism_remake.server.models.prospector_resource_state import ProspectorResourceState
+from imperialism_remake.server.models.resource_visibility import ResourceVisibility
+from imperialism_remake.server.models.road_network import RoadNetwork
+from imperialism_remake.server.models.scenario_change_log import ScenarioChangeLog
+from imperialism_remake.server.models.server_scenario_base import ServerScenarioBase
+from imperialism_remake.server.models.structure import Structure
+from imperialism_remake.server.models.structure_type import StructureType
+from imperialism_remake.server.server_scenario import ServerScenario
+
+
+def create_scenario(columns=10, rows=8):
+    scenario = ServerScenario(ServerScenarioBase())
+    scenario.create_empty_map(columns, rows)
+    return scenario
+
+
+class TestTileIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.scenario = create_scenario()
+        self.nation = self.scenario.add_nation()
+        self.province = self.scenario.add_province()
+        self.scenario.transfer_province_to_nation(self.province, self.nation)
+
+    def test_change_province_map_tile(self):
+        self.scenario.change_province_map_tile(self.province, [3, 4])
+        self.assertEqual(self.scenario.province_at(3, 4), self.province)
+        self.assertEqual(self.scenario.nation_at(4, 3), self.nation)
+        self.assertIsNone(self.scenario.province_at(4, 3))
+
+        other_province = self.scenario.add_province()
+        self.scenario.change_province_map_tile(other_province, [3, 4])
+        self.assertEqual(self.scenario.province_at(3, 4), other_province)
+        self.assertIsNone(self.scenario.nation_at(4, 3))
+        self.assertNotIn([3, 4], self.scenario.province_property(self.province, constants.ProvinceProperty.TILES))
+
+    def test_remove_province_map_tile(self):
+        self.scenario.change_province_map_tile(self.province, [1, 2])
+        self.scenario.remove_province_map_tile(self.province, [1, 2])
+        self.assertIsNone(self.scenario.province_at(1, 2))
+        self.assertIsNone(self.scenario.nation_at(2, 1))
+
+    def test_transfer_and_remove_nation(self):
+        self.scenario.change_province_map_tile(self.province, [5, 5])
+        other_nation = self.scenario.add_nation()
+        self.scenario.transfer_province_to_nation(self.province, other_nation)
+        self.assertEqual(self.scenario.nation_at(5, 5), other_nation)
+
+        self.scenario.remove_nation(other_nation)
+        self.assertIsNone(self.scenario.nation_at(5, 5))
+        self.assertEqual(self.scenario.province_at(5, 5), self.province)
+
+    def test_outside_of_map(self):
+        self.assertIsNone(self.scenario.province_at(-1, -1))
+        self.assertIsNone(self.scenario.nation_at(100, 100))
+
+    def test_rebuild_on_update_scenario_base(self):
+        self.scenario.change_province_map_tile(self.province, [2, 2])
+        client_scenario = ServerScenario(self.scenario.get_scenario_base())
+        self.assertEqual(client_scenario.province_at(2, 2), self.province)
+
+        client_scenario.update_scenario_base(create_scenario().get_scenario_base())
+        self.assertIsNone(client_scenario.province_at(2, 2))
+
+
+class TestMapLayers(unittest.TestCase):
+
+    def test_layers_are_arrays(self):
+        scenario = create_scenario(4, 3)
+        scenario.set_terrain_at(3, 2, 5)
+        self.assertEqual(scenario.get_terrain_layer().typecode, 'B')
+        self.assertEqual(scenario.get_terrain_layer()[2 * 4 + 3], 5)
+        self.assertEqual(len(scenario.get_province_layer()), 12)
+
+    def test_lists_from_saved_scenarios_are_converted(self):
+        scenario_base = create_scenario(4, 3).get_scenario_base()
+        scenario_base.maps[ServerScenarioBase.TERRAIN] = [1] * 12
+        scenario = ServerScenario(scenario_base)
+        self.assertEqual(scenario.get_terrain_layer().typecode, 'B')
+        self.assertEqual(scenario.terrain_at(3, 2), 1)
+
+
+class TestNeighborTable(unittest.TestCase):
+
+    def setUp(self):
+        self.neighbor_table = NeighborTable(7, 5)
+
+    def test_staggered_rows(self):
+        # odd rows are shifted half a tile to the right
+        scenario = create_scenario(7, 5)
+        self.assertEqual(scenario.neighbored_tiles(3, 2), [[2, 2], [2, 1], [3, 1], [4, 2], [3, 3], [2, 3]])
+        self.assertEqual(scenario.neighbored_tiles(3, 1), [[2, 1], [3, 0], [4, 0], [4, 1], [4, 2], [3, 2]])
+        self.assertEqual(scenario.neighbor_position(0, 2, constants.TileDirections.WEST), None)
+        self.assertEqual(scenario.neighbor_position(3, 0, constants.TileDirections.NORTH_EAST), None)
+
+    def test_diagonals_beyond_west_and_east_edges(self):
+        # positions off the map, as the scenario has always given them
+        scenario = create_scenario(7, 5)
+        self.assertEqual(scenario.neighbor_position(0, 2, constants.TileDirections.NORTH_WEST), [-1, 1])
+        self.assertEqual(scenario.neighbored_tiles(0, 2), [None, [-1, 1], [0, 1], [1, 2], [0, 3], [-1, 3]])
+        self.assertEqual(scenario.neighbored_tiles(6, 1), [[5, 1], [6, 0], [7, 0], None, [7, 2], [6, 2]])
+        self.assertEqual(scenario.get_neighbor_table().neighbor(self.neighbor_table.index(0, 2), 1), NO_NEIGHBOR)
+
+    def test_map_border(self):
+        corner = self.neighbor_table.index(0, 0)
+        self.assertEqual(self.neighbor_table.neighbor(corner, 0), NO_NEIGHBOR)
+        self.assertEqual(sorted(self.neighbor_table.neighbors(corner)), [1, 7])
+        self.assertIsNone(self.neighbor_table.index(7, 0))
+
+    def test_rings(self):
+        center = self.neighbor_table.index(3, 2)
+        self.assertEqual(self.neighbor_table.ring(center, 0), [center])
+        self.assertEqual(len(self.neighbor_table.ring(center, 2)), 12)
+        self.assertEqual(len(self.neighbor_table.within_radius(center, 2)), 19)
+
+
+class TestRoadNetwork(unittest.TestCase):
+
+    def test_connected_components(self):
+        network = RoadNetwork([((0, 0), (0, 1)), ((0, 2), (0, 3))])
+        self.assertTrue(network.is_connected((0, 0), (0, 1)))
+        self.assertFalse(network.is_connected((0, 0), (0, 3)))
+        self.assertIsNone(network.component_of((5, 5)))
+
+        network.add_road([0, 1], [0, 2])
+        self.assertTrue(network.is_connected((0, 0), (0, 3)))
+
+    def test_add_road_once(self):
+        network = RoadNetwork()
+        self.assertTrue(network.add_road((1, 1), (1, 2)))
+        version = network.get_version()
+        self.assertFalse(network.add_road((1, 2), (1, 1)))
+        self.assertEqual(network.get_version(), version)
+        self.assertEqual(network.neighbors((1, 1)), {(1, 2)})
+
+    def test_remove_road_splits_component(self):
+        network = RoadNetwork([((0, 0), (0, 1)), ((0, 1), (0, 2)), ((0, 2), (0, 0)), ((0, 2), (0, 3))])
+        self.assertTrue(network.remove_road((0, 0), (0, 1)))
+        self.assertTrue(network.is_connected((0, 0), (0, 1)))
+
+        self.assertTrue(network.remove_road((0, 3), (0, 2)))
+        self.assertIsNone(network.component_of((0, 3)))
+        self.assertFalse(network.remove_road((0, 3), (0, 2)))
+
+        network.add_road((0, 3), (0, 4))
+        snapshot = network.snapshot()
+        self.assertTrue(network.remove_road((0, 2), (0, 0)))
+        self.assertFalse(network.is_connected((0, 0), (0, 1)))
+        self.assertTrue(network.is_connected((0, 1), (0, 2)))
+        self.assertTrue(snapshot.is_connected((0, 0), (0, 1)))
+        snapshot.release()
+
+    def test_directions(self):
+        network = RoadNetwork([((0, 0), (0, 1)), ((0, 1), (0, 0)), ((0, 1), (0, 2))])
+        self.assertEqual(network.directions_at((0, 0)), 2)
+        self.assertEqual(network.directions_at((0, 2)), 1)
+        self.assertEqual(network.directions_at((5, 5)), 0)
+
+        snapshot = network.snapshot()
+        self.assertTrue(network.remove_road((0, 0), (0, 1)))
+        network.add_road((0, 2), (0, 3))
+        self.assertEqual(network.directions_at((0, 0)), 0)
+        self.assertEqual(network.directions_at((0, 1)), 1)
+        self.assertEqual(network.directions_at((0, 2)), 2)
+        self.assertEqual(snapshot.directions_at((0, 0)), 2)
+        self.assertEqual(snapshot.directions_at((0, 2)), 1)
+        snapshot.release()
+
+    def test_scenario_roads_at(self):
+        scenario = create_scenario()
+        scenario.add_road([2, 2], [2, 3])
+        scenario.add_road((2, 4), (2, 3))
+        self.assertEqual(sorted(scenario.roads_at(2, 3)), [((2, 3), (2, 2)), ((2, 3), (2, 4))])
+
+        self.assertTrue(scenario.remove_road((2, 3), (2, 2)))
+        self.assertEqual(scenario.get_roads(), [((2, 4), (2, 3))])
+        self.assertEqual(scenario.roads_at(2, 2), [])
+
+    def test_scenario_keeps_network_up_to_date(self):
+        scenario = create_scenario()
+        scenario.add_road((2, 2), (2, 3))
+        self.assertTrue(scenario.get_road_network().has_road((2, 3), (2, 2)))
+
+
+class TestScenarioSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.scenario = create_scenario()
+        self.scenario.add_road((1, 1), (1, 2))
+        self.snapshot = self.scenario.create_snapshot()
+
+    def tearDown(self):
+        self.snapshot.release()
+
+    def test_roads_keep_state(self):
+        self.scenario.add_road((1, 2), (1, 3))
+        self.scenario.add_road((5, 5), (5, 6))
+
+        road_network = self.snapshot.get_road_network()
+        self.assertTrue(road_network.is_connected((1, 1), (1, 2)))
+        self.assertFalse(road_network.is_connected((1, 1), (1, 3)))
+        self.assertIsNone(road_network.component_of((5, 5)))
+        self.assertEqual(road_network.neighbors((1, 2)), {(1, 1)})
+        self.assertTrue(self.scenario.get_road_network().is_connected((1, 1), (1, 3)))
+
+    def test_structures_keep_state(self):
+        version = self.snapshot.get_structures_version()
+        self.scenario.add_structure(2, 3, Structure(1, 2, 3, StructureType.WAREHOUSE, None, 1))
+        self.scenario.add_structure(2, 3, Structure(2, 2, 3, StructureType.WAREHOUSE, None, 1))
+
+        self.assertIsNone(self.snapshot.get_structures_at(2, 3))
+        self.assertEqual(len(self.scenario.get_structures_at(2, 3)), 2)
+        self.assertEqual(self.snapshot.get_structures_version(), version)
+        self.assertNotEqual(self.scenario.get_structures_version(), version)
+
+    def test_upgraded_structures_keep_state(self):
+        self.snapshot.release()
+        self.scenario.add_structure(2, 3, Structure(1, 2, 3, StructureType.WAREHOUSE, None, 2))
+        self.snapshot = self.scenario.create_snapshot()
+
+        self.assertTrue(self.scenario.upgrade_structure(2, 3, 1))
+        self.assertFalse(self.scenario.upgrade_structure(2, 3, 1))
+        self.assertEqual(self.scenario.get_structures_at(2, 3)[0].get_level(), 2)
+        self.assertEqual(self.snapshot.get_structures_at(2, 3)[0].get_level(), 1)
+
+
+class TestScenarioChangeLog(unittest.TestCase):
+
+    def setUp(self):
+        self.scenario = create_scenario()
+        self.nation = self.scenario.add_nation()
+        self.other_nation = self.scenario.add_nation()
+        self.change_log = self.scenario.start_change_log()
+
+    def test_apply_changes(self):
+        version = self.change_log.get_version()
+        self.scenario.add_road((1, 1), (1, 2))
+        self.scenario.add_structure(1, 2, Structure(1, 1, 2, StructureType.WAREHOUSE, None, 1))
+        self.scenario.set_nation_prospector_resource_state(self.other_nation, 3, 3, 1,
+                                                           ProspectorResourceState.REVEALED)
+
+        client_scenario = create_scenario()
+        client_scenario.add_nation()
+        client_scenario.add_nation()
+        client_scenario.apply_changes(self.change_log.changes_since(version, self.nation))
+        self.assertEqual(client_scenario.get_roads(), [((1, 1), (1, 2))])
+        self.assertEqual(len(client_scenario.get_structures_at(1, 2)), 1)
+        self.assertEqual(client_scenario.get_nation_prospector_resource_state(self.other_nation, 3, 3),
+                         {0: ProspectorResourceState.HIDDEN})
+
+    def test_change_events(self):
+        version = self.change_log.get_version()
+        changes = []
+        self.scenario.add_change_event_handler(lambda kind, arguments: changes.append((kind, arguments)))
+        province = self.scenario.add_province()
+        self.scenario.set_terrain_at(1, 2, 3)
+        self.scenario.add_structure(1, 2, Structure(1, 1, 2, StructureType.WAREHOUSE, None, 2))
+        self.scenario.upgrade_structure(1, 2, 1)
+        self.scenario.change_province_map_tile(province, [4, 5])
+        self.scenario.transfer_province_to_nation(province, self.nation)
+        self.assertEqual([kind for kind, _ in changes],
+                         [ScenarioChangeLog.TERRAIN, ScenarioChangeLog.STRUCTURE, ScenarioChangeLog.UPGRADED_STRUCTURE,
+                          ScenarioChangeLog.PROVINCE_TILE, ScenarioChangeLog.PROVINCE_NATION])
+
+        # the change log has the same changes
+        self.assertEqual(self.change_log.changes_since(version, self.nation), changes)
+        client_scenario = create_scenario()
+        client_scenario.add_nation()
+        client_scenario.add_province()
+        client_scenario.apply_changes(changes)
+        self.assertEqual(client_scenario.terrain_at(1, 2), 3)
+        self.assertEqual(client_scenario.get_structures_at(1, 2)[0].get_level(), 2)
+        self.assertEqual(client_scenario.nation_at(5, 4), self.nation)
+
+    def test_remove_province_events(self):
+        province = self.scenario.add_province()
+        client_scenario = create_scenario()
+        client_scenario.add_nation()
+        client_scenario.add_nation()
+        self.assertEqual(client_scenario.add_province(), province)
+        first_version = self.change_log.get_version()
+        self.scenario.change_province_map_tile(province, [4, 5])
+        self.scenario.change_province_map_tile(province, [4, 6])
+        self.scenario.transfer_province_to_nation(province, self.nation)
+
+        version = self.change_log.get_version()
+        changes = []
+        self.scenario.add_change_event_handler(lambda kind, arguments: changes.append((kind, arguments)))
+        self.scenario.remove_province(province)
+        self.assertEqual(changes, [(ScenarioChangeLog.REMOVED_PROVINCE_TILE, (province, [4, 5])),
+                                   (ScenarioChangeLog.REMOVED_PROVINCE_TILE, (province, [4, 6])),
+                                   (ScenarioChangeLog.REMOVED_PROVINCE, (province,))])
+        self.assertEqual(self.change_log.changes_since(version, self.nation), changes)
+
+        # a client replaying all changes ends with the scenario of the server
+        client_scenario.apply_changes(self.change_log.changes_since(first_version, self.nation))
+        self.assertEqual(list(client_scenario.provinces()), list(self.scenario.provinces()))
+        self.assertIsNone(client_scenario.province_at(4, 5))
+        self.assertEqual(client_scenario.nation_property(self.nation, constants.NationProperty.PROVINCES),
+                         self.scenario.nation_property(self.nation, constants.NationProperty.PROVINCES))
+
+    def test_unknown_versions(self):
+        version = self.change_log.get_version()
+        self.scenario.add_road((1, 1), (1, 2))
+        self.change_log.forget_before([self.change_log.get_version()])
+        self.assertIsNone(self.change_log.changes_since(version, self.nation))
+        self.assertIsNone(self.change_log.changes_since(None, self.nation))
+        self.assertIsNone(create_scenario().start_change_log().changes_since(version, self.nation))
+        self.assertEqual(self.change_log.changes_since(self.change_log.get_version(), self.nation), [])
+
+
+class TestScenarioBaseForNation(unittest.TestCase):
+
+    def setUp(self):
+        self.scenario = create_scenario(2, 2)
+        self.scenario.get_scenario_base().rules['terrain_resources_settings'] = {1: {}, 2: {'invisible': True}}
+        for column, row, resource in ((0, 0, 1), (1, 0, 2), (1, 1, 2)):
+            self.scenario.set_terrain_resource_at(column, row, resource)
+        self.nations = [self.scenario.add_nation(), self.scenario.add_nation()]
+        for nation in self.nations:
+            self.scenario.set_nation_asset(nation, NationAsset(nation))
+        self.scenario.set_nation_prospector_resource_state(self.nations[0], 1, 1, 2, ProspectorResourceState.REVEALED)
+
+    def test_copies_of_several_nations(self):
+        frozen_scenario_base = self.scenario.freeze_scenario_base()
+        for nation in self.nations:
+            scenario_base = self.scenario.get_scenario_base_for_nation(nation, frozen_scenario_base)
+            # revealed resources are shown from the prospector states, not from the resource map
+            self.assertEqual(list(scenario_base.maps[ServerScenarioBase.RESOURCE]), [1, 0, 0, 0])
+            self.assertEqual([constants.NationProperty.ASSETS in scenario_base.nations[key] for key in self.nations],
+                             [key == nation for key in self.nations])
+            self.assertIsNot(scenario_base.nations[nation], self.scenario.get_scenario_base().nations[nation])
+
+        # the scenario itself is unchanged
+        self.assertEqual(list(self.scenario.get_terrain_resource_layer()), [1, 2, 0, 2])
+
+    def test_changes_give_the_whole_scenario(self):
+        nation = self.nations[0]
+        change_log = self.scenario.start_change_log()
+        version = change_log.get_version()
+        client_scenario = ServerScenario(self.scenario.get_scenario_base_for_nation(nation))
+
+        self.scenario.set_nation_prospector_resource_state(nation, 0, 1, 2, ProspectorResourceState.REVEALED)
+        self.scenario.set_nation_prospector_resource_state(nation, 1, 1, 2, ProspectorResourceState.PROCESSED)
+        self.scenario.set_nation_prospector_resource_state(self.nations[1], 0, 1, 2, ProspectorResourceState.REVEALED)
+        self.scenario.set_terrain_resource_at(0, 1, 2)
+        self.scenario.set_terrain_resource_at(1, 1, 1)
+        self.scenario.add_road((0, 0), (1, 0))
+        client_scenario.apply_changes(change_log.changes_since(version, nation))
+
+        scenario_base = self.scenario.get_scenario_base_for_nation(nation)
+        client_scenario_base = client_scenario.get_scenario_base()
+        self.assertEqual(list(client_scenario_base.maps[ServerScenarioBase.RESOURCE]),
+                         list(scenario_base.maps[ServerScenarioBase.RESOURCE]))
+        self.assertEqual(client_scenario.get_roads(), ServerScenario(scenario_base).get_roads())
+        self.assertEqual(client_scenario_base.nations[nation][constants.NationProperty.PROSPECTOR_RESOURCE_STATE],
+                         scenario_base.nations[nation][constants.NationProperty.PROSPECTOR_RESOURCE_STATE])
+
+
+class TestResourceVisibility(unittest.TestCase):
+
+    def test_invisible_resources(self):
+        # 2 x 2 map, resource 2 is invisible
+        visibility = ResourceVisibility([1, 2, 0, 2], {1: {}, 2: {'invisible': True}}, 2)
+        self.assertEqual(visibility.get_resource_layer().tolist(), [1, 0, 0, 0])
+
+        visibility.set_resource(0, 1, 1)
+        visibility.set_resource(0, 0, 2)
+        self.assertEqual(visibility.get_resource_layer().tolist(), [0, 0, 1, 0])
+        self.assertIsNot(visibility.get_resource_layer(), visibility.get_resource_layer())
+
+
+if __name__ == '__main__':
+    unittest.main()
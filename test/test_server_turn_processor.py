@@ -0,0 +1,137 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Tests server/turn_processing/server_turn_processor
+"""
+
+import concurrent.futures
+import multiprocessing
+import os
+import queue
+import threading
+import unittest
+import uuid
+
+from imperialism_remake.base import constants
+from imperialism_remake.server import wire_encoders
+from imperialism_remake.server.models.turn_planned import TurnPlanned
+from imperialism_remake.server.server_scenario import ServerScenario
+from imperialism_remake.server.turn_processing.server_turn_processor import ServerTurnProcessor
+
+SCENARIO_FILE = os.path.join(constants.SCENARIO_FOLDER, 'test01.scenario')
+
+
+class Client:
+
+    def __init__(self):
+        self.client_id = uuid.uuid4()
+
+
+class TestServerTurnProcessor(unittest.TestCase):
+
+    def setUp(self):
+        self.clients = [Client(), Client()]
+        self.turn_results = []
+
+    def create_processor(self, executor=None, calls=None, process_executor=None):
+        scenario = ServerScenario.from_file(SCENARIO_FILE)
+        processor = ServerTurnProcessor()
+        processor.set_scenario(scenario)
+        processor.set_executor(executor, calls, process_executor)
+        processor.set_turn_processing_finished_event_handler(
+            lambda client, turn_result: self.turn_results.append((client, turn_result)))
+        for client in self.clients:
+            processor.add_client(client)
+        return scenario, processor
+
+    def process_turn(self, processor, calls=None):
+        self.turn_results.clear()
+        for nation, client in enumerate(self.clients, start=1):
+            processor.client_turn_ended(client, TurnPlanned(nation))
+        while len(self.turn_results) < len(self.clients):
+            calls.get(timeout=30)()
+
+    def test_scenario_completed_on_event_loop(self):
+        calls = queue.SimpleQueue()
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            scenario, processor = self.create_processor(executor, calls.put)
+
+            # the parts of the scenario built on first use are not built by the executor
+            threads = []
+            for name in ('get_resource_layer', 'nation_property'):
+                def recorded(*arguments, method=getattr(scenario, name)):
+                    threads.append(threading.current_thread())
+                    return method(*arguments)
+                setattr(scenario, name, recorded)
+
+            self.process_turn(processor, calls)
+
+        self.assertTrue(threads)
+        self.assertEqual(set(threads), {threading.current_thread()})
+        self.assertEqual([client for client, _ in self.turn_results], self.clients)
+        self.assertTrue(all(turn_result.is_full() for _, turn_result in self.turn_results))
+
+    def test_same_results_with_executor(self):
+        scenario, processor = self.create_processor()
+        self.process_turn(processor)
+        raw_resources = [scenario.get_nation_asset(nation).get_raw_resources() for nation in (1, 2)]
+
+        calls = queue.SimpleQueue()
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            scenario, processor = self.create_processor(executor, calls.put)
+            self.process_turn(processor, calls)
+        self.assertEqual([scenario.get_nation_asset(nation).get_raw_resources() for nation in (1, 2)], raw_resources)
+
+    def test_cancel(self):
+        calls = queue.SimpleQueue()
+        release = threading.Event()
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            # the only thread is busy, the turn waits in the executor
+            executor.submit(release.wait)
+            scenario, processor = self.create_processor(executor, calls.put)
+            for nation, client in enumerate(self.clients, start=1):
+                processor.client_turn_ended(client, TurnPlanned(nation))
+            processor.cancel()
+            release.set()
+
+        self.assertTrue(calls.empty())
+        self.assertEqual(self.turn_results, [])
+
+    def test_full_turn_results_in_processes(self):
+        calls = queue.SimpleQueue()
+        with concurrent.futures.ThreadPoolExecutor(2) as executor, concurrent.futures.ProcessPoolExecutor(
+                2, mp_context=multiprocessing.get_context('spawn')) as process_executor:
+            scenario, processor = self.create_processor(executor, calls.put, process_executor)
+            self.process_turn(processor, calls)
+
+        # the scenario bases are encoded in the processes and decoded by the clients
+        codec = wire_encoders.create_codecs()[0]
+        for nation, (client, turn_result) in enumerate(self.turn_results, start=1):
+            self.assertIs(client, self.clients[nation - 1])
+            letter = codec.decode(codec.encode({'channel': constants.C.GAME,
+                                                'action': constants.M.GAME_TURN_PROCESS_RESPONSE,
+                                                'content': turn_result}))
+            decoded = letter['content'].get_server_scenario_base()
+            expected = scenario.get_scenario_base_for_nation(nation)
+            self.assertEqual(decoded.properties, expected.properties)
+            self.assertEqual(decoded.maps['resource'], expected.maps['resource'])
+            self.assertEqual(decoded.nations.keys(), expected.nations.keys())
+            self.assertEqual(letter['content'].get_version(), scenario.get_change_log().get_version())
+
+
+if __name__ == '__main__':
+    unittest.main()
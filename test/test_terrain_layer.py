@@ -0,0 +1,111 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+Tests client/common/terrain_layer
+"""
+
+import os
+import unittest
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from imperialism_remake.base import constants
+from imperialism_remake.client.common.terrain_layer import TerrainLayer
+from imperialism_remake.server.models.server_scenario_base import ServerScenarioBase
+from imperialism_remake.server.server_scenario import ServerScenario
+
+app = None
+
+
+def setUpModule():  # noqa: N802
+    global app
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+class ColorMapper:
+    """
+    A pixmap of one color for every type, none for type 0 if it is a resource mapper.
+    """
+
+    COLORS = [QtCore.Qt.blue, QtCore.Qt.green, QtCore.Qt.red]
+
+    def __init__(self, resources=False):
+        self._pixmaps = []
+        for color in self.COLORS:
+            pixmap = QtGui.QPixmap(constants.TILE_SIZE, constants.TILE_SIZE)
+            pixmap.fill(color)
+            self._pixmaps.append(pixmap)
+        if resources:
+            self._pixmaps[0] = None
+
+    def get_pixmap_of_type(self, type_value):
+        return self._pixmaps[type_value]
+
+
+class TestTerrainLayer(unittest.TestCase):
+
+    def setUp(self):
+        self.scenario = ServerScenario(ServerScenarioBase())
+        self.scenario.create_empty_map(20, 12)
+        self.scene = QtWidgets.QGraphicsScene()
+        self.layer = TerrainLayer(self.scenario, ColorMapper(), ColorMapper(True), chunk_size=8)
+        self.scene.addItem(self.layer)
+        self.scenario.add_change_event_handler(lambda kind, arguments: self.layer.invalidate_tile(*arguments[:2]))
+
+    def paint(self, x, y, width, height):
+        image = QtGui.QImage(width, height, QtGui.QImage.Format_ARGB32)
+        image.fill(QtCore.Qt.white)
+        painter = QtGui.QPainter(image)
+        self.scene.render(painter, QtCore.QRectF(0, 0, width, height), QtCore.QRectF(x, y, width, height))
+        painter.end()
+        return image
+
+    def color_of_tile(self, image, column, row):
+        # the center of the tile, the image starts at the upper left corner of the scene
+        x = (column + (row % 2) / 2 + 0.5) * constants.TILE_SIZE
+        y = (row + 0.5) * constants.TILE_SIZE
+        return QtGui.QColor(image.pixel(int(x), int(y)))
+
+    def test_paints_terrain_and_resources(self):
+        self.scenario.set_terrain_at(3, 3, 1)
+        self.scenario.set_terrain_at(9, 9, 1)
+        self.scenario.set_terrain_resource_at(9, 9, 2)
+
+        image = self.paint(0, 0, 21 * constants.TILE_SIZE, 12 * constants.TILE_SIZE)
+        self.assertEqual(self.color_of_tile(image, 0, 0), QtGui.QColor(QtCore.Qt.blue))
+        self.assertEqual(self.color_of_tile(image, 3, 3), QtGui.QColor(QtCore.Qt.green))
+        self.assertEqual(self.color_of_tile(image, 9, 9), QtGui.QColor(QtCore.Qt.red))
+        # the half tiles outside the map are not painted
+        self.assertEqual(QtGui.QColor(image.pixel(10, constants.TILE_SIZE + 10)), QtGui.QColor(QtCore.Qt.white))
+        self.assertEqual(self.layer.get_cached_chunks_count(), 6)
+
+    def test_only_painted_chunks_are_rendered(self):
+        self.paint(0, 0, 4 * constants.TILE_SIZE, 4 * constants.TILE_SIZE)
+        self.assertEqual(self.layer.get_cached_chunks_count(), 1)
+
+    def test_changed_tile_renders_its_chunk_again(self):
+        self.paint(0, 0, 21 * constants.TILE_SIZE, 12 * constants.TILE_SIZE)
+        self.scenario.set_terrain_at(12, 2, 2)
+        self.assertEqual(self.layer.get_cached_chunks_count(), 5)
+
+        image = self.paint(0, 0, 21 * constants.TILE_SIZE, 12 * constants.TILE_SIZE)
+        self.assertEqual(self.color_of_tile(image, 12, 2), QtGui.QColor(QtCore.Qt.red))
+        self.assertEqual(self.layer.get_cached_chunks_count(), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
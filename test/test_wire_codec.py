@@ -0,0 +1,118 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Tests lib/wire_codec and the encoders of the server models
+"""
+
+import os
+import unittest
+import uuid
+
+from imperialism_remake.base import constants
+from imperialism_remake.lib import wire_codec
+from imperialism_remake.server import wire_encoders
+from imperialism_remake.server.models.nation_asset import NationAsset
+from imperialism_remake.server.models.raw_resource_type import RawResourceType
+from imperialism_remake.server.server_scenario import ServerScenario
+from imperialism_remake.server.models.structure import Structure
+from imperialism_remake.server.models.structure_type import StructureType
+from imperialism_remake.server.models.turn_planned import TurnPlanned
+from imperialism_remake.server.models.workforce import Workforce
+from imperialism_remake.server.models.workforce_action import WorkforceAction
+from imperialism_remake.server.models.workforce_type import WorkforceType
+
+
+class TestCompactCodec(unittest.TestCase):
+
+    def test_basic_values(self):
+        codec = wire_codec.CompactCodec()
+        value = [None, True, False, 0, -1, 2 ** 70, 1.5, 'Café', b'\x00\xff', (1, 2), {'a': {3}}, uuid.uuid4()]
+        self.assertEqual(codec.decode(codec.encode(value)), value)
+
+    def test_encoded_values(self):
+        codec = wire_codec.CompactCodec()
+        value = {'a': [1, 'b', None]}
+        encoded = codec.encode((2, wire_codec.Encoded(codec.encode(value))))
+        self.assertEqual(encoded, codec.encode((2, value)))
+        self.assertEqual(codec.decode(encoded), (2, value))
+
+    def test_refuses_unregistered_types(self):
+        codec = wire_codec.CompactCodec()
+        with self.assertRaises(RuntimeError):
+            codec.encode([object()])
+        # pickled values (tag 13) are not read
+        with self.assertRaises(RuntimeError):
+            codec.decode(bytes((13, 1, 0)))
+
+
+class TestLetterCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.codec = wire_encoders.create_codecs()[0]
+
+    def test_scenario_base(self):
+        server_scenario = ServerScenario.from_file(os.path.join(constants.SCENARIO_FOLDER, 'test01.scenario'))
+        nation = next(iter(server_scenario.nations()))
+        scenario_base = server_scenario.get_scenario_base_for_nation(nation)
+        nation_asset = NationAsset(nation)
+        nation_asset.get_raw_resources()[RawResourceType.WHEAT] = 5
+        nation_asset.add_or_update_workforce(Workforce(uuid.uuid4(), 2, 3, nation, WorkforceType.ENGINEER))
+        scenario_base.nations[nation][constants.NationProperty.ASSETS] = nation_asset
+
+        letter = {'channel': constants.C.SYSTEM, 'action': constants.M.GAME_LOAD_RESPONSE,
+                  'content': {'server_scenario_base': scenario_base, 'nation': nation}}
+        decoded = self.codec.decode(self.codec.encode(letter))['content']['server_scenario_base']
+        for name in ('properties', 'provinces', 'rules', 'available_technologies'):
+            self.assertEqual(getattr(decoded, name), getattr(scenario_base, name))
+        self.assertEqual(decoded.maps['terrain'], scenario_base.maps['terrain'])
+        self.assertEqual(decoded.maps['resource'], scenario_base.maps['resource'])
+        decoded_asset = decoded.nations[nation][constants.NationProperty.ASSETS]
+        self.assertEqual(decoded_asset.get_raw_resources(), nation_asset.get_raw_resources())
+        self.assertEqual(decoded_asset.get_workforces_at(2, 3)[0].get_id(),
+                         next(iter(nation_asset.get_workforces())))
+
+    def test_turn_planned(self):
+        workforce = Workforce(uuid.uuid4(), 2, 3, 1, WorkforceType.ENGINEER)
+        workforce.plan_action(2, 4, WorkforceAction.MOVE)
+        turn_planned = TurnPlanned(1)
+        turn_planned.add_workforce(workforce)
+        turn_planned.set_acknowledged_version((uuid.uuid4(), 5))
+
+        letter = self.codec.decode(self.codec.encode({'channel': constants.C.GAME,
+                                                      'action': constants.M.GAME_TURN_PROCESS_REQUEST,
+                                                      'content': turn_planned}))
+        self.assertEqual(letter['channel'], constants.C.GAME)
+        self.assertEqual(letter['action'], constants.M.GAME_TURN_PROCESS_REQUEST)
+        decoded = letter['content']
+        self.assertEqual(decoded.get_acknowledged_version(), turn_planned.get_acknowledged_version())
+        decoded_workforce = decoded.get_workforces()[workforce.get_id()]
+        self.assertEqual(decoded_workforce.get_new_position(), (2, 4))
+        self.assertEqual(decoded_workforce.get_action(), WorkforceAction.MOVE)
+
+    def test_structure(self):
+        structure = Structure(uuid.uuid4(), 2, 3, StructureType.LOGGING, None, 3)
+        structure.upgrade()
+        letter = {'channel': constants.C.GAME, 'action': constants.M.GAME_TURN_PROCESS_RESPONSE,
+                  'content': [('structure', (2, 3, structure))]}
+        decoded = self.codec.decode(self.codec.encode(letter))['content'][0][1][2]
+        self.assertEqual(decoded.get_id(), structure.get_id())
+        self.assertEqual(decoded.get_level(), 2)
+        self.assertTrue(decoded.can_upgrade())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Tests lib/wire_protocol
+"""
+
+import unittest
+import zlib
+
+from imperialism_remake.base import constants
+from imperialism_remake.base.letters import CHANNEL_PRIORITIES
+from imperialism_remake.lib import wire_codec
+from imperialism_remake.lib.wire_protocol import FrameBuffer, WireProtocol
+
+
+def frame(payload):
+    return len(payload).to_bytes(4, 'big') + payload
+
+
+def message_frame(payload, flags=0):
+    # a message of the compact codec
+    return frame(bytes((wire_codec.CompactCodec.codec_id, flags)) + payload)
+
+
+class ProtocolSide:
+    """
+    A wire protocol whose writes, delivered messages, aborts and scheduled calls are recorded.
+    """
+
+    def __init__(self, **kwargs):
+        self.writes = []
+        self.delivered = []
+        self.aborts = []
+        self.scheduled = []
+        self.protocol = WireProtocol(self.writes.append, self.delivered.append, self.aborts.append,
+                                     self.scheduled.append, **kwargs)
+
+    def connect(self):
+        # the other side can decode the compact codec
+        self.protocol.send_handshake()
+        self.protocol.receive(frame(bytes((0, 0, wire_codec.CompactCodec.codec_id))))
+        self.writes.clear()
+
+    def run_scheduled(self):
+        scheduled, self.scheduled = self.scheduled, []
+        for call in scheduled:
+            call()
+
+    def written_messages(self, write):
+        codec = wire_codec.CompactCodec()
+        return [codec.decode(data[2:]) for data in FrameBuffer().add(write)]
+
+
+class TestFrameBuffer(unittest.TestCase):
+
+    def test_partial_frames(self):
+        frame_buffer = FrameBuffer()
+        data = frame(b'x' * 1000)
+        self.assertEqual(frame_buffer.add(data[:2]), [])
+        self.assertEqual(frame_buffer.add(data[2:500]), [])
+        self.assertEqual(frame_buffer.buffered(), 500)
+        self.assertEqual(frame_buffer.add(data[500:]), [b'x' * 1000])
+        self.assertEqual(frame_buffer.buffered(), 0)
+        self.assertEqual(frame_buffer.partial_reads, 2)
+
+    def test_coalesced_frames(self):
+        frame_buffer = FrameBuffer()
+        data = frame(b'ab') + frame(b'cd') + frame(b'efg') + frame(b'hij')[:3]
+        self.assertEqual(frame_buffer.add(data), [b'ab', b'cd', b'efg'])
+        self.assertEqual(frame_buffer.add(frame(b'hij')[3:]), [b'hij'])
+        self.assertEqual(frame_buffer.frames, 4)
+
+    def test_maximum_frame_size(self):
+        frame_buffer = FrameBuffer(max_frame_size=10)
+        with self.assertRaises(RuntimeError):
+            frame_buffer.add(frame(b'x' * 11)[:4])
+
+    def test_frame_without_codec_id_and_flags(self):
+        for payload in (b'', b'x'):
+            with self.assertRaises(RuntimeError):
+                FrameBuffer().add(frame(payload))
+
+
+class TestReceive(unittest.TestCase):
+
+    def setUp(self):
+        self.side = ProtocolSide(max_frame_size=1000)
+        self.side.connect()
+
+    def test_message(self):
+        self.side.protocol.receive(message_frame(wire_codec.CompactCodec().encode([1, 'a'])))
+        self.assertEqual(self.side.delivered, [[1, 'a']])
+        self.assertEqual(self.side.aborts, [])
+
+    def test_short_frame_aborts(self):
+        self.side.protocol.receive(frame(b'\x02'))
+        self.assertEqual(len(self.side.aborts), 1)
+        self.assertEqual(self.side.delivered, [])
+
+    def test_decompression_is_limited(self):
+        # far less than the maximal frame size compressed, far more decompressed
+        payload = zlib.compress(b'\x00' * 100000)
+        self.assertLess(len(payload), 1000)
+        self.side.protocol.receive(message_frame(payload, flags=1))
+        self.assertEqual(len(self.side.aborts), 1)
+        self.assertEqual(self.side.delivered, [])
+
+    def test_invalid_compressed_data_aborts(self):
+        self.side.protocol.receive(message_frame(b'not zlib', flags=1))
+        self.assertEqual(len(self.side.aborts), 1)
+
+    def test_undecodable_message_aborts(self):
+        # unknown tag, truncated string and trailing bytes
+        for payload in (b'\x3f', b'\x05\x10ab', b'\x00\x00'):
+            side = ProtocolSide()
+            side.connect()
+            side.protocol.receive(message_frame(payload))
+            self.assertEqual(len(side.aborts), 1, payload)
+            self.assertEqual(side.delivered, [])
+
+
+class TestBatching(unittest.TestCase):
+
+    def setUp(self):
+        self.side = ProtocolSide()
+        self.side.connect()
+        self.side.protocol.set_batching(True)
+
+    def test_single_write_per_iteration(self):
+        frames_sent = self.side.protocol.frames_sent
+        for value in range(3):
+            self.side.protocol.send(value)
+        self.assertEqual(self.side.writes, [])
+        # one flush is scheduled for the messages
+        self.assertEqual(len(self.side.scheduled), 1)
+        self.side.run_scheduled()
+        self.assertEqual(len(self.side.writes), 1)
+        self.assertEqual(self.side.written_messages(self.side.writes[0]), [0, 1, 2])
+        self.assertEqual(self.side.protocol.frames_sent, frames_sent + 3)
+
+    def test_priorities(self):
+        chat = CHANNEL_PRIORITIES[constants.C.CHAT]
+        game = CHANNEL_PRIORITIES[constants.C.GAME]
+        self.assertEqual(game, 0)
+        self.side.protocol.send('chat 1', chat)
+        self.side.protocol.send('game 1', game)
+        self.side.protocol.send('chat 2', chat)
+        self.side.protocol.send('game 2', game)
+        self.side.run_scheduled()
+        # game first, the order within each priority is kept
+        self.assertEqual(self.side.written_messages(self.side.writes[0]), ['game 1', 'game 2', 'chat 1', 'chat 2'])
+
+    def test_switching_off_flushes(self):
+        self.side.protocol.send('a')
+        self.side.protocol.send('b')
+        self.side.protocol.set_batching(False)
+        self.assertEqual(len(self.side.writes), 1)
+        self.assertEqual(self.side.written_messages(self.side.writes[0]), ['a', 'b'])
+        # nothing left for the scheduled flush, later messages are written at once
+        self.side.run_scheduled()
+        self.side.protocol.send('c')
+        self.assertEqual(len(self.side.writes), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
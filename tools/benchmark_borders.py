@@ -0,0 +1,129 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+Measures computing the province and nation borders of the main map by uniting a rectangle path per tile (how MainMap
+computed them before) and with the outlines of client.utils.borders, for a scenario.
+
+Reported are the times to compute all borders and to compute them again after a tile changed its province.
+"""
+
+import os
+import sys
+import time
+
+REPEAT = 5
+
+
+def tile_rect_borders(scenario):
+    """
+    A path per province from the rectangles of its tiles and a path per nation from the paths of its provinces.
+    """
+    paths = []
+    for nation in scenario.nations():
+        nation_path = QtGui.QPainterPath()
+        for province in scenario.provinces_of_nation(nation):
+            province_path = QtGui.QPainterPath()
+            for column, row in scenario.province_property(province, constants.ProvinceProperty.TILES):
+                sx, sy = scene_utils.scene_position(column, row)
+                province_path.addRect(sx * constants.TILE_SIZE, sy * constants.TILE_SIZE, constants.TILE_SIZE,
+                                      constants.TILE_SIZE)
+            province_path = province_path.simplified()
+            paths.append(province_path)
+            nation_path.addPath(province_path)
+        paths.append(nation_path.simplified())
+    return paths
+
+
+def outline_path(outline):
+    path = QtGui.QPainterPath()
+    for polygon in outline:
+        path.addPolygon(QtGui.QPolygonF([QtCore.QPointF(x * constants.TILE_SIZE, y * constants.TILE_SIZE)
+                                         for x, y in polygon]))
+        path.closeSubpath()
+    return path
+
+
+def outline_borders(scenario):
+    province_outlines = Outlines(scenario.get_neighbor_table(), scenario.get_province_layer())
+    nation_outlines = Outlines(scenario.get_neighbor_table(), scenario.get_nation_layer())
+    paths = [outline_path(province_outlines.outline(province)) for province in province_outlines.owners()]
+    paths.extend(outline_path(nation_outlines.outline(nation)) for nation in nation_outlines.owners())
+    return province_outlines, nation_outlines, paths
+
+
+def outline_borders_update(scenario, province_outlines, nation_outlines, indices):
+    paths = [outline_path(province_outlines.outline(province)) for province in province_outlines.update(indices)]
+    paths.extend(outline_path(nation_outlines.outline(nation)) for nation in nation_outlines.update(indices))
+    return paths
+
+
+def timed(function, *arguments):
+    times = []
+    result = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = function(*arguments)
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+
+if __name__ == '__main__':
+
+    # add source directory to path if needed
+    source_directory = os.path.realpath(os.path.join(os.path.abspath(os.path.dirname(__file__)), os.path.pardir,
+                                                     'source'))
+    if source_directory not in sys.path:
+        sys.path.insert(0, source_directory)
+
+    # no window is shown
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    from PyQt5 import QtCore, QtGui, QtWidgets
+
+    from imperialism_remake.base import constants
+    from imperialism_remake.client.utils import scene_utils
+    from imperialism_remake.client.utils.borders import Outlines
+    from imperialism_remake.server.server_scenario import ServerScenario
+
+    app = QtWidgets.QApplication([])
+
+    server_scenario = ServerScenario.from_file(os.path.join(constants.CORE_SCENARIO_FOLDER, 'Europe1814.scenario'))
+    print('{} provinces, {} nations, times in ms'.format(len(server_scenario.provinces()),
+                                                         len(server_scenario.nations())))
+
+    # a tile of a province of a nation moves to a neighbor province and back
+    neighbor_table = server_scenario.get_neighbor_table()
+    column, row, province, other_province = next(
+        (column, row, province, server_scenario.province_at(*neighbor_table.position(neighbor)))
+        for province in server_scenario.provinces()
+        if server_scenario.province_property(province, constants.ProvinceProperty.NATION) is not None
+        for column, row in server_scenario.province_property(province, constants.ProvinceProperty.TILES)
+        for neighbor in neighbor_table.neighbors(neighbor_table.index(column, row))
+        if server_scenario.province_at(*neighbor_table.position(neighbor)) not in (None, province))
+    index = neighbor_table.index(column, row)
+
+    print('{:>12} {:>10} {:>10}'.format('borders', 'all', 'changed'))
+    all_time = timed(tile_rect_borders, server_scenario)[0]
+    server_scenario.change_province_map_tile(other_province, [column, row])
+    changed_time = timed(tile_rect_borders, server_scenario)[0]
+    print('{:>12} {:>10.1f} {:>10.1f}'.format('tile rects', all_time, changed_time))
+
+    all_time, (province_outlines, nation_outlines, _) = timed(outline_borders, server_scenario)
+    server_scenario.change_province_map_tile(province, [column, row])
+    start = time.perf_counter()
+    outline_borders_update(server_scenario, province_outlines, nation_outlines, [index])
+    changed_time = (time.perf_counter() - start) * 1000
+    print('{:>12} {:>10.1f} {:>10.1f}'.format('outlines', all_time, changed_time))
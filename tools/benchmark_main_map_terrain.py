@@ -0,0 +1,140 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+Measures drawing the terrain of the main map with a graphics item for the terrain and the resource of every tile (how
+MainMap drew it before) and with the chunked terrain layer (client.common.terrain_layer), for a large random map.
+
+Reported are the number of graphics items, the time to create them, the time to paint a screen sized part of the map
+the first time and again (scrolling back), and the time to paint that part again after one tile changed.
+"""
+
+import os
+import random
+import sys
+import time
+
+COLUMNS = 200
+ROWS = 120
+SCREEN_WIDTH = 1920
+SCREEN_HEIGHT = 1080
+REPEAT = 5
+
+
+def create_scenario():
+    scenario = ServerScenario.from_file(os.path.join(constants.SCENARIO_FOLDER, 'test01.scenario'))
+    scenario.create_empty_map(COLUMNS, ROWS)
+    terrains = len(scenario.get_terrain_settings())
+    resources = len(scenario.get_terrain_resources_settings())
+    random.seed(0)
+    for row in range(ROWS):
+        for column in range(COLUMNS):
+            scenario.set_terrain_at(column, row, random.randrange(terrains))
+            if random.random() < 0.2:
+                scenario.set_terrain_resource_at(column, row, random.randint(1, resources))
+    return scenario
+
+
+def draw_per_tile(scene, scenario, terrain_mapper, resource_mapper):
+    for mapper, getter in ((terrain_mapper, scenario.terrain_at), (resource_mapper, scenario.terrain_resource_at)):
+        for column in range(COLUMNS):
+            for row in range(ROWS):
+                sx, sy = scene_utils.scene_position(column, row)
+                scene_utils.put_pixmap_in_tile_center(scene, mapper.get_pixmap_of_type(getter(column, row)), sx, sy,
+                                                      1)
+
+
+def draw_chunked(scene, scenario, terrain_mapper, resource_mapper):
+    layer = TerrainLayer(scenario, terrain_mapper, resource_mapper)
+    layer.setZValue(1)
+    scene.addItem(layer)
+    return layer
+
+
+def paint(scene, image, x, y):
+    painter = QtGui.QPainter(image)
+    target = QtCore.QRectF(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+    scene.render(painter, target, QtCore.QRectF(x, y, SCREEN_WIDTH, SCREEN_HEIGHT))
+    painter.end()
+
+
+def timed(function, *arguments):
+    start = time.perf_counter()
+    result = function(*arguments)
+    return time.perf_counter() - start, result
+
+
+def measure(name, draw, scenario, terrain_mapper, resource_mapper):
+    times = {'create': [], 'first paint': [], 'paint': [], 'paint changed': []}
+    items = 0
+    for _ in range(REPEAT):
+        scene = QtWidgets.QGraphicsScene()
+        scene.setSceneRect(0, 0, (COLUMNS + 0.5) * constants.TILE_SIZE, ROWS * constants.TILE_SIZE)
+        image = QtGui.QImage(SCREEN_WIDTH, SCREEN_HEIGHT, QtGui.QImage.Format_ARGB32_Premultiplied)
+
+        elapsed, layer = timed(draw, scene, scenario, terrain_mapper, resource_mapper)
+        times['create'].append(elapsed)
+        items = len(scene.items())
+        x, y = 50 * constants.TILE_SIZE, 40 * constants.TILE_SIZE
+        times['first paint'].append(timed(paint, scene, image, x, y)[0])
+        paint(scene, image, 0, 0)
+        times['paint'].append(timed(paint, scene, image, x, y)[0])
+
+        # the editor changes a tile in the visible part
+        column, row = 55, 45
+        scenario.set_terrain_at(column, row, (scenario.terrain_at(column, row) + 1) % 2)
+        if layer is not None:
+            layer.invalidate_tile(column, row)
+        else:
+            sx, sy = scene_utils.scene_position(column, row)
+            scene_utils.put_pixmap_in_tile_center(scene, terrain_mapper.get_pixmap_of_type(
+                scenario.terrain_at(column, row)), sx, sy, 1)
+        times['paint changed'].append(timed(paint, scene, image, x, y)[0])
+
+    print('{:>10} {:>8} {}'.format(name, items, ' '.join('{:>14.1f}'.format(min(t) * 1000) for t in times.values())))
+
+
+if __name__ == '__main__':
+
+    # add source directory to path if needed
+    source_directory = os.path.realpath(os.path.join(os.path.abspath(os.path.dirname(__file__)), os.path.pardir,
+                                                     'source'))
+    if source_directory not in sys.path:
+        sys.path.insert(0, source_directory)
+
+    # no window is shown
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    from PyQt5 import QtCore, QtGui, QtWidgets
+
+    from imperialism_remake.base import constants
+    from imperialism_remake.client.common.terrain_layer import TerrainLayer
+    from imperialism_remake.client.graphics.mappers.terrain_resource_to_pixmap_mapper import \
+        TerrainResourceToPixmapMapper
+    from imperialism_remake.client.graphics.mappers.terrain_type_to_pixmap_mapper import TerrainTypeToPixmapMapper
+    from imperialism_remake.client.utils import scene_utils
+    from imperialism_remake.server.server_scenario import ServerScenario
+
+    app = QtWidgets.QApplication([])
+
+    server_scenario = create_scenario()
+    terrain_type_mapper = TerrainTypeToPixmapMapper(server_scenario)
+    terrain_resource_mapper = TerrainResourceToPixmapMapper(server_scenario)
+
+    print('{}x{} tiles, painting {}x{} pixels, times in ms'.format(COLUMNS, ROWS, SCREEN_WIDTH, SCREEN_HEIGHT))
+    print('{:>10} {:>8} {:>14} {:>14} {:>14} {:>14}'.format('terrain', 'items', 'create', 'first paint', 'paint',
+                                                            'paint changed'))
+    measure('per tile', draw_per_tile, server_scenario, terrain_type_mapper, terrain_resource_mapper)
+    measure('chunked', draw_chunked, server_scenario, terrain_type_mapper, terrain_resource_mapper)
@@ -0,0 +1,92 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+"""
+Measures drawing the overview map of a large random map with a rectangle path per tile united per terrain or nation
+(how MiniMap drew it before) and as image of the layer (client.utils.layer_image).
+"""
+
+import os
+import random
+import sys
+import time
+
+COLUMNS = 200
+ROWS = 120
+NATIONS = 20
+TILE_SIZE = 1.5
+BLOCK_SIZE = 2
+REPEAT = 5
+
+
+def path_per_value(layer, values):
+    paths = {value: QtGui.QPainterPath() for value in values}
+    for row in range(ROWS):
+        for column in range(COLUMNS):
+            value = layer[row * COLUMNS + column]
+            if value in paths:
+                sx, sy = scene_utils.scene_position(column, row)
+                paths[value].addRect(sx * TILE_SIZE, sy * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+    return [path.simplified() for path in paths.values()]
+
+
+def image(layer, colors):
+    return layer_image(layer, COLUMNS, ROWS, colors, QtGui.QColor(QtCore.Qt.gray), BLOCK_SIZE, staggered=True)
+
+
+def timed(function, *arguments):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function(*arguments)
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+if __name__ == '__main__':
+
+    # add source directory to path if needed
+    source_directory = os.path.realpath(os.path.join(os.path.abspath(os.path.dirname(__file__)), os.path.pardir,
+                                                     'source'))
+    if source_directory not in sys.path:
+        sys.path.insert(0, source_directory)
+
+    # no window is shown
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    from array import array
+
+    from PyQt5 import QtCore, QtGui, QtWidgets
+
+    from imperialism_remake.client.utils import scene_utils
+    from imperialism_remake.client.utils.layer_image import layer_image
+
+    app = QtWidgets.QApplication([])
+
+    # terrains 0..6, nations in horizontal bands of random length, some tiles without nation
+    random.seed(0)
+    terrain_layer = array('B', (random.randrange(7) for _ in range(COLUMNS * ROWS)))
+    nation_layer = array('i')
+    while len(nation_layer) < COLUMNS * ROWS:
+        nation_layer.extend([random.randrange(-1, NATIONS)] * random.randint(1, 30))
+    del nation_layer[COLUMNS * ROWS:]
+    colors = {value: QtGui.QColor.fromHsv(value * 15, 200, 200) for value in range(NATIONS)}
+
+    print('{}x{} tiles, times in ms'.format(COLUMNS, ROWS))
+    print('{:>14} {:>10} {:>10}'.format('overview map', 'paths', 'image'))
+    for name, layer, values in (('geographical', terrain_layer, range(1, 7)),
+                                ('political', nation_layer, range(NATIONS))):
+        print('{:>14} {:>10.1f} {:>10.1f}'.format(name, timed(path_per_value, layer, values),
+                                                  timed(image, layer, {value: colors[value] for value in values})))
@@ -0,0 +1,131 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Measures the latency of a turn (from the last planned turn to the last turn result) depending on the number of
+nations and on how the per nation parts are processed: right away, in a thread pool with some workers or
+additionally with the turn results with the whole scenario created in a process pool.
+
+The first turn of a game sends the whole scenario to every nation (unknown version), the following turns only the
+changes. The whole scenario is encoded for sending when the turn result is created, so the speed-up of the process
+pool with several nations grows with the number of cores.
+"""
+
+import concurrent.futures
+import multiprocessing
+import os
+import queue
+import sys
+import time
+import uuid
+
+NATION_COUNTS = (2, 8, 23)
+#: (threads, processes), None threads processes the turn right away
+CONFIGURATIONS = ((None, None), (1, None), (4, None), (4, 1), (4, 2), (4, 4), (4, 8))
+REPEAT = 5
+
+
+def measure_turn(host, game_id, clients, versions, calls):
+    events = []
+    host.set_event_handler(events.append)
+    start = time.perf_counter()
+    for nation, client_id in enumerate(clients):
+        turn_planned = TurnPlanned(nation)
+        turn_planned.set_acknowledged_version(versions.get(client_id))
+        host.execute(game_session.TURN_ENDED, game_id, client_id, turn_planned)
+    # the event loop, calls from the executor
+    while len(events) < len(clients):
+        calls.get()()
+    duration = time.perf_counter() - start
+
+    for _, _, client_id, turn_result in events:
+        versions[client_id] = turn_result.get_version()
+    return duration
+
+
+class Host:
+    """
+    Session host with an exchangeable event handler.
+    """
+
+    def __init__(self, executor, calls, process_executor):
+        self._event_handler = None
+        self._host = game_session.SessionHost(lambda *event: self._event_handler(event), executor, calls.put,
+                                              process_executor)
+
+    def set_event_handler(self, event_handler):
+        self._event_handler = event_handler
+
+    def execute(self, *command):
+        self._host.execute(*command)
+
+
+def measure(scenario_file, nation_count, workers, processes):
+    calls = queue.SimpleQueue()
+    executor = None if workers is None else concurrent.futures.ThreadPoolExecutor(workers)
+    process_executor = None
+    if processes is not None:
+        process_executor = concurrent.futures.ProcessPoolExecutor(processes,
+                                                                  mp_context=multiprocessing.get_context('spawn'))
+    host = Host(executor, calls, process_executor)
+    host.set_event_handler(lambda event: None)
+
+    game_id = uuid.uuid4()
+    clients = [uuid.uuid4() for _ in range(nation_count)]
+    host.execute(game_session.CREATE, game_id, None, scenario_file)
+    for nation, client_id in enumerate(clients):
+        host.execute(game_session.JOIN, game_id, client_id, nation)
+
+    # starts the processes
+    measure_turn(host, game_id, clients, {}, calls)
+    whole_times, changes_times = [], []
+    for _ in range(REPEAT):
+        # without a known version every nation gets the whole scenario
+        whole_times.append(measure_turn(host, game_id, clients, {}, calls))
+    versions = {}
+    measure_turn(host, game_id, clients, versions, calls)
+    for _ in range(REPEAT):
+        changes_times.append(measure_turn(host, game_id, clients, versions, calls))
+
+    if executor is not None:
+        executor.shutdown()
+    if process_executor is not None:
+        process_executor.shutdown()
+    return min(whole_times), min(changes_times)
+
+
+if __name__ == '__main__':
+
+    # add source directory to path if needed
+    source_directory = os.path.realpath(os.path.join(os.path.abspath(os.path.dirname(__file__)), os.path.pardir,
+                                                     'source'))
+    if source_directory not in sys.path:
+        sys.path.insert(0, source_directory)
+
+    from imperialism_remake.server import game_session
+    from imperialism_remake.server.models.turn_planned import TurnPlanned
+
+    scenario_file = os.path.join(source_directory, 'imperialism_remake', 'data', 'scenarios', 'test01.scenario')
+
+    print('{} cpus'.format(os.cpu_count()))
+    print('{:>8} {:>8} {:>10} {:>18} {:>18}'.format('nations', 'threads', 'processes', 'whole [ms]', 'changes [ms]'))
+    for nation_count in NATION_COUNTS:
+        for workers, processes in CONFIGURATIONS:
+            whole_time, changes_time = measure(scenario_file, nation_count, workers, processes)
+            print('{:>8} {:>8} {:>10} {:>18.2f} {:>18.2f}'.format(nation_count,
+                                                                  'serial' if workers is None else workers,
+                                                                  '-' if processes is None else processes,
+                                                                  whole_time * 1000, changes_time * 1000))
@@ -0,0 +1,112 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Measures loading and saving of scenario files in the legacy format (zip archive of pickled values) and in the current
+format (see server.scenario_format), for the scenarios in the data folder and for a scenario with many structures and
+workforces added.
+
+Loading only the properties is what the lobby does for the list of scenarios.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+STRUCTURE_COUNT = 5000
+REPEAT = 20
+
+
+def save_legacy(scenario, file_name):
+    # how scenarios were saved before the current format
+    scenario_base = scenario.get_scenario_base()
+    with utils.ZipArchiveWriter(file_name) as writer:
+        writer.write_to_file(constants.SCENARIO_FILE_PROPERTIES, scenario_base.properties)
+        writer.write_to_file(constants.SCENARIO_FILE_MAPS, scenario_base.maps)
+        writer.write_to_file(constants.SCENARIO_FILE_PROVINCES, scenario_base.provinces)
+        writer.write_to_file(constants.SCENARIO_FILE_NATIONS, scenario_base.nations)
+
+
+def read_properties(file_name):
+    with ScenarioArchive(file_name) as archive:
+        return archive.properties()
+
+
+def add_structures_and_workforces(scenario, count):
+    columns = scenario[constants.ScenarioProperty.MAP_COLUMNS]
+    rows = scenario[constants.ScenarioProperty.MAP_ROWS]
+    nation = next(iter(scenario.nations()))
+    asset = scenario.nation_property(nation, constants.NationProperty.ASSETS)
+    for index in range(count):
+        row, column = divmod(index, columns)
+        row %= rows
+        scenario.add_structure(row, column, Structure(uuid.uuid4(), row, column, StructureType.WAREHOUSE, None, 1))
+        asset.add_or_update_workforce(Workforce(uuid.uuid4(), row, column, nation, WorkforceType.ENGINEER))
+
+
+def best_time(function, *arguments):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function(*arguments)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def measure(name, scenario, folder):
+    legacy_file = os.path.join(folder, 'legacy.scenario')
+    current_file = os.path.join(folder, 'current.scenario')
+    save_legacy(scenario, legacy_file)
+    scenario.save(current_file)
+
+    for format_name, file_name, save in (('legacy', legacy_file, lambda: save_legacy(scenario, legacy_file)),
+                                         ('current', current_file, lambda: scenario.save(current_file))):
+        print('{:>16} {:>8} {:>10} {:>12.2f} {:>12.2f} {:>12.2f}'.format(
+            name, format_name, os.path.getsize(file_name), best_time(ServerScenario.from_file, file_name) * 1000,
+            best_time(read_properties, file_name) * 1000, best_time(save) * 1000))
+
+
+if __name__ == '__main__':
+
+    # add source directory to path if needed
+    source_directory = os.path.realpath(os.path.join(os.path.abspath(os.path.dirname(__file__)), os.path.pardir,
+                                                     'source'))
+    if source_directory not in sys.path:
+        sys.path.insert(0, source_directory)
+
+    from imperialism_remake.base import constants
+    from imperialism_remake.lib import utils
+    from imperialism_remake.server.models.structure import Structure
+    from imperialism_remake.server.models.structure_type import StructureType
+    from imperialism_remake.server.models.workforce import Workforce
+    from imperialism_remake.server.models.workforce_type import WorkforceType
+    from imperialism_remake.server.scenario_archive import ScenarioArchive
+    from imperialism_remake.server.server_scenario import ServerScenario
+
+    scenario_files = {'test01': os.path.join(constants.SCENARIO_FOLDER, 'test01.scenario'),
+                      'Europe1814': os.path.join(constants.CORE_SCENARIO_FOLDER, 'Europe1814.scenario')}
+
+    print('{:>16} {:>8} {:>10} {:>12} {:>12} {:>12}'.format('scenario', 'format', 'size [B]', 'load [ms]',
+                                                            'title [ms]', 'save [ms]'))
+    with tempfile.TemporaryDirectory() as folder:
+        for name, scenario_file in scenario_files.items():
+            measure(name, ServerScenario.from_file(scenario_file), folder)
+
+        scenario = ServerScenario.from_file(scenario_files['test01'])
+        add_structures_and_workforces(scenario, STRUCTURE_COUNT)
+        measure('test01+{}'.format(STRUCTURE_COUNT), scenario, folder)
@@ -0,0 +1,127 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Measures how the cost of keeping the roads and structures from before a turn grows with the number of structures.
+
+Compares a deep copy of the roads and structures (as turn processing did before) with a scenario snapshot while an
+engineer builds a road and a warehouse, and also times a whole turn of the turn processor for a client that
+acknowledged the previous turn.
+"""
+
+import copy
+import os
+import sys
+import timeit
+import uuid
+
+STRUCTURE_COUNTS = (10, 100, 1000, 10000)
+REPEAT = 20
+
+
+def create_scenario(structure_count):
+    columns = 200
+    rows = max(10, structure_count // columns + 2)
+
+    scenario = ServerScenario(ServerScenarioBase())
+    scenario.create_empty_map(columns, rows)
+    scenario.get_scenario_base().rules['terrain_resources_settings'] = {}
+
+    nation = scenario.add_nation()
+    province = scenario.add_province()
+    scenario.transfer_province_to_nation(province, nation)
+    scenario.set_province_property(province, constants.ProvinceProperty.TOWN_LOCATION, [0, 0])
+    scenario.set_nation_property(nation, constants.NationProperty.CAPITAL_PROVINCE, province)
+    scenario.set_nation_asset(nation, NationAsset(nation))
+
+    # every structure is a warehouse on a single long road starting at the capital
+    for index in range(structure_count):
+        row, column = divmod(index, columns)
+        scenario.add_structure(row, column, Structure(uuid.uuid4(), row, column, StructureType.WAREHOUSE, None, 1))
+        if index > 0:
+            scenario.add_road(divmod(index - 1, columns), (row, column))
+    return scenario, nation
+
+
+def engineer_builds(scenario):
+    row = scenario.get_scenario_base().properties[constants.ScenarioProperty.MAP_ROWS] - 1
+    scenario.add_road((row, 0), (row, 1))
+    scenario.add_structure(row, 1, Structure(uuid.uuid4(), row, 1, StructureType.WAREHOUSE, None, 1))
+
+
+def keep_with_deepcopy(scenario):
+    old_roads = copy.deepcopy(scenario.get_roads())
+    old_structures = copy.deepcopy(scenario.get_structures())
+    engineer_builds(scenario)
+    return old_roads, old_structures
+
+
+def keep_with_snapshot(scenario):
+    snapshot = scenario.create_snapshot()
+    engineer_builds(scenario)
+    snapshot.release()
+
+
+class Client:
+    def __init__(self):
+        self.client_id = uuid.uuid4()
+
+
+def process_turn(turn_processor, client, nation, turn_results):
+    turn_planned = TurnPlanned(nation)
+    if turn_results:
+        turn_planned.set_acknowledged_version(turn_results[-1].get_version())
+    turn_processor._clients_turn_planned = {}
+    turn_processor.client_turn_ended(client, turn_planned)
+
+
+if __name__ == '__main__':
+
+    # add source directory to path if needed
+    source_directory = os.path.realpath(os.path.join(os.path.abspath(os.path.dirname(__file__)), os.path.pardir,
+                                                     'source'))
+    if source_directory not in sys.path:
+        sys.path.insert(0, source_directory)
+
+    from imperialism_remake.base import constants
+    from imperialism_remake.server.models.nation_asset import NationAsset
+    from imperialism_remake.server.models.server_scenario_base import ServerScenarioBase
+    from imperialism_remake.server.models.structure import Structure
+    from imperialism_remake.server.models.structure_type import StructureType
+    from imperialism_remake.server.models.turn_planned import TurnPlanned
+    from imperialism_remake.server.server_scenario import ServerScenario
+    from imperialism_remake.server.turn_processing.server_turn_processor import ServerTurnProcessor
+
+    print('{:>10} {:>14} {:>14} {:>14}'.format('structures', 'deepcopy [ms]', 'snapshot [ms]', 'turn [ms]'))
+    for structure_count in STRUCTURE_COUNTS:
+        scenario, nation = create_scenario(structure_count)
+        deepcopy_time = timeit.timeit(lambda: keep_with_deepcopy(scenario), number=REPEAT) / REPEAT
+        snapshot_time = timeit.timeit(lambda: keep_with_snapshot(scenario), number=REPEAT) / REPEAT
+
+        turn_processor = ServerTurnProcessor()
+        turn_processor.set_scenario(scenario)
+        turn_results = []
+        turn_processor.set_turn_processing_finished_event_handler(
+            lambda client, turn_result: turn_results.append(turn_result))
+        client = Client()
+        turn_processor.add_client(client)
+        # the first turn sends the whole scenario, the following only the changes
+        process_turn(turn_processor, client, nation, turn_results)
+        turn_time = timeit.timeit(lambda: process_turn(turn_processor, client, nation, turn_results),
+                                  number=REPEAT) / REPEAT
+
+        print('{:>10} {:>14.3f} {:>14.3f} {:>14.3f}'.format(structure_count, deepcopy_time * 1000,
+                                                            snapshot_time * 1000, turn_time * 1000))
@@ -0,0 +1,124 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Compares the bytes and the time (encoding and decoding) per message of the letter codec with compression above the
+threshold against pickle and zlib for every message, as messages were sent before.
+"""
+
+import os
+import pickle
+import sys
+import timeit
+import uuid
+import zlib
+
+
+def legacy_encode(letter):
+    return zlib.compress(pickle.dumps(letter))
+
+
+def legacy_decode(data):
+    return pickle.loads(zlib.decompress(data))
+
+
+def codec_encode(codec, letter):
+    data = codec.encode(letter)
+    if len(data) > wire_protocol.COMPRESSION_THRESHOLD:
+        return True, zlib.compress(data)
+    return False, data
+
+
+def codec_decode(codec, message):
+    compressed, data = message
+    if compressed:
+        data = zlib.decompress(data)
+    return codec.decode(data)
+
+
+def create_messages(scenario_file):
+    messages = []
+
+    messages.append(('chat message', {'channel': constants.C.CHAT, 'action': constants.M.CHAT_MESSAGE,
+                                      'content': '<b>Player</b>: hello'}))
+    messages.append(('monitor update', {'channel': constants.C.SYSTEM, 'action': constants.M.SYSTEM_MONITOR_UPDATE,
+                                        'content': 'Uptime 2h, 4 clients'}))
+
+    for workforce_count in (1, 20):
+        turn_planned = TurnPlanned(1)
+        for index in range(workforce_count):
+            workforce = Workforce(uuid.uuid4(), index, 3, 1, WorkforceType.ENGINEER)
+            workforce.plan_action(index, 4, WorkforceAction.MOVE)
+            turn_planned.add_workforce(workforce)
+        turn_planned.set_acknowledged_version((uuid.uuid4(), 10))
+        messages.append(('turn planned ({} workforces)'.format(workforce_count),
+                         {'channel': constants.C.GAME, 'action': constants.M.GAME_TURN_PROCESS_REQUEST,
+                          'content': turn_planned}))
+
+    scenario = ServerScenario.from_file(scenario_file)
+    nation = next(iter(scenario.nations()))
+    changes = [(ScenarioChangeLog.ROAD, ((index, 3), (index, 4))) for index in range(10)]
+    changes += [(ScenarioChangeLog.STRUCTURE,
+                 (index, 4, Structure(uuid.uuid4(), index, 4, StructureType.WAREHOUSE, None, 1)))
+                for index in range(10)]
+    messages.append(('turn result (20 changes)',
+                     {'channel': constants.C.GAME, 'action': constants.M.GAME_TURN_PROCESS_RESPONSE,
+                      'content': TurnResult((uuid.uuid4(), 10), None, changes, NationAsset(nation))}))
+    messages.append(('turn result (whole scenario)',
+                     {'channel': constants.C.GAME, 'action': constants.M.GAME_TURN_PROCESS_RESPONSE,
+                      'content': TurnResult((uuid.uuid4(), 10), scenario.get_scenario_base_for_nation(nation))}))
+    return messages
+
+
+def measure(function, argument):
+    number, _ = timeit.Timer(lambda: function(argument)).autorange()
+    return timeit.timeit(lambda: function(argument), number=number) / number * 1e6
+
+
+if __name__ == '__main__':
+
+    # add source directory to path if needed
+    source_directory = os.path.realpath(os.path.join(os.path.abspath(os.path.dirname(__file__)), os.path.pardir,
+                                                     'source'))
+    if source_directory not in sys.path:
+        sys.path.insert(0, source_directory)
+
+    from imperialism_remake.base import constants
+    from imperialism_remake.lib import wire_protocol
+    from imperialism_remake.server import wire_encoders
+    from imperialism_remake.server.models.nation_asset import NationAsset
+    from imperialism_remake.server.models.scenario_change_log import ScenarioChangeLog
+    from imperialism_remake.server.models.structure import Structure
+    from imperialism_remake.server.models.structure_type import StructureType
+    from imperialism_remake.server.models.turn_planned import TurnPlanned
+    from imperialism_remake.server.models.turn_result import TurnResult
+    from imperialism_remake.server.models.workforce import Workforce
+    from imperialism_remake.server.models.workforce_action import WorkforceAction
+    from imperialism_remake.server.models.workforce_type import WorkforceType
+    from imperialism_remake.server.server_scenario import ServerScenario
+
+    codec = wire_encoders.create_codecs()[0]
+    scenario_file = os.path.join(source_directory, 'imperialism_remake', 'data', 'scenarios', 'test01.scenario')
+
+    print('{:<30} {:>12} {:>12} {:>12} {:>12}'.format('message', 'pickle [B]', 'codec [B]', 'pickle [us]',
+                                                      'codec [us]'))
+    for name, letter in create_messages(scenario_file):
+        legacy_message = legacy_encode(letter)
+        message = codec_encode(codec, letter)
+        legacy_time = measure(lambda value: legacy_decode(legacy_encode(value)), letter)
+        codec_time = measure(lambda value: codec_decode(codec, codec_encode(codec, value)), letter)
+        print('{:<30} {:>12} {:>12} {:>12.1f} {:>12.1f}'.format(name, len(legacy_message), len(message[1]),
+                                                                legacy_time, codec_time))
@@ -0,0 +1,50 @@
+# Imperialism remake
+# Copyright (C) 2020 amtyurin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+"""
+Rewrites scenario files in the legacy format (zip archive of pickled values) in the current format (see
+server.scenario_format). Files already in the current format are left alone.
+
+Usage: python migrate_scenario_files.py [file or folder ...], without arguments the scenarios in the data folder.
+"""
+
+import os
+import sys
+
+if __name__ == '__main__':
+
+    # add source directory to path if needed
+    source_directory = os.path.realpath(os.path.join(os.path.abspath(os.path.dirname(__file__)), os.path.pardir,
+                                                     'source'))
+    if source_directory not in sys.path:
+        sys.path.insert(0, source_directory)
+
+    from imperialism_remake.base import constants
+    from imperialism_remake.server import scenario_format
+    from imperialism_remake.server.server_scenario import ServerScenario
+
+    paths = sys.argv[1:] or [constants.SCENARIO_FOLDER, constants.CORE_SCENARIO_FOLDER]
+    for path in paths:
+        if os.path.isdir(path):
+            file_names = [os.path.join(path, x) for x in sorted(os.listdir(path)) if x.endswith('.scenario')]
+        else:
+            file_names = [path]
+        for file_name in file_names:
+            if scenario_format.is_scenario_file(file_name):
+                print('{} is already in the current format'.format(file_name))
+                continue
+            ServerScenario.from_file(file_name).save(file_name)
+            print('migrated {}'.format(file_name))